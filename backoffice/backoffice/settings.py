@@ -96,7 +96,7 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'm3d_app.pagination.PaginacionHibrida',
     'PAGE_SIZE': 10
 }
 
@@ -112,6 +112,18 @@ DATABASES = {
 }
 
 
+# Cache
+# Se usa un cache en disco para que sea compartido entre los workers: el snapshot
+# del mapa se invalida desde cualquier proceso que guarde un Bloque o MapaBloque.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -151,6 +163,10 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'm3d_app/static'),
 ]
 
+# Archivos generados por el backoffice (exportaciones en segundo plano)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -205,6 +221,7 @@ JAZZMIN_SETTINGS = {
         "m3d_app.particularsinimpresora": "fas fa-user",
         "m3d_app.institucionconimpresora": "fas fa-building",
         "m3d_app.institucionsinimpresora": "fas fa-university",
+        "m3d_app.trabajoexportacion": "fas fa-file-download",
         "auth.user": "fas fa-user-shield",
         "auth.group": "fas fa-users-cog",
         "mapa_malvinas.mapabloque": "fas fa-book", 
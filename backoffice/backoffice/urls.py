@@ -27,7 +27,9 @@ from m3d_app.views import (
     InstitucionSinImpresoraViewSet,
     BloqueViewSet,
     NodoRecepcionViewSet,
-    SuscriptorConBloquesViewSet
+    SuscriptorConBloquesViewSet,
+    estadisticas,
+    progreso_diario
 )
 
 # Configurar el router para APIs
@@ -44,6 +46,9 @@ router.register(r'suscriptores-con-bloques', SuscriptorConBloquesViewSet, basena
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # Estadísticas y progreso de bloques (fuera del router: no son recursos de modelo)
+    path('api/estadisticas/', estadisticas, name='estadisticas'),
+    path('api/progreso-diario/', progreso_diario, name='progreso-diario'),
     # Incluir las URLs de la API
     path('api/', include(router.urls)),
     # Incluir URLs de autenticación para el navegador API
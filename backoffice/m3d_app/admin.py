@@ -1,6 +1,11 @@
 # En m3d_app/admin.py - Actualizar para aprovechar Jazzmin
 
-from django.contrib import admin
+import os
+from django.contrib import admin, messages
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
+from django.utils.html import format_html
 from .models.suscriptor.suscriptor import Suscriptor 
 from .models.suscriptor.institucion_con_impresora import InstitucionConImpresora
 from .models.suscriptor.institucion_sin_impresora import InstitucionSinImpresora
@@ -9,20 +14,47 @@ from .models.suscriptor.particular_sin_impresora import ParticularSinImpresora
 from .models.nodos.nodo_recepcion import NodoRecepcion
 from .models.impresora.impresora import Impresora
 from .models.bloque3d.bloque import Bloque
-import pandas as pd
-from io import BytesIO
-from django.http import HttpResponse
+from .models.exportacion.trabajo_exportacion import TrabajoExportacion
+from .utils.busqueda_suscriptores import BusquedaSuscriptores
+from .utils.exportacion import ExportadorExcel, ExportacionBloques, ExportacionSuscriptores
+
+def encolar_exportacion(request, tipo, formato):
+    """
+    Encola una exportación completa y redirige al listado de exportaciones.
+    """
+    trabajo, creado = TrabajoExportacion.encolar(tipo, formato, usuario=request.user)
+    if creado:
+        messages.success(request, f"Se encoló la exportación de {trabajo.get_tipo_display().lower()}. El archivo aparece en este listado cuando termina de generarse.")
+    else:
+        messages.info(request, f"Ya hay una exportación de {trabajo.get_tipo_display().lower()} en curso.")
+    return redirect('admin:m3d_app_trabajoexportacion_changelist')
+
+class BusquedaPorSuscriptorMixin:
+    """
+    Suma a la búsqueda del admin los registros cuyo suscriptor coincide con el
+    texto, usando el índice de BusquedaSuscriptores en lugar de search_fields
+    sobre suscriptor__*.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        resultado, puede_duplicar = super().get_search_results(request, queryset, search_term)
+        if search_term.strip():
+            suscriptores = BusquedaSuscriptores.buscar(Suscriptor.objects.all(), search_term, ordenar=False)
+            resultado |= queryset.filter(suscriptor__in=suscriptores.values('pk'))
+        return resultado, puede_duplicar
 
 # Clase para mejorar la visualización de Bloques en el admin
-class BloqueAdmin(admin.ModelAdmin):
+class BloqueAdmin(BusquedaPorSuscriptorMixin, admin.ModelAdmin):
     list_display = ('nro_sorteo', 'numero_bloque_display', 'seccion', 'numero', 'suscriptor', 'estado', 'fecha_asignacion')
+    list_select_related = ('suscriptor',)
     list_filter = ('seccion', 'estado')
-    search_fields = ('nro_sorteo', 'numero_bloque', 'seccion', 'numero', 'suscriptor__nombre', 'suscriptor__nombre_institucion')
+    # El suscriptor se busca con BusquedaPorSuscriptorMixin
+    search_fields = ('nro_sorteo', 'numero_bloque', 'seccion', 'numero')
     readonly_fields = ('seccion', 'numero')
     date_hierarchy = 'fecha_asignacion'
     list_per_page = 20
 
-    actions = ['exportar_excel']
+    actions = ['exportar_excel', 'exportar_csv']
     
     # Para mejorar la apariencia en Jazzmin
     list_display_links = ('numero_bloque_display',)
@@ -43,86 +75,33 @@ class BloqueAdmin(admin.ModelAdmin):
         Exporta los bloques seleccionados (o todos) a Excel
         """
         # Si no hay selección, usar todos los bloques
-        if not queryset:
+        if not queryset.exists():
             queryset = self.get_queryset(request)
         
-        # Preparar los datos para el Excel
-        data = []
-        for bloque in queryset.select_related('suscriptor', 'nodo_recepcion'):
-            # Obtener email del suscriptor
-            email_suscriptor = bloque.suscriptor.email if bloque.suscriptor else ''
-            
-            # Determinar estados binarios (1 o 0) según el estado actual
-            validacion = 1 if bloque.estado in ['validacion', 'entregado_nodo', 'recibido_m3d', 'diploma_entregado'] else 0
-            entregado_nodo = 1 if bloque.estado in ['entregado_nodo', 'recibido_m3d', 'diploma_entregado'] else 0
-            recibido_m3d = 1 if bloque.estado in ['recibido_m3d', 'diploma_entregado'] else 0
-            diploma_entregado = 1 if bloque.estado == 'diploma_entregado' else 0
-            
-            # Obtener información del suscriptor
-            nombre_suscriptor = ''
-            if bloque.suscriptor:
-                if bloque.suscriptor.tipo == 'institucion':
-                    nombre_suscriptor = bloque.suscriptor.nombre_institucion or bloque.suscriptor.nombre
-                else:
-                    apellido = bloque.suscriptor.apellido or ''
-                    nombre_suscriptor = f"{bloque.suscriptor.nombre} {apellido}".strip()
-            
-            # Información adicional del suscriptor
-            telefono = bloque.suscriptor.telefono if bloque.suscriptor else ''
-            direccion = ''
-            if bloque.suscriptor:
-                partes_direccion = [
-                    bloque.suscriptor.calle,
-                    bloque.suscriptor.numero,
-                    bloque.suscriptor.piso_depto,
-                    bloque.suscriptor.ciudad,
-                    bloque.suscriptor.provincia
-                ]
-                direccion = ', '.join([parte for parte in partes_direccion if parte])
-            
-            provincia = bloque.suscriptor.provincia if bloque.suscriptor else ''
-            codigo_postal = bloque.suscriptor.codigo_postal if bloque.suscriptor else ''
-            
-            # Crear fila de datos
-            fila = {
-                'N sorteo': bloque.nro_sorteo or '',
-                'prefijo': 'M3D',  # Siempre M3D
-                'bloque': bloque.numero_bloque,
-                'MAIL': email_suscriptor,
-                'NOMBRE': nombre_suscriptor,
-                'Telefono': telefono,
-                'Direccion': direccion,
-                'Provincia': provincia,
-                'Codigo Postal': codigo_postal,
-                'Estado Bloque': bloque.estado,
-                'Fecha Asignacion': bloque.fecha_asignacion.strftime('%Y-%m-%d %H:%M:%S') if bloque.fecha_asignacion else '',
-                'VALIDA FOTO': validacion,
-                'anoto nodo': entregado_nodo,
-                'RECIBIMOS': recibido_m3d,
-                'Diploma OK': diploma_entregado,
-            }
-            data.append(fila)
-        
-        # Crear DataFrame
-        df = pd.DataFrame(data)
-        
-        # Crear el archivo Excel en memoria
-        buffer = BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Bloques', index=False)
-        
-        # Preparar la respuesta HTTP
-        buffer.seek(0)
-        response = HttpResponse(
-            buffer.getvalue(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        return ExportadorExcel.respuesta_xlsx(
+            ExportacionBloques.COLUMNAS,
+            ExportacionBloques.filas(queryset),
+            ExportacionBloques.NOMBRE_HOJA,
+            f"{ExportacionBloques.NOMBRE_ARCHIVO}.xlsx"
         )
-        response['Content-Disposition'] = 'attachment; filename="bloques_malvinas3d.xlsx"'
-        
-        return response
     
     exportar_excel.short_description = "Exportar bloques seleccionados a Excel"
     
+    def exportar_csv(self, request, queryset):
+        """
+        Exporta los bloques seleccionados (o todos) a CSV, generado mientras se descarga
+        """
+        if not queryset.exists():
+            queryset = self.get_queryset(request)
+        
+        return ExportadorExcel.respuesta_csv(
+            ExportacionBloques.COLUMNAS,
+            ExportacionBloques.filas(queryset),
+            f"{ExportacionBloques.NOMBRE_ARCHIVO}.csv"
+        )
+    
+    exportar_csv.short_description = "Exportar bloques seleccionados a CSV"
+    
     
     # Fieldsets para organizar la información en pestañas
     fieldsets = [
@@ -147,204 +126,71 @@ class BloqueAdmin(admin.ModelAdmin):
         urls = super().get_urls()
         custom_urls = [
             path('exportar-todos/', self.admin_site.admin_view(self.exportar_todos_view), name='m3d_app_bloque_exportar_todos'),
+            path('exportar-todos-csv/', self.admin_site.admin_view(self.exportar_todos_csv_view), name='m3d_app_bloque_exportar_todos_csv'),
         ]
         return custom_urls + urls
     
     def exportar_todos_view(self, request):
         """
-        Vista para exportar todos los bloques
+        Vista para exportar todos los bloques. La exportación se encola y la
+        genera el comando procesar_exportaciones, fuera del request.
         """
-        todos_los_bloques = self.get_queryset(request)
-        return self.exportar_excel(request, todos_los_bloques)
+        return encolar_exportacion(request, 'bloques', 'xlsx')
+    
+    def exportar_todos_csv_view(self, request):
+        """
+        Vista para exportar todos los bloques a CSV, también en segundo plano
+        """
+        return encolar_exportacion(request, 'bloques', 'csv')
 
 # Clase para la visualización de Suscriptor con sus bloques
 class SuscriptorAdmin(admin.ModelAdmin):
-    list_display = ('id', 'nombre', 'apellido', 'nombre_institucion', 'email', 'tipo', 'telefono', 'provincia', 'get_bloques_count')
-    list_filter = ('tipo', 'provincia', 'contactado')
+    # bloques_count y estado_max son columnas de Suscriptor (ver AgregadosSuscriptor):
+    # ordenar y filtrar por progreso no agrega consultas ni agregaciones
+    list_display = ('id', 'nombre', 'apellido', 'nombre_institucion', 'email', 'tipo', 'telefono', 'provincia', 'bloques_count', 'estado_max')
+    list_filter = ('tipo', 'provincia', 'contactado', 'estado_max')
     search_fields = ('nombre', 'apellido', 'nombre_institucion', 'email', 'telefono')
     list_per_page = 20
 
-    actions = ['exportar_excel']
+    actions = ['exportar_excel', 'exportar_csv']
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Mismo índice que la API (search_fields solo habilita el buscador);
+        # también encuentra por DNI y por número de bloque
+        return BusquedaSuscriptores.buscar(queryset, search_term, ordenar=False), False
     
-    def get_bloques_count(self, obj):
-        return obj.bloques.count()
-    get_bloques_count.short_description = 'Bloques'
-
     def exportar_excel(self, request, queryset):
         """
         Exporta los suscriptores seleccionados (o todos) a Excel
         """
         # Si no hay selección, usar todos los suscriptores
-        if not queryset:
+        if not queryset.exists():
             queryset = self.get_queryset(request)
         
-        # Preparar los datos para el Excel
-        data = []
-        for suscriptor in queryset.prefetch_related('bloques', 'particular_con_impresora__impresora', 'particular_sin_impresora', 'institucion_con_impresora__impresora', 'institucion_sin_impresora'):
-            
-            # Datos básicos del suscriptor
-            fila = {
-                'ID': suscriptor.id,
-                'Tipo': suscriptor.tipo.title(),
-                'Email': suscriptor.email,
-                'Teléfono': suscriptor.telefono,
-                'Fecha Registro': suscriptor.fecha_registro.strftime('%Y-%m-%d %H:%M:%S'),
-                'Contactado': 'Sí' if suscriptor.contactado else 'No',
-                'Foto Validada': 'Sí' if suscriptor.foto_validada else 'No',
-                'Diploma Entregado': 'Sí' if suscriptor.diploma_entregado else 'No',
-                
-                # Dirección
-                'Calle': suscriptor.calle,
-                'Número': suscriptor.numero,
-                'Piso/Depto': suscriptor.piso_depto or '',
-                'Código Postal': suscriptor.codigo_postal,
-                'Ciudad': suscriptor.ciudad,
-                'Provincia': suscriptor.provincia,
-                
-                # Otros datos
-                'Como se enteró': suscriptor.como_se_entero or '',
-                'Motivo participación': suscriptor.motivo_participacion or '',
-            }
-            
-            # Datos específicos según el tipo
-            if suscriptor.tipo == 'particular':
-                fila.update({
-                    'Nombre': suscriptor.nombre,
-                    'Apellido': suscriptor.apellido or '',
-                    'Nombre Institución': '',
-                    'DNI': suscriptor.dni or '',
-                    'Fecha Nacimiento': suscriptor.fecha_nacimiento.strftime('%Y-%m-%d') if suscriptor.fecha_nacimiento else '',
-                    'Nombre Responsable': '',
-                    'DNI Responsable': '',
-                })
-                
-                # Verificar si tiene impresora
-                if hasattr(suscriptor, 'particular_con_impresora') and suscriptor.particular_con_impresora:
-                    fila['Tiene Impresora'] = 'Sí'
-                    impresora = suscriptor.particular_con_impresora.impresora
-                    if impresora:
-                        fila.update({
-                            'Años Experiencia': impresora.anios_experiencia or '',
-                            'Marcas y Modelos': impresora.marcas_modelos_equipos or '',
-                            'Materiales Uso': impresora.materiales_uso or '',
-                            'Cantidad Equipos': impresora.cantidad_equipos or '',
-                            'Dimensión Máxima': impresora.dimension_maxima_impresion or '',
-                            'Software Uso': impresora.software_uso or '',
-                        })
-                else:
-                    fila['Tiene Impresora'] = 'No'
-                    fila.update({
-                        'Años Experiencia': '',
-                        'Marcas y Modelos': '',
-                        'Materiales Uso': '',
-                        'Cantidad Equipos': '',
-                        'Dimensión Máxima': '',
-                        'Software Uso': '',
-                    })
-                    
-            else:  # institución
-                fila.update({
-                    'Nombre': suscriptor.nombre,
-                    'Apellido': '',
-                    'Nombre Institución': suscriptor.nombre_institucion or '',
-                    'DNI': '',
-                    'Fecha Nacimiento': '',
-                })
-                
-                # Datos del responsable
-                if hasattr(suscriptor, 'institucion_con_impresora') and suscriptor.institucion_con_impresora:
-                    fila['Tiene Impresora'] = 'Sí'
-                    fila.update({
-                        'Nombre Responsable': suscriptor.institucion_con_impresora.nombre_responsable or '',
-                        'DNI Responsable': suscriptor.institucion_con_impresora.dni_responsable or '',
-                    })
-                    impresora = suscriptor.institucion_con_impresora.impresora
-                    if impresora:
-                        fila.update({
-                            'Años Experiencia': impresora.anios_experiencia or '',
-                            'Marcas y Modelos': impresora.marcas_modelos_equipos or '',
-                            'Materiales Uso': impresora.materiales_uso or '',
-                            'Cantidad Equipos': impresora.cantidad_equipos or '',
-                            'Dimensión Máxima': impresora.dimension_maxima_impresion or '',
-                            'Software Uso': impresora.software_uso or '',
-                        })
-                elif hasattr(suscriptor, 'institucion_sin_impresora') and suscriptor.institucion_sin_impresora:
-                    fila['Tiene Impresora'] = 'No'
-                    fila.update({
-                        'Nombre Responsable': suscriptor.institucion_sin_impresora.nombre_responsable or '',
-                        'DNI Responsable': suscriptor.institucion_sin_impresora.dni_responsable or '',
-                        'Años Experiencia': '',
-                        'Marcas y Modelos': '',
-                        'Materiales Uso': '',
-                        'Cantidad Equipos': '',
-                        'Dimensión Máxima': '',
-                        'Software Uso': '',
-                    })
-            
-            # Información de bloques asignados
-            bloques = suscriptor.bloques.all()
-            bloques_info = []
-            for bloque in bloques:
-                bloques_info.append(f"{bloque.numero_bloque} ({bloque.estado})")
-            
-            fila['Bloques Asignados'] = '; '.join(bloques_info) if bloques_info else 'Ninguno'
-            fila['Cantidad Bloques'] = len(bloques_info)
-            
-            data.append(fila)
-        
-        # Crear DataFrame
-        df = pd.DataFrame(data)
-        
-        # Reordenar columnas para que sea más lógico
-        column_order = [
-            'ID', 'Tipo', 'Nombre', 'Apellido', 'Nombre Institución', 'Email', 'Teléfono',
-            'DNI', 'Fecha Nacimiento', 'Nombre Responsable', 'DNI Responsable',
-            'Calle', 'Número', 'Piso/Depto', 'Código Postal', 'Ciudad', 'Provincia',
-            'Tiene Impresora', 'Años Experiencia', 'Marcas y Modelos', 'Materiales Uso',
-            'Cantidad Equipos', 'Dimensión Máxima', 'Software Uso',
-            'Como se enteró', 'Motivo participación',
-            'Cantidad Bloques', 'Bloques Asignados',
-            'Contactado', 'Foto Validada', 'Diploma Entregado', 'Fecha Registro'
-        ]
-        
-        # Reordenar y asegurar que todas las columnas existan
-        for col in column_order:
-            if col not in df.columns:
-                df[col] = ''
-        
-        df = df[column_order]
-        
-        # Crear el archivo Excel en memoria
-        buffer = BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Suscriptores', index=False)
-            
-            # Ajustar ancho de columnas
-            worksheet = writer.sheets['Suscriptores']
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)  # Máximo 50 caracteres
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-        
-        # Preparar la respuesta HTTP
-        buffer.seek(0)
-        response = HttpResponse(
-            buffer.getvalue(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        return ExportadorExcel.respuesta_xlsx(
+            ExportacionSuscriptores.COLUMNAS,
+            ExportacionSuscriptores.filas(queryset),
+            ExportacionSuscriptores.NOMBRE_HOJA,
+            f"{ExportacionSuscriptores.NOMBRE_ARCHIVO}.xlsx"
         )
-        response['Content-Disposition'] = 'attachment; filename="suscriptores_malvinas3d.xlsx"'
-        
-        return response
     
     exportar_excel.short_description = "Exportar suscriptores seleccionados a Excel"
     
+    def exportar_csv(self, request, queryset):
+        """
+        Exporta los suscriptores seleccionados (o todos) a CSV, generado mientras se descarga
+        """
+        if not queryset.exists():
+            queryset = self.get_queryset(request)
+        
+        return ExportadorExcel.respuesta_csv(
+            ExportacionSuscriptores.COLUMNAS,
+            ExportacionSuscriptores.filas(queryset),
+            f"{ExportacionSuscriptores.NOMBRE_ARCHIVO}.csv"
+        )
+    
+    exportar_csv.short_description = "Exportar suscriptores seleccionados a CSV"
+    
     
     # Fieldsets para organizar la información
     fieldsets = [
@@ -371,21 +217,30 @@ class SuscriptorAdmin(admin.ModelAdmin):
         urls = super().get_urls()
         custom_urls = [
             path('exportar-todos/', self.admin_site.admin_view(self.exportar_todos_view), name='m3d_app_suscriptor_exportar_todos'),
+            path('exportar-todos-csv/', self.admin_site.admin_view(self.exportar_todos_csv_view), name='m3d_app_suscriptor_exportar_todos_csv'),
         ]
         return custom_urls + urls
     
     def exportar_todos_view(self, request):
         """
-        Vista para exportar todos los suscriptores
+        Vista para exportar todos los suscriptores. La exportación se encola y la
+        genera el comando procesar_exportaciones, fuera del request.
         """
-        todos_los_suscriptores = self.get_queryset(request)
-        return self.exportar_excel(request, todos_los_suscriptores)
+        return encolar_exportacion(request, 'suscriptores', 'xlsx')
+    
+    def exportar_todos_csv_view(self, request):
+        """
+        Vista para exportar todos los suscriptores a CSV, también en segundo plano
+        """
+        return encolar_exportacion(request, 'suscriptores', 'csv')
 
 # Configuración para Nodos de Recepción
-class NodoRecepcionAdmin(admin.ModelAdmin):
+class NodoRecepcionAdmin(BusquedaPorSuscriptorMixin, admin.ModelAdmin):
     list_display = ('id', 'suscriptor', 'responsable_impresion', 'provincia', 'nodo_seleccionado')
+    list_select_related = ('suscriptor',)
     list_filter = ('provincia', 'nodo_seleccionado')
-    search_fields = ('suscriptor__nombre', 'suscriptor__email', 'responsable_impresion')
+    # El suscriptor se busca con BusquedaPorSuscriptorMixin
+    search_fields = ('responsable_impresion',)
     list_per_page = 20
 
 # Configuración para Impresoras
@@ -394,6 +249,48 @@ class ImpresoraAdmin(admin.ModelAdmin):
     search_fields = ('marcas_modelos_equipos',)
     list_per_page = 20
 
+# Exportaciones generadas en segundo plano
+class TrabajoExportacionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'tipo', 'formato', 'estado', 'filas', 'reutilizado', 'fecha_solicitud', 'fecha_fin', 'solicitado_por', 'descargar')
+    list_filter = ('tipo', 'formato', 'estado')
+    list_per_page = 20
+    readonly_fields = ('tipo', 'formato', 'estado', 'archivo', 'huella', 'reutilizado', 'filas', 'error',
+                       'solicitado_por', 'fecha_solicitud', 'fecha_inicio', 'fecha_fin')
+
+    def has_add_permission(self, request):
+        # Se crean desde los botones "Exportar Todo" de bloques y suscriptores
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def descargar(self, obj):
+        if obj.estado != 'terminado' or not obj.archivo:
+            return '-'
+        url = reverse('admin:m3d_app_trabajoexportacion_descargar', args=[obj.pk])
+        return format_html('<a href="{}"><i class="fas fa-download"></i> Descargar</a>', url)
+    descargar.short_description = 'Archivo'
+
+    def get_urls(self):
+        """
+        Agregar URL para descargar el archivo generado
+        """
+        from django.urls import path
+        urls = super().get_urls()
+        custom_urls = [
+            path('<int:pk>/descargar/', self.admin_site.admin_view(self.descargar_view), name='m3d_app_trabajoexportacion_descargar'),
+        ]
+        return custom_urls + urls
+
+    def descargar_view(self, request, pk):
+        """
+        Descarga el archivo de una exportación terminada (solo para usuarios del admin)
+        """
+        trabajo = get_object_or_404(TrabajoExportacion, pk=pk, estado='terminado')
+        if not self.has_view_permission(request, trabajo) or not trabajo.archivo:
+            raise Http404
+        return FileResponse(trabajo.archivo.open('rb'), as_attachment=True, filename=os.path.basename(trabajo.archivo.name))
+
 # Registrar modelos con sus clases Admin personalizadas
 admin.site.register(Suscriptor, SuscriptorAdmin)
 admin.site.register(InstitucionConImpresora)
@@ -402,4 +299,5 @@ admin.site.register(ParticularConImpresora)
 admin.site.register(ParticularSinImpresora)
 admin.site.register(NodoRecepcion, NodoRecepcionAdmin)
 admin.site.register(Impresora, ImpresoraAdmin)
-admin.site.register(Bloque, BloqueAdmin)
\ No newline at end of file
+admin.site.register(Bloque, BloqueAdmin)
+admin.site.register(TrabajoExportacion, TrabajoExportacionAdmin)
\ No newline at end of file
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class M3DAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'm3d_app'
+
+    def ready(self):
+        # Registrar las señales que mantienen la versión del mapa, el índice de
+        # búsqueda y los agregados de cada suscriptor (el snapshot del mapa se
+        # invalida desde las señales de mapa_malvinas)
+        from . import signals  # noqa: F401
@@ -0,0 +1,28 @@
+# backoffice/m3d_app/management/commands/actualizar_progreso_diario.py
+
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from m3d_app.models.bloque3d.progreso_diario import ProgresoDiario
+
+class Command(BaseCommand):
+    help = 'Agrega a ProgresoDiario los días que faltan (y rehace el último, que pudo quedar a medias). Se puede correr desde cron'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=str, default=None, help='Recalcular desde esta fecha (AAAA-MM-DD), por ejemplo después de corregir bloques')
+        parser.add_argument('--completo', action='store_true', help='Recalcular toda la serie desde el primer día con datos')
+
+    def handle(self, *args, **options):
+        desde = None
+        if options['completo']:
+            desde = ProgresoDiario.primer_dia()
+            if desde is None:
+                self.stdout.write(self.style.WARNING('Los bloques no tienen fechas cargadas'))
+                return
+        elif options['desde']:
+            try:
+                desde = date.fromisoformat(options['desde'])
+            except ValueError:
+                raise CommandError(f"Fecha inválida: {options['desde']} (formato AAAA-MM-DD)")
+
+        dias = ProgresoDiario.actualizar(desde=desde)
+        self.stdout.write(self.style.SUCCESS(f'Días guardados: {dias}'))
@@ -0,0 +1,59 @@
+# backoffice/m3d_app/management/commands/benchmark_api.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from m3d_app.utils.benchmark_api import BenchmarkApi
+from m3d_app.utils.datos_sinteticos import DatosSinteticos
+
+class Command(BaseCommand):
+    help = 'Mide consultas y latencia de la API sobre datos sintéticos y las compara con la línea base'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=20, help='Llamadas por endpoint para medir latencia (por defecto: 20)')
+        parser.add_argument('--guardar', action='store_true', help='Guardar la medición como nueva línea base')
+        parser.add_argument('--linea-base', type=str, default=None, help='Ruta del JSON de línea base (por defecto: m3d_app/benchmark/linea_base_api.json)')
+        parser.add_argument('--umbral', type=float, default=BenchmarkApi.UMBRAL_LATENCIA, help='Aumento de p95 tolerado, en proporción (por defecto: 0.5)')
+        parser.add_argument('--sin-latencia', action='store_true', help='Comparar solo la cantidad de consultas')
+
+    def handle(self, *args, **options):
+        # Todo corre sobre una base de prueba descartable, nunca sobre la real
+        setup_test_environment()
+        nombre_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        
+        try:
+            datos = DatosSinteticos.generar()
+            self.stdout.write('Datos sintéticos: ' + ', '.join(f'{modelo}={cantidad}' for modelo, cantidad in datos.items()))
+            
+            resultados = BenchmarkApi.medir(repeticiones=options['repeticiones'])
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+        
+        self.stdout.write(f"\n{'Endpoint':<40} {'Consultas':>10} {'p50 ms':>10} {'p95 ms':>10}")
+        for nombre, medicion in resultados.items():
+            self.stdout.write(f"{nombre:<40} {medicion['consultas']:>10} {medicion['p50_ms']:>10} {medicion['p95_ms']:>10}")
+        
+        if options['guardar']:
+            BenchmarkApi.guardar_linea_base(resultados, datos, options['linea_base'])
+            self.stdout.write(self.style.SUCCESS('\nLínea base guardada'))
+            return
+        
+        try:
+            linea_base = BenchmarkApi.cargar_linea_base(options['linea_base'])
+        except FileNotFoundError:
+            raise CommandError('No hay línea base. Generarla con --guardar')
+        
+        regresiones = BenchmarkApi.comparar(
+            resultados,
+            linea_base,
+            umbral_latencia=options['umbral'],
+            latencia=not options['sin_latencia']
+        )
+        if regresiones:
+            for regresion in regresiones:
+                self.stdout.write(self.style.ERROR(f'  ✗ {regresion}'))
+            raise CommandError(f'Se encontraron {len(regresiones)} regresiones respecto de la línea base')
+        
+        self.stdout.write(self.style.SUCCESS('\nSin regresiones respecto de la línea base'))
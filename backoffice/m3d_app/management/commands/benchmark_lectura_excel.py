@@ -0,0 +1,67 @@
+# backoffice/m3d_app/management/commands/benchmark_lectura_excel.py
+
+import os
+import statistics
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from m3d_app.utils.excel_manager.base import ExcelManagerBase
+from m3d_app.utils.excel_manager.manage_bloques import ExcelManagerForBloques
+from m3d_app.utils.excel_manager.manage_subs import ExcelManagerForSubs
+
+class Command(BaseCommand):
+    help = 'Compara la lectura de los Excel de ejemplo: todas las columnas con openpyxl (anterior) contra solo las columnas usadas, con cada motor disponible'
+
+    # Archivo de assets -> columnas que lee su importador
+    ARCHIVOS = {
+        'Participantes MALVINAS3D.xlsx': ExcelManagerForBloques.columnas_participantes,
+        'form-particulares-con-impresora.xlsx': ExcelManagerForSubs.ESPECIFICACIONES['particulares_con_impresora'].columnas_excel(),
+        'form-particulares-sin-impresora.xlsx': ExcelManagerForSubs.ESPECIFICACIONES['particulares_sin_impresora'].columnas_excel(),
+        'form-instituciones-con-impresora.xlsx': ExcelManagerForSubs.ESPECIFICACIONES['instituciones_con_impresora'].columnas_excel(),
+        'form-instituciones-sin-impresora.xlsx': ExcelManagerForSubs.ESPECIFICACIONES['instituciones_sin_impresora'].columnas_excel(),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', type=str, default=os.path.join(settings.BASE_DIR.parent, 'assets'), help='Carpeta con los Excel de ejemplo (por defecto: assets)')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Lecturas por caso (por defecto: 5)')
+
+    @staticmethod
+    def medir(funcion, repeticiones):
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            df = funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        return df, round(statistics.median(tiempos), 1)
+
+    def handle(self, *args, **options):
+        motores = ExcelManagerBase.motores_excel()
+        if 'calamine' not in motores:
+            self.stdout.write(self.style.WARNING('python-calamine no está instalado: solo se mide openpyxl'))
+
+        self.stdout.write(f"{'Archivo':<40} {'Lectura':<22} {'Columnas':>9} {'p50 ms':>10}")
+        total_anterior = total_actual = 0
+        for archivo, columnas in self.ARCHIVOS.items():
+            ruta = os.path.join(options['dir'], archivo)
+            if not os.path.exists(ruta):
+                raise CommandError(f'El archivo {ruta} no existe')
+
+            casos = [('anterior (openpyxl)', 'openpyxl', None)]
+            casos += [(f'columnas ({motor})', motor, columnas) for motor in reversed(motores)]
+            resultados = []
+            for nombre, motor, columnas_caso in casos:
+                df, p50 = self.medir(lambda: ExcelManagerBase._leer_excel(ruta, 0, columnas_caso, motor), options['repeticiones'])
+                resultados.append((nombre, df, p50))
+                self.stdout.write(f"{archivo:<40} {nombre:<22} {df.shape[1]:>9} {p50:>10}")
+
+            # Con columnas, todos los motores tienen que leer lo mismo
+            leidos = [df for nombre, df, _ in resultados[1:]]
+            if any(not df.equals(leidos[0]) for df in leidos[1:]):
+                raise CommandError(f'Los motores leen datos distintos en {archivo}')
+
+            total_anterior += resultados[0][2]
+            total_actual += resultados[-1][2]
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Total: {total_anterior:.1f} ms -> {total_actual:.1f} ms ({total_anterior / total_actual:.1f}x más rápido)'
+        ))
@@ -0,0 +1,69 @@
+# backoffice/m3d_app/management/commands/benchmark_suscriptores_con_bloques.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from m3d_app.models.suscriptor.suscriptor import Suscriptor
+from m3d_app.serializers import SuscriptorConBloquesSerializer
+from m3d_app.utils.benchmark_api import BenchmarkApi
+from m3d_app.utils.datos_sinteticos import DatosSinteticos
+from m3d_app.views import SuscriptorConBloquesViewSet
+
+class Command(BaseCommand):
+    help = 'Compara el filtro solo_con_bloques con JOIN + DISTINCT (versión anterior) y con EXISTS + Prefetch (actual)'
+
+    # Versión anterior de /api/suscriptores-con-bloques/ con solo_con_bloques=true
+    @staticmethod
+    def queryset_distinct():
+        return Suscriptor.objects.prefetch_related('bloques').filter(bloques__isnull=False).distinct().order_by('pk')
+
+    @staticmethod
+    def queryset_exists():
+        return SuscriptorConBloquesViewSet.filtrar_con_bloques(SuscriptorConBloquesViewSet.queryset.all()).order_by('pk')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--suscriptores', type=int, default=1000, help='Cantidad de suscriptores sintéticos (por defecto: 1000)')
+        parser.add_argument('--repeticiones', type=int, default=20, help='Llamadas por caso para medir latencia (por defecto: 20)')
+
+    def handle(self, *args, **options):
+        variantes = [('distinct', self.queryset_distinct), ('exists', self.queryset_exists)]
+
+        # Como en benchmark_api, sobre una base de prueba descartable
+        setup_test_environment()
+        nombre_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        try:
+            datos = DatosSinteticos.generar(suscriptores=options['suscriptores'])
+            self.stdout.write(f"Datos sintéticos: {datos['suscriptores']} suscriptores, {datos['bloques']} bloques\n")
+
+            resultados = {}
+            for nombre, queryset in variantes:
+                # Lo que hace el endpoint con paginación por número: COUNT + primera página
+                def pagina():
+                    paginador = Paginator(queryset(), 10)
+                    return paginador.count, SuscriptorConBloquesSerializer(paginador.page(1), many=True).data
+
+                # Todos los suscriptores con bloques (sincronización completa)
+                def completo():
+                    return SuscriptorConBloquesSerializer(queryset(), many=True).data
+
+                for caso, funcion in (('pagina', pagina), ('completo', completo)):
+                    resultados[(nombre, caso)] = BenchmarkApi.medir_llamada(funcion, options['repeticiones'])
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+        for caso in ('pagina', 'completo'):
+            if resultados[('distinct', caso)][0] != resultados[('exists', caso)][0]:
+                raise CommandError(f'Las dos versiones devuelven resultados distintos ({caso})')
+
+        self.stdout.write(f"{'Versión':<12} {'Caso':<10} {'Consultas':>10} {'p50 ms':>10} {'p95 ms':>10}")
+        for (nombre, caso), (_, medicion) in resultados.items():
+            self.stdout.write(f"{nombre:<12} {caso:<10} {medicion['consultas']:>10} {medicion['p50_ms']:>10} {medicion['p95_ms']:>10}")
+
+        for caso in ('pagina', 'completo'):
+            antes = resultados[('distinct', caso)][1]['p50_ms']
+            despues = resultados[('exists', caso)][1]['p50_ms']
+            self.stdout.write(self.style.SUCCESS(f'{caso}: {antes / despues:.1f}x más rápido con EXISTS'))
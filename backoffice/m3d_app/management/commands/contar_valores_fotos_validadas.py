@@ -1,12 +1,15 @@
 # backoffice/m3d_app/management/commands/update_blocks_hierarchy.py
 
 from django.core.management.base import BaseCommand, CommandError
-import pandas as pd
 import os
 from django.db import transaction
 from m3d_app.models.bloque3d.bloque import Bloque
 from m3d_app.models.suscriptor.suscriptor import Suscriptor
+from m3d_app.signals import bloques_actualizados_en_lote
 from django.utils import timezone
+from m3d_app.utils.estado_excel import EstadoExcel
+from m3d_app.utils.excel_manager.manage_bloques import ExcelManagerForBloques
+from m3d_app.models.choices.estado import Estado
 
 class Command(BaseCommand):
     help = 'Actualiza los bloques respetando jerarquía de estados'
@@ -37,25 +40,19 @@ class Command(BaseCommand):
         self.stdout.write(f'Analizando archivo Excel: {file_path} (hoja: {sheet_name})')
         
         # Leer Excel
-        df = pd.read_excel(file_path, sheet_name=sheet_name)
+        df = ExcelManagerForBloques().read_excel(file_path, sheet_name, ExcelManagerForBloques.columnas_participantes)
         
         # Mostrar información básica
         self.stdout.write(f'Dimensiones del DataFrame: {df.shape}')
         
         # Identificar columnas relevantes
-        def find_column(search_terms):
-            for col in df.columns:
-                col_str = str(col).lower()
-                if any(term.lower() in col_str for term in search_terms):
-                    return col
-            return None
-        
-        col_bloque = find_column(['bloque'])
-        col_email = find_column(['mail', 'email', 'correo'])
-        col_validacion = find_column(['valida foto', 'validacion', 'foto'])
-        col_entregado = find_column(['anoto nodo', 'entregado', 'nodo'])
-        col_recibido = find_column(['recibimos', 'recibido'])
-        col_diploma = find_column(['diploma', 'ok', 'diploma ok'])
+        columnas = ExcelManagerForBloques.COLUMNAS_PARTICIPANTES.resolver(df.columns)
+        col_bloque = columnas['bloque']
+        col_email = columnas['email']
+        col_validacion = columnas['validacion']
+        col_entregado = columnas['entregado']
+        col_recibido = columnas['recibido']
+        col_diploma = columnas['diploma']
         
         if not col_bloque or not col_email:
             self.stdout.write(self.style.ERROR(f'No se encontraron columnas básicas: bloque={col_bloque}, email={col_email}'))
@@ -81,56 +78,29 @@ class Command(BaseCommand):
         
         # Definir la jerarquía de estados
         # Orden: libre -> asignado -> validacion -> entregado_nodo -> recibido_m3d -> diploma_entregado
-        jerarquia_estados = {
-            'libre': 0,
-            'asignado': 1,
-            'validacion': 2,
-            'entregado_nodo': 3,
-            'recibido_m3d': 4,
-            'diploma_entregado': 5
-        }
+        jerarquia_estados = Estado.get_jerarquia()
         
         # Contadores para análisis
         conteos = {estado: 0 for estado in jerarquia_estados.keys()}
         conteos_netos = {estado: 0 for estado in jerarquia_estados.keys()}
         
-        # Preparar estructuras de datos
-        bloques_info = {}  # Almacenará {numero_bloque: {email, estado_maximal}}
-        
-        # Procesar cada fila del Excel
-        for _, row in df.iterrows():
-            try:
-                # Obtener información básica
-                if pd.isna(row[col_bloque]) or pd.isna(row[col_email]):
-                    continue
-                    
-                numero_bloque = str(row[col_bloque]).strip()
-                email = str(row[col_email]).strip()
-                
-                # Iniciar con estado mínimo si hay email
-                estado_maximal = 'asignado'
-                
-                # Verificar cada estado posible
-                if col_diploma and not pd.isna(row[col_diploma]) and row[col_diploma] == 1:
-                    estado_maximal = 'diploma_entregado'
-                elif col_recibido and not pd.isna(row[col_recibido]) and row[col_recibido] == 1:
-                    estado_maximal = 'recibido_m3d'
-                elif col_entregado and not pd.isna(row[col_entregado]) and row[col_entregado] == 1:
-                    estado_maximal = 'entregado_nodo'
-                elif col_validacion and not pd.isna(row[col_validacion]) and row[col_validacion] == 1:
-                    estado_maximal = 'validacion'
-                
-                # Guardar la información
-                bloques_info[numero_bloque] = {
-                    'email': email,
-                    'estado': estado_maximal
-                }
-                
-                # Actualizar contadores
-                conteos[estado_maximal] += 1
-                
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'Error procesando fila: {str(e)}'))
+        # Solo las filas con bloque y email
+        df = df[df[col_bloque].notna() & df[col_email].notna()]
+        
+        # Estado maximal de cada fila (con email el mínimo es 'asignado'), de una sola vez
+        estados = EstadoExcel.derivar(df, col_validacion, col_entregado, col_recibido, col_diploma)
+        numeros_bloque = df[col_bloque].astype(str).str.strip()
+        emails = df[col_email].astype(str).str.strip()
+        
+        # Almacenará {numero_bloque: {email, estado_maximal}}; si un bloque se repite gana la última fila
+        bloques_info = {
+            numero_bloque: {'email': email, 'estado': estado}
+            for numero_bloque, email, estado in zip(numeros_bloque, emails, estados)
+        }
+        
+        # Actualizar contadores
+        for estado, cantidad in estados.value_counts().items():
+            conteos[estado] = int(cantidad)
         
         # Calcular conteos netos (bloques que están en ese estado exacto)
         for estado, nivel in jerarquia_estados.items():
@@ -152,15 +122,13 @@ class Command(BaseCommand):
             return
             
         with transaction.atomic():
-            # Restablecer todos los bloques a estado básico
+            # Restablecer todos los bloques a estado básico; las fechas se conservan
+            # (son el día en que cada bloque llegó al estado, ver ProgresoDiario)
             Bloque.objects.all().update(
                 estado='libre',
-                fecha_asignacion=None,
-                fecha_validacion=None,
-                fecha_entrega_nodo=None,
-                fecha_recepcion_m3d=None,
-                fecha_entrega_diploma=None
+                fecha_modificacion=timezone.now()
             )
+            bloques_actualizados_en_lote.send(sender=Bloque)
             self.stdout.write('Se restablecieron todos los bloques a estado "libre"')
             
             # Fecha actual para campos de fecha
@@ -183,17 +151,11 @@ class Command(BaseCommand):
                             'estado': info['estado']
                         }
                         
-                        # Establecer fechas según el estado
-                        if info['estado'] != 'libre':
-                            bloque.fecha_asignacion = now
-                        if info['estado'] in ['validacion', 'entregado_nodo', 'recibido_m3d', 'diploma_entregado']:
-                            bloque.fecha_validacion = now
-                        if info['estado'] in ['entregado_nodo', 'recibido_m3d', 'diploma_entregado']:
-                            bloque.fecha_entrega_nodo = now
-                        if info['estado'] in ['recibido_m3d', 'diploma_entregado']:
-                            bloque.fecha_recepcion_m3d = now
-                        if info['estado'] == 'diploma_entregado':
-                            bloque.fecha_entrega_diploma = now
+                        # Establecer fechas según el estado, sin pisar las que ya tenía
+                        nivel = jerarquia_estados[info['estado']]
+                        for campo_fecha, nivel_minimo in ExcelManagerForBloques.FECHAS_POR_ESTADO.items():
+                            if nivel >= nivel_minimo:
+                                setattr(bloque, campo_fecha, getattr(bloque, campo_fecha) or now)
                         
                         # Actualizar el estado del bloque
                         bloque.suscriptor = suscriptor
@@ -213,6 +175,12 @@ class Command(BaseCommand):
                     errores += 1
                     self.stdout.write(self.style.ERROR(f'Error actualizando bloque {numero_bloque}: {str(e)}'))
             
+            # Los bloques que quedaron libres pierden sus fechas
+            Bloque.objects.filter(estado='libre').update(
+                fecha_modificacion=timezone.now(),
+                **{campo_fecha: None for campo_fecha in ExcelManagerForBloques.FECHAS_POR_ESTADO}
+            )
+            
             # Mostrar resultado final
             self.stdout.write(self.style.SUCCESS(f'\nSe actualizaron {actualizados} bloques'))
             if errores > 0:
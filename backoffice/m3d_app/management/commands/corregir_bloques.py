@@ -2,7 +2,9 @@
 
 from django.core.management.base import BaseCommand
 from django.db.models import Q
+from django.utils import timezone
 from m3d_app.models.bloque3d.bloque import Bloque
+from m3d_app.signals import bloques_actualizados_en_lote
 
 class Command(BaseCommand):
     help = 'Corrige los estados de bloques sin suscriptor, estableciéndolos como "libre"'
@@ -38,7 +40,9 @@ class Command(BaseCommand):
             fecha_validacion=None,
             fecha_entrega_nodo=None,
             fecha_recepcion_m3d=None,
-            fecha_entrega_diploma=None
+            fecha_entrega_diploma=None,
+            fecha_modificacion=timezone.now()
         )
+        bloques_actualizados_en_lote.send(sender=Bloque)
         
         self.stdout.write(self.style.SUCCESS(f"Se han corregido {count} bloques. Todos tienen ahora estado 'libre'"))
\ No newline at end of file
@@ -0,0 +1,28 @@
+# backoffice/m3d_app/management/commands/explicar_consultas.py
+
+from django.core.management.base import BaseCommand, CommandError
+from m3d_app.utils.plan_consultas import PlanConsultas
+
+class Command(BaseCommand):
+    help = 'Muestra el plan de ejecución de las consultas más usadas del admin, la API y las importaciones, y falla si alguna no usa sus índices'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sql', action='store_true', help='Mostrar también el SQL de cada consulta')
+
+    def handle(self, *args, **options):
+        sin_indice = []
+        for resultado in PlanConsultas.revisar():
+            if resultado['usa_indice']:
+                self.stdout.write(self.style.SUCCESS(f"✓ {resultado['nombre']}"))
+            else:
+                sin_indice.append(resultado['nombre'])
+                self.stdout.write(self.style.ERROR(f"✗ {resultado['nombre']} (se esperaba: {', '.join(resultado['indices'])})"))
+            if options['sql']:
+                self.stdout.write(f"  {resultado['sql']}")
+            for linea in resultado['plan'].splitlines():
+                self.stdout.write(f"    {linea}")
+
+        if sin_indice:
+            raise CommandError(f'{len(sin_indice)} consultas no usan los índices esperados')
+
+        self.stdout.write(self.style.SUCCESS('\nTodas las consultas usan sus índices'))
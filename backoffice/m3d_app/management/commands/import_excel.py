@@ -14,7 +14,8 @@ class Command(BaseCommand):
             'instituciones_con_impresora',
             'instituciones_sin_impresora',
             'nodos_recepcion',
-            'bloques_participantes'
+            'bloques_participantes',
+            'bloques_participantes_en_lote'
         ], help='Tipo de datos a importar')
         parser.add_argument('--sheet', type=str, default='0', help='Nombre o índice de la hoja (por defecto: 0)')
 
@@ -61,7 +62,7 @@ class Command(BaseCommand):
             import_method = getattr(excel_manager, method_name)
             
             # Manejar de forma diferente según el tipo de importación
-            if import_type == 'bloques_participantes':
+            if import_type in ('bloques_participantes', 'bloques_participantes_en_lote'):
                 registros_creados, registros_actualizados, registros_con_error = import_method(file_path, sheet_name)
                 self.stdout.write(self.style.SUCCESS(
                     f'Importación completada: {registros_creados} registros creados, {registros_actualizados} registros actualizados, {registros_con_error} registros con error'
@@ -0,0 +1,39 @@
+# backoffice/m3d_app/management/commands/procesar_exportaciones.py
+
+import time
+from django.core.management.base import BaseCommand
+from m3d_app.utils.exportacion import ProcesadorExportaciones
+
+class Command(BaseCommand):
+    help = 'Genera los archivos de las exportaciones pedidas desde el admin'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true', help='Seguir esperando nuevas exportaciones en lugar de terminar')
+        parser.add_argument('--intervalo', type=int, default=10, help='Segundos entre revisiones en modo continuo (por defecto: 10)')
+
+    def handle(self, *args, **options):
+        continuo = options['continuo']
+        intervalo = options['intervalo']
+        
+        procesados = 0
+        while True:
+            trabajo = ProcesadorExportaciones.tomar_siguiente()
+            
+            if trabajo is None:
+                if not continuo:
+                    break
+                time.sleep(intervalo)
+                continue
+            
+            self.stdout.write(f'Procesando {trabajo}...')
+            trabajo = ProcesadorExportaciones.procesar(trabajo)
+            procesados += 1
+            
+            if trabajo.estado == 'error':
+                self.stdout.write(self.style.ERROR(f'  Error: {trabajo.error}'))
+            elif trabajo.reutilizado:
+                self.stdout.write(self.style.SUCCESS(f'  Sin cambios, se reutiliza {trabajo.archivo.name} ({trabajo.filas} filas)'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'  Generado {trabajo.archivo.name} ({trabajo.filas} filas)'))
+        
+        self.stdout.write(self.style.SUCCESS(f'Exportaciones procesadas: {procesados}'))
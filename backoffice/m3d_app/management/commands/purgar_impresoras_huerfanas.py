@@ -0,0 +1,28 @@
+# backoffice/m3d_app/management/commands/purgar_impresoras_huerfanas.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from m3d_app.models.impresora.impresora import Impresora
+
+class Command(BaseCommand):
+    help = 'Borra las impresoras que no están asociadas a ningún particular ni institución'
+
+    TAMANO_LOTE = 500
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo mostrar cuántas impresoras se borrarían')
+
+    def handle(self, *args, **options):
+        ids = list(Impresora.huerfanas().values_list('pk', flat=True))
+        self.stdout.write(f'Impresoras huérfanas: {len(ids)} de {Impresora.objects.count()}')
+
+        if options['dry_run'] or not ids:
+            return
+
+        # Se vuelve a filtrar por huérfanas al borrar, por si alguna se asoció mientras tanto
+        borradas = 0
+        with transaction.atomic():
+            for inicio in range(0, len(ids), self.TAMANO_LOTE):
+                lote = ids[inicio:inicio + self.TAMANO_LOTE]
+                borradas += Impresora.huerfanas().filter(pk__in=lote).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'Impresoras borradas: {borradas}'))
@@ -0,0 +1,22 @@
+# backoffice/m3d_app/management/commands/recompute_subscriber_aggregates.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from m3d_app.utils.agregados_suscriptor import AgregadosSuscriptor
+
+class Command(BaseCommand):
+    help = 'Recalcula bloques_count y estado_max de los suscriptores que no coinciden con sus bloques'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo mostrar cuántos suscriptores están desincronizados')
+
+    def handle(self, *args, **options):
+        desincronizados = AgregadosSuscriptor.desincronizados().count()
+        self.stdout.write(f'Suscriptores desincronizados: {desincronizados}')
+
+        if options['dry_run'] or not desincronizados:
+            return
+
+        with transaction.atomic():
+            actualizados = AgregadosSuscriptor.recalcular()
+        self.stdout.write(self.style.SUCCESS(f'Suscriptores actualizados: {actualizados}'))
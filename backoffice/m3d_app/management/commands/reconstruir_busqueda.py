@@ -0,0 +1,15 @@
+# backoffice/m3d_app/management/commands/reconstruir_busqueda.py
+
+from django.core.management.base import BaseCommand
+from m3d_app.utils.busqueda_suscriptores import BusquedaSuscriptores
+
+class Command(BaseCommand):
+    help = 'Vuelve a armar el índice de búsqueda de suscriptores (FTS5 en SQLite)'
+
+    def handle(self, *args, **options):
+        if not BusquedaSuscriptores.usa_fts():
+            self.stdout.write(self.style.WARNING('Esta base no usa el índice FTS5 (Postgres lo mantiene solo; otras bases buscan con icontains)'))
+            return
+
+        indexados = BusquedaSuscriptores.reconstruir()
+        self.stdout.write(self.style.SUCCESS(f'Suscriptores indexados: {indexados}'))
@@ -4,6 +4,7 @@ from django.core.management.base import BaseCommand
 import pandas as pd
 from m3d_app.models.bloque3d.bloque import Bloque
 from m3d_app.models.suscriptor.suscriptor import Suscriptor
+from m3d_app.utils.estado_excel import EstadoExcel
 
 class Command(BaseCommand):
     help = 'Revisa y corrige los estados de los bloques según el Excel original'
@@ -53,51 +54,46 @@ class Command(BaseCommand):
         # Lista para guardar los cambios a aplicar
         cambios = []
         
-        # Procesar cada fila del Excel
-        for idx, row in df.iterrows():
-            # Saltear primera fila si contiene encabezados
-            if idx == 0 and isinstance(row[COL_BLOQUE], str) and not row[COL_BLOQUE].strip().startswith(('0', '1', '2', '3', '4', '5', '6')):
-                continue
-                
-            # Obtener número de bloque
-            if COL_BLOQUE >= len(row) or pd.isna(row[COL_BLOQUE]):
-                continue
-                
-            numero_bloque = str(row[COL_BLOQUE]).strip()
-            if not numero_bloque or numero_bloque.lower() == 'nan':
-                continue
-                
-            stats['total_excel'] += 1
-            
-            # Determinar el estado correcto según el Excel
-            estado = 'libre'
-            
-            # Obtener email del suscriptor
-            email_suscriptor = None
-            if COL_EMAIL < len(row) and not pd.isna(row[COL_EMAIL]):
-                email_suscriptor = str(row[COL_EMAIL]).strip()
-                if email_suscriptor and email_suscriptor.lower() != 'nan':
-                    # Si hay email, al menos está asignado
-                    estado = 'asignado'
-                    stats['asignado'] += 1
-            else:
-                stats['libre'] += 1
-            
-            # Verificar estados más avanzados (de mayor a menor prioridad)
-            if COL_DIPLOMA < len(row) and not pd.isna(row[COL_DIPLOMA]) and row[COL_DIPLOMA] == 1:
-                estado = 'diploma_entregado'
-                stats['diploma_entregado'] += 1
-            elif COL_RECIBIDO < len(row) and not pd.isna(row[COL_RECIBIDO]) and row[COL_RECIBIDO] == 1:
-                estado = 'recibido_m3d'
-                stats['recibido_m3d'] += 1
-            elif COL_ENTREGADO < len(row) and not pd.isna(row[COL_ENTREGADO]) and row[COL_ENTREGADO] == 1:
-                estado = 'entregado_nodo'
-                stats['entregado_nodo'] += 1
-            elif COL_VALIDACION < len(row) and not pd.isna(row[COL_VALIDACION]) and row[COL_VALIDACION] == 1:
-                estado = 'validacion'
-                stats['validacion'] += 1
-            
-            # Comparar con el estado actual en la base de datos
+        # Texto de una columna por fila (None si la celda está vacía o la columna no existe)
+        def columna_texto(indice):
+            if indice >= df.shape[1]:
+                return pd.Series(None, index=df.index, dtype=object)
+            return df[indice].map(lambda valor: None if pd.isna(valor) else str(valor).strip())
+        
+        # Filas con número de bloque
+        numeros_bloque = columna_texto(COL_BLOQUE)
+        filas_validas = numeros_bloque.notna() & (numeros_bloque != '') & (numeros_bloque.str.lower() != 'nan')
+        
+        # Saltear primera fila si contiene encabezados
+        if len(df) and COL_BLOQUE < df.shape[1]:
+            primer_valor = df.iloc[0, COL_BLOQUE]
+            if isinstance(primer_valor, str) and not primer_valor.strip().startswith(('0', '1', '2', '3', '4', '5', '6')):
+                filas_validas.iloc[0] = False
+        
+        df = df[filas_validas]
+        numeros_bloque = numeros_bloque[filas_validas]
+        stats['total_excel'] = len(df)
+        
+        # Si hay email, al menos está asignado; sin email queda libre
+        emails = columna_texto(COL_EMAIL)[filas_validas]
+        tiene_email = emails.notna() & (emails != '') & (emails.str.lower() != 'nan')
+        stats['asignado'] = int(tiene_email.sum())
+        stats['libre'] = int(emails.isna().sum())
+        
+        # Determinar el estado correcto según el Excel, para todas las filas de una vez
+        estados = EstadoExcel.derivar(
+            df,
+            col_validacion=COL_VALIDACION,
+            col_entregado=COL_ENTREGADO,
+            col_recibido=COL_RECIBIDO,
+            col_diploma=COL_DIPLOMA,
+            base=tiene_email.map({True: 'asignado', False: 'libre'}),
+        )
+        for estado in ('validacion', 'entregado_nodo', 'recibido_m3d', 'diploma_entregado'):
+            stats[estado] = int((estados == estado).sum())
+        
+        # Comparar con el estado actual en la base de datos
+        for numero_bloque, estado in zip(numeros_bloque, estados):
             try:
                 bloque = Bloque.objects.get(numero_bloque=numero_bloque)
                 if bloque.estado != estado:
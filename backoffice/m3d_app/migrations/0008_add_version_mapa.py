@@ -0,0 +1,34 @@
+# Generated by Django 5.1.15 on 2026-10-18 15:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('m3d_app', '0007_change_nro_sorteo_to_charfield'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionMapa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valor', models.BigIntegerField(default=0)),
+                ('version_resincronizar', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Versión del mapa',
+                'verbose_name_plural': 'Versión del mapa',
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='bloque',
+            options={'verbose_name': 'Admin Bloques', 'verbose_name_plural': 'Admin Bloques'},
+        ),
+        migrations.AddField(
+            model_name='bloque',
+            name='version_mapa',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
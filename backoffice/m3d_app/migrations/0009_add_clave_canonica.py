@@ -0,0 +1,42 @@
+# Generated by Django 5.1.15 on 2026-10-18 15:42
+
+from django.db import migrations, models
+
+
+def clave_canonica(numero_bloque):
+    # Misma normalización que ClaveBloque.canonica al crear esta migración
+    # (copiada: los cambios posteriores a esa clase no deben alterar la migración)
+    if not numero_bloque:
+        return ""
+
+    clave = str(numero_bloque).strip().lstrip('*').replace(' ', '')
+
+    partes = clave.split('-')
+    if len(partes) == 2 and partes[0].isdigit() and partes[1].isdigit():
+        return f"{int(partes[0]):02d}-{int(partes[1]):02d}"
+
+    return clave
+
+
+def completar_clave_canonica(apps, schema_editor):
+    Bloque = apps.get_model('m3d_app', 'Bloque')
+    bloques = list(Bloque.objects.only('id', 'numero_bloque'))
+    for bloque in bloques:
+        bloque.clave_canonica = clave_canonica(bloque.numero_bloque)
+    Bloque.objects.bulk_update(bloques, ['clave_canonica'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('m3d_app', '0008_add_version_mapa'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bloque',
+            name='clave_canonica',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(completar_clave_canonica, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.15 on 2026-10-18 15:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('m3d_app', '0009_add_clave_canonica'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoExportacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('bloques', 'Bloques'), ('suscriptores', 'Suscriptores')], max_length=20)),
+                ('formato', models.CharField(choices=[('xlsx', 'Excel'), ('csv', 'CSV')], default='xlsx', max_length=10)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('terminado', 'Terminado'), ('error', 'Error')], db_index=True, default='pendiente', max_length=20)),
+                ('archivo', models.FileField(blank=True, upload_to='exportaciones/')),
+                ('huella', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('reutilizado', models.BooleanField(default=False)),
+                ('filas', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('fecha_solicitud', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='exportaciones', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Exportación',
+                'verbose_name_plural': 'Exportaciones',
+                'ordering': ['-fecha_solicitud'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('m3d_app', '0010_add_trabajo_exportacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bloque',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='suscriptor',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:09
+
+import unicodedata
+from collections import defaultdict
+
+import django.db.models.deletion
+import m3d_app.models.suscriptor.suscriptor_busqueda
+from django.db import OperationalError, migrations, models, transaction
+
+TABLA = 'm3d_app_suscriptor_busqueda'
+CAMPOS = ['nombre', 'apellido', 'nombre_institucion', 'email', 'dni', 'telefono']
+PESOS = '10.0, 10.0, 10.0, 5.0, 5.0, 2.0, 3.0'
+INDICES_TRIGRAM = [
+    ('m3d_app_suscriptor', campo) for campo in CAMPOS
+] + [('m3d_app_bloque', 'numero_bloque')]
+
+
+def normalizar(texto):
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def crear_indice(apps, schema_editor):
+    conexion = schema_editor.connection
+
+    if conexion.vendor == 'postgresql':
+        # Los icontains de Django son UPPER(columna::text) LIKE UPPER(...)
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for tabla, columna in INDICES_TRIGRAM:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS "{tabla}_{columna}_trgm" '
+                f'ON "{tabla}" USING gin ((UPPER("{columna}"::text)) gin_trgm_ops)'
+            )
+        return
+
+    if conexion.vendor != 'sqlite':
+        return
+
+    columnas = ', '.join(CAMPOS + ['bloques'])
+    try:
+        with transaction.atomic(using=conexion.alias):
+            schema_editor.execute(f"CREATE VIRTUAL TABLE \"{TABLA}\" USING fts5({columnas}, tokenize='trigram')")
+    except OperationalError:
+        # SQLite sin FTS5 o anterior a 3.34 (sin trigram): la búsqueda usa icontains
+        return
+    schema_editor.execute(f"INSERT INTO \"{TABLA}\"(\"{TABLA}\", rank) VALUES ('rank', 'bm25({PESOS})')")
+
+    # Indexar los suscriptores existentes
+    Suscriptor = apps.get_model('m3d_app', 'Suscriptor')
+    Bloque = apps.get_model('m3d_app', 'Bloque')
+    bloques = defaultdict(list)
+    for suscriptor_id, numero_bloque, clave_canonica in Bloque.objects.filter(
+        suscriptor__isnull=False
+    ).values_list('suscriptor_id', 'numero_bloque', 'clave_canonica'):
+        bloques[suscriptor_id] += [numero_bloque, clave_canonica]
+
+    filas = [
+        [pk, *map(normalizar, campos), normalizar(' '.join(bloques.get(pk, [])))]
+        for pk, *campos in Suscriptor.objects.values_list('pk', *CAMPOS)
+    ]
+    with conexion.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO "{TABLA}"(rowid, {columnas}) VALUES ({", ".join(["%s"] * (len(CAMPOS) + 2))})',
+            filas
+        )
+
+
+def borrar_indice(apps, schema_editor):
+    conexion = schema_editor.connection
+    if conexion.vendor == 'postgresql':
+        for tabla, columna in INDICES_TRIGRAM:
+            schema_editor.execute(f'DROP INDEX IF EXISTS "{tabla}_{columna}_trgm"')
+    elif conexion.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS "{TABLA}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('m3d_app', '0011_add_fecha_modificacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuscriptorBusqueda',
+            fields=[
+                ('suscriptor', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='busqueda', serialize=False, to='m3d_app.suscriptor')),
+                ('documento', m3d_app.models.suscriptor.suscriptor_busqueda.CampoFts(db_column='m3d_app_suscriptor_busqueda')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'm3d_app_suscriptor_busqueda',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
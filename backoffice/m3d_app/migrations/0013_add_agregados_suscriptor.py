@@ -0,0 +1,44 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:13
+
+import m3d_app.models.choices.estado
+from django.db import migrations, models
+from django.db.models import Case, Count, Max, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+JERARQUIA_ESTADOS = ['libre', 'asignado', 'validacion', 'entregado_nodo', 'recibido_m3d', 'diploma_entregado']
+
+
+def calcular_agregados(apps, schema_editor):
+    Suscriptor = apps.get_model('m3d_app', 'Suscriptor')
+    Bloque = apps.get_model('m3d_app', 'Bloque')
+
+    bloques = Bloque.objects.filter(suscriptor=OuterRef('pk')).order_by().values('suscriptor')
+    nivel = Case(
+        *[When(estado=estado, then=Value(indice)) for indice, estado in enumerate(JERARQUIA_ESTADOS)],
+        default=Value(0),
+    )
+    Suscriptor.objects.update(
+        bloques_count=Coalesce(Subquery(bloques.annotate(total=Count('pk')).values('total')), 0),
+        estado_max=Coalesce(Subquery(bloques.annotate(nivel=Max(nivel)).values('nivel')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('m3d_app', '0012_add_busqueda_suscriptores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='suscriptor',
+            name='bloques_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='Bloques'),
+        ),
+        migrations.AddField(
+            model_name='suscriptor',
+            name='estado_max',
+            field=models.PositiveSmallIntegerField(choices=m3d_app.models.choices.estado.Estado.get_all_niveles, db_index=True, default=0, editable=False, verbose_name='Estado máximo'),
+        ),
+        migrations.RunPython(calcular_agregados, migrations.RunPython.noop),
+    ]
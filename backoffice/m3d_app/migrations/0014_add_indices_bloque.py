@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('m3d_app', '0013_add_agregados_suscriptor'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bloque',
+            index=models.Index(fields=['seccion', 'estado'], name='bloque_seccion_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bloque',
+            index=models.Index(fields=['estado', 'fecha_asignacion'], name='bloque_estado_fecha_asig_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bloque',
+            index=models.Index(fields=['fecha_asignacion'], name='bloque_fecha_asignacion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bloque',
+            index=models.Index(fields=['suscriptor', 'estado'], name='bloque_suscriptor_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bloque',
+            index=models.Index(fields=['nro_sorteo'], name='bloque_nro_sorteo_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('m3d_app', '0014_add_indices_bloque'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgresoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True)),
+                ('asignados', models.PositiveIntegerField(default=0)),
+                ('validados', models.PositiveIntegerField(default=0)),
+                ('entregados_nodo', models.PositiveIntegerField(default=0)),
+                ('recibidos_m3d', models.PositiveIntegerField(default=0)),
+                ('diplomas_entregados', models.PositiveIntegerField(default=0)),
+                ('fecha_calculo', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Progreso diario',
+                'verbose_name_plural': 'Progreso diario',
+                'ordering': ['fecha'],
+            },
+        ),
+    ]
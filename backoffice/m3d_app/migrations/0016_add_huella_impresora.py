@@ -0,0 +1,39 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:22
+
+import hashlib
+import json
+from django.db import migrations, models
+
+CAMPOS_HUELLA = (
+    'anios_experiencia', 'marcas_modelos_equipos', 'materiales_uso',
+    'cantidad_equipos', 'dimension_maxima_impresion', 'software_uso',
+)
+
+
+def calcular_huellas(apps, schema_editor):
+    # Misma cuenta que Impresora.calcular_huella (los modelos de la migración no tienen sus métodos)
+    Impresora = apps.get_model('m3d_app', 'Impresora')
+    impresoras = list(Impresora.objects.all())
+    for impresora in impresoras:
+        valores = []
+        for campo in CAMPOS_HUELLA:
+            valor = getattr(impresora, campo)
+            valores.append(None if valor is None else str(valor))
+        impresora.huella = hashlib.sha256(json.dumps(valores).encode()).hexdigest()
+    Impresora.objects.bulk_update(impresoras, ['huella'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('m3d_app', '0015_add_progreso_diario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='impresora',
+            name='huella',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(calcular_huellas, migrations.RunPython.noop),
+    ]
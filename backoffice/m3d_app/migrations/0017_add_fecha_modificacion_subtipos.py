@@ -0,0 +1,43 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('m3d_app', '0016_add_huella_impresora'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='impresora',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='institucionconimpresora',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='institucionsinimpresora',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='nodorecepcion',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='particularconimpresora',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='particularsinimpresora',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -3,7 +3,11 @@ from .suscriptor.institucion_con_impresora import InstitucionConImpresora
 from .suscriptor.institucion_sin_impresora import InstitucionSinImpresora
 from .suscriptor.particular_con_impresora import ParticularConImpresora
 from .suscriptor.particular_sin_impresora import ParticularSinImpresora
+from .suscriptor.suscriptor_busqueda import SuscriptorBusqueda
 from .nodos.nodo_recepcion import NodoRecepcion
 from .impresora.impresora import Impresora
 from .suscriptor.suscriptor import Suscriptor
 from .bloque3d.bloque import Bloque
+from .bloque3d.version_mapa import VersionMapa
+from .bloque3d.progreso_diario import ProgresoDiario
+from .exportacion.trabajo_exportacion import TrabajoExportacion
@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from ..suscriptor.suscriptor import Suscriptor
 from ..nodos.nodo_recepcion import NodoRecepcion
 from ..choices.estado import Estado
+from .version_mapa import VersionMapa
+from m3d_app.utils.clave_bloque import ClaveBloque
 
 class Bloque(models.Model):
 
@@ -15,10 +17,25 @@ class Bloque(models.Model):
     
     # Campo derivado de numero_bloque (ej: "01" para "05-01")
     numero = models.CharField(max_length=10, db_index=True)
+    
+    # Clave sin asterisco para relacionar con MapaBloque (ej: "32-01" para "*32-01")
+    clave_canonica = models.CharField(max_length=20, db_index=True, editable=False, default='')
 
     class Meta:
         verbose_name = "Admin Bloques"
         verbose_name_plural = "Admin Bloques"
+        # Índices para los filtros más usados (ver el comando explicar_consultas)
+        indexes = [
+            # Admin: list_filter por sección y estado
+            models.Index(fields=['seccion', 'estado'], name='bloque_seccion_estado_idx'),
+            # Admin: date_hierarchy, solo o junto con el filtro de estado
+            models.Index(fields=['estado', 'fecha_asignacion'], name='bloque_estado_fecha_asig_idx'),
+            models.Index(fields=['fecha_asignacion'], name='bloque_fecha_asignacion_idx'),
+            # Importaciones y agregados del suscriptor: bloques de un suscriptor por estado
+            models.Index(fields=['suscriptor', 'estado'], name='bloque_suscriptor_estado_idx'),
+            # Importaciones: búsqueda por número de sorteo
+            models.Index(fields=['nro_sorteo'], name='bloque_nro_sorteo_idx'),
+        ]
     
     suscriptor = models.ForeignKey(
         Suscriptor, 
@@ -50,20 +67,63 @@ class Bloque(models.Model):
     
     historia_asociada = models.TextField(blank=True, null=True)
     
+    # Versión del mapa en la que cambió el estado por última vez (ver VersionMapa)
+    version_mapa = models.BigIntegerField(default=0, db_index=True, editable=False)
+
+    # Última modificación; da el Last-Modified/ETag de la API. Los cambios con
+    # update()/bulk_update no pasan por auto_now y tienen que asignarla a mano
+    fecha_modificacion = models.DateTimeField(auto_now=True, db_index=True)
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Recordar el estado y el suscriptor con los que se cargó para detectar cambios al guardar
+        self._estado_original = self.__dict__.get('estado')
+        self._suscriptor_original_id = self.__dict__.get('suscriptor_id')
+    
     def __str__(self):
         return f"Bloque {self.numero_bloque}" + (f" - {self.suscriptor}" if self.suscriptor else " - Sin asignar")
     
-    def save(self, *args, **kwargs):
-        # Extraer sección y número al guardar
+    def completar_campos_derivados(self):
+        """
+        Calcula sección, número y clave canónica a partir de numero_bloque.
+        Lo usa save() y también las importaciones en lote, que no pasan por save().
+        """
         if self.numero_bloque and '-' in self.numero_bloque:
             partes = self.numero_bloque.split('-')
             if len(partes) == 2:
                 self.seccion = partes[0].strip()
                 self.numero = partes[1].strip()
         
+        self.clave_canonica = ClaveBloque.canonica(self.numero_bloque)
+    
+    def save(self, *args, **kwargs):
+        # Extraer sección, número y clave canónica al guardar
+        self.completar_campos_derivados()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = {*update_fields, 'fecha_modificacion'}
+            if 'numero_bloque' in update_fields:
+                update_fields |= {'seccion', 'numero', 'clave_canonica'}
+            kwargs['update_fields'] = update_fields
+        
         # Si el estado cambia a 'asignado' y no hay fecha de asignación, establecerla
         if self.estado == 'asignado' and not self.fecha_asignacion and self.suscriptor:
             from django.utils import timezone
             self.fecha_asignacion = timezone.now()
+        
+        # Un bloque nuevo o un cambio de estado avanza la versión del mapa
+        cambia_estado = self._state.adding or (
+            self.estado != self._estado_original
+            and (update_fields is None or 'estado' in update_fields)
+        )
+        
+        with transaction.atomic():
+            if cambia_estado:
+                self.version_mapa = VersionMapa.siguiente()
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'version_mapa'}
             
-        super().save(*args, **kwargs)
\ No newline at end of file
+            super().save(*args, **kwargs)
+        
+        self._estado_original = self.estado
+        self._suscriptor_original_id = self.suscriptor_id
\ No newline at end of file
@@ -0,0 +1,108 @@
+from datetime import datetime, time, timedelta
+from django.db import models, transaction
+from django.db.models import Count, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .bloque import Bloque
+
+
+class ProgresoDiario(models.Model):
+    """
+    Cantidad de bloques que avanzaron de estado cada día, según las fechas de
+    Bloque. La completa el comando actualizar_progreso_diario (pensado para
+    cron), así los gráficos leen la serie sin recalcularla.
+    """
+
+    # Campo de la serie -> fecha de Bloque que lo alimenta
+    CAMPOS_FECHA = {
+        'asignados': 'fecha_asignacion',
+        'validados': 'fecha_validacion',
+        'entregados_nodo': 'fecha_entrega_nodo',
+        'recibidos_m3d': 'fecha_recepcion_m3d',
+        'diplomas_entregados': 'fecha_entrega_diploma',
+    }
+
+    fecha = models.DateField(unique=True)
+    asignados = models.PositiveIntegerField(default=0)
+    validados = models.PositiveIntegerField(default=0)
+    entregados_nodo = models.PositiveIntegerField(default=0)
+    recibidos_m3d = models.PositiveIntegerField(default=0)
+    diplomas_entregados = models.PositiveIntegerField(default=0)
+    fecha_calculo = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Progreso diario"
+        verbose_name_plural = "Progreso diario"
+        ordering = ['fecha']
+
+    def __str__(self):
+        return f"Progreso del {self.fecha:%d/%m/%Y}"
+
+    @classmethod
+    def primer_dia(cls):
+        """
+        Primer día con alguna fecha cargada en los bloques (None si no hay).
+        """
+        minimos = Bloque.objects.aggregate(**{
+            campo: Min(TruncDate(fecha)) for campo, fecha in cls.CAMPOS_FECHA.items()
+        })
+        dias = [dia for dia in minimos.values() if dia is not None]
+        return min(dias) if dias else None
+
+    @classmethod
+    def actualizar(cls, desde=None, hasta=None):
+        """
+        Recalcula los días desde 'desde' hasta 'hasta' inclusive y los guarda
+        (crea o reemplaza cada fila). Por defecto retoma desde el último día
+        guardado, que pudo quedar a medias, hasta hoy; si la tabla está vacía,
+        arranca en primer_dia(). Correrlo dos veces deja el mismo resultado.
+
+        Returns:
+            Cantidad de días guardados.
+        """
+        hasta = hasta or timezone.localdate()
+        if desde is None:
+            desde = cls.objects.aggregate(ultimo=models.Max('fecha'))['ultimo'] or cls.primer_dia()
+        if desde is None or desde > hasta:
+            return 0
+
+        # Una consulta agrupada por cada fecha de Bloque, solo sobre el período
+        # (con un rango de fecha y hora, que puede usar los índices)
+        inicio = timezone.make_aware(datetime.combine(desde, time.min))
+        fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+        conteos = {}
+        for campo, fecha in cls.CAMPOS_FECHA.items():
+            filas = Bloque.objects.filter(**{
+                f'{fecha}__gte': inicio,
+                f'{fecha}__lt': fin,
+            }).order_by().values(dia=TruncDate(fecha)).annotate(total=Count('pk'))
+            for fila in filas:
+                conteos.setdefault(fila['dia'], {})[campo] = fila['total']
+
+        # Todos los días del período, también los que no tuvieron movimientos
+        dias = []
+        dia = desde
+        while dia <= hasta:
+            dias.append(cls(fecha=dia, **conteos.get(dia, {})))
+            dia += timedelta(days=1)
+        with transaction.atomic():
+            cls.objects.bulk_create(
+                dias,
+                update_conflicts=True,
+                unique_fields=['fecha'],
+                update_fields=[*cls.CAMPOS_FECHA, 'fecha_calculo'],
+            )
+        return len(dias)
+
+    @classmethod
+    def serie(cls):
+        """
+        Toda la serie en una consulta, con los valores del día y los acumulados.
+        """
+        acumulados = dict.fromkeys(cls.CAMPOS_FECHA, 0)
+        serie = []
+        for fila in cls.objects.values('fecha', *cls.CAMPOS_FECHA):
+            for campo in cls.CAMPOS_FECHA:
+                acumulados[campo] += fila[campo]
+            serie.append({**fila, 'acumulados': dict(acumulados)})
+        return serie
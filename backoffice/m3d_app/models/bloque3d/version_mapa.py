@@ -0,0 +1,48 @@
+from django.db import models, transaction
+from django.db.models import F
+
+class VersionMapa(models.Model):
+    """
+    Contador global y monótono de cambios de estado de los bloques del mapa.
+    Existe una única fila (pk=1).
+    """
+    valor = models.BigIntegerField(default=0)
+
+    # Versión en la que se hizo el último cambio que no puede expresarse como
+    # delta (baja de bloques, actualizaciones en lote). Un cliente con una
+    # versión anterior tiene que volver a pedir todos los estados.
+    version_resincronizar = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Versión del mapa"
+        verbose_name_plural = "Versión del mapa"
+
+    def __str__(self):
+        return f"Versión del mapa {self.valor}"
+
+    @classmethod
+    def actual(cls):
+        """
+        Devuelve la versión vigente del mapa y la versión de resincronización.
+        """
+        fila = cls.objects.filter(pk=1).values_list('valor', 'version_resincronizar').first()
+        return fila or (0, 0)
+
+    @classmethod
+    def siguiente(cls, resincronizar=False):
+        """
+        Incrementa la versión del mapa de forma atómica y devuelve el nuevo valor.
+        Debe llamarse dentro de la misma transacción que guarda el cambio, para
+        que la nueva versión no sea visible antes que el bloque.
+
+        Args:
+            resincronizar: Si es True, obliga a los clientes anteriores a esta
+                versión a recargar todos los estados.
+        """
+        with transaction.atomic():
+            cls.objects.get_or_create(pk=1)
+            cls.objects.filter(pk=1).update(valor=F('valor') + 1)
+            version = cls.objects.values_list('valor', flat=True).get(pk=1)
+            if resincronizar:
+                cls.objects.filter(pk=1).update(version_resincronizar=version)
+        return version
@@ -10,3 +10,18 @@ class Estado:
             ('recibido_m3d', 'Bloque recibido en M3D'),
             ('diploma_entregado', 'Bloque recibido en M3D y diploma entregado'),
         ]
+
+    @classmethod
+    def get_jerarquia(cls):
+        """
+        Nivel de cada estado, del más bajo (libre = 0) al más alto, en el
+        orden de get_all_estados.
+        """
+        return {estado: nivel for nivel, (estado, _) in enumerate(cls.get_all_estados())}
+
+    @classmethod
+    def get_all_niveles(cls):
+        """
+        Choices por nivel (0-5) para guardar el progreso como número ordenable.
+        """
+        return [(nivel, etiqueta) for nivel, (_, etiqueta) in enumerate(cls.get_all_estados())]
@@ -0,0 +1,104 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class TrabajoExportacion(models.Model):
+    """
+    Exportación pedida desde el admin y generada fuera del request por el comando
+    procesar_exportaciones. El archivo queda disponible para descargar desde el admin.
+    """
+    TIPOS = [
+        ('bloques', 'Bloques'),
+        ('suscriptores', 'Suscriptores'),
+    ]
+    FORMATOS = [
+        ('xlsx', 'Excel'),
+        ('csv', 'CSV'),
+    ]
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('terminado', 'Terminado'),
+        ('error', 'Error'),
+    ]
+
+    # Un trabajo 'procesando' con más de estos minutos se da por abandonado
+    # (el proceso que lo tomó se cortó); lo marca como error tomar_siguiente()
+    MINUTOS_VENCIMIENTO = 30
+
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    formato = models.CharField(max_length=10, choices=FORMATOS, default='xlsx')
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente', db_index=True)
+
+    archivo = models.FileField(upload_to='exportaciones/', blank=True)
+    # Validador de los datos exportados (ver ProcesadorExportaciones.huella):
+    # si no cambió, se reutiliza el archivo anterior
+    huella = models.CharField(max_length=64, blank=True, db_index=True)
+    reutilizado = models.BooleanField(default=False)
+    filas = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    solicitado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='exportaciones'
+    )
+    fecha_solicitud = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Exportación"
+        verbose_name_plural = "Exportaciones"
+        ordering = ['-fecha_solicitud']
+
+    def __str__(self):
+        return f"Exportación de {self.get_tipo_display()} ({self.formato}) - {self.get_estado_display()}"
+
+    @classmethod
+    def encolar(cls, tipo, formato='xlsx', usuario=None):
+        """
+        Pide una exportación. Si ya hay una igual esperando o en curso, devuelve
+        esa en lugar de encolar otra (salvo que esté vencida, ver vencidos()).
+
+        Returns:
+            Tuple: (trabajo, creado)
+        """
+        en_curso = cls.objects.filter(
+            Q(estado='pendiente') | Q(estado='procesando', fecha_inicio__gte=cls.limite_vencimiento()),
+            tipo=tipo,
+            formato=formato,
+        ).first()
+        if en_curso:
+            return en_curso, False
+
+        trabajo = cls.objects.create(tipo=tipo, formato=formato, solicitado_por=usuario)
+        return trabajo, True
+
+    @classmethod
+    def limite_vencimiento(cls):
+        return timezone.now() - timedelta(minutes=cls.MINUTOS_VENCIMIENTO)
+
+    @classmethod
+    def vencidos(cls):
+        """
+        Trabajos 'procesando' que empezaron hace más de MINUTOS_VENCIMIENTO.
+        """
+        return cls.objects.filter(estado='procesando', fecha_inicio__lt=cls.limite_vencimiento())
+
+    @classmethod
+    def ultimo_terminado(cls, tipo, formato, huella):
+        """
+        Último trabajo terminado con el mismo contenido, cuyo archivo se puede reutilizar.
+        """
+        return cls.objects.filter(
+            tipo=tipo,
+            formato=formato,
+            huella=huella,
+            estado='terminado'
+        ).exclude(archivo='').order_by('-fecha_fin').first()
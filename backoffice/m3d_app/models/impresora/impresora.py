@@ -1,3 +1,5 @@
+import hashlib
+import json
 from django.db import models
 
 class Impresora(models.Model):
@@ -7,7 +9,54 @@ class Impresora(models.Model):
     cantidad_equipos = models.IntegerField(blank=True, null=True)
     dimension_maxima_impresion = models.CharField(max_length=50, blank=True, null=True)
     software_uso = models.TextField(blank=True, null=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Hash del contenido: al reimportar un formulario se reutiliza la impresora
+    # si no cambió, en lugar de crear otra (ver purgar_impresoras_huerfanas)
+    huella = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+
+    CAMPOS_HUELLA = (
+        'anios_experiencia', 'marcas_modelos_equipos', 'materiales_uso',
+        'cantidad_equipos', 'dimension_maxima_impresion', 'software_uso',
+    )
 
     def __str__(self):
         return f"{self.marcas_modelos_equipos} ({self.cantidad_equipos} equipos)"
 
+    @classmethod
+    def calcular_huella(cls, datos):
+        """
+        Hash de los datos de una impresora. Cada valor se normaliza como lo
+        guarda la base (ej: "3" y 3 en cantidad_equipos dan lo mismo).
+
+        Args:
+            datos: Dict campo -> valor; los campos que faltan cuentan como vacíos.
+        """
+        valores = []
+        for campo in cls.CAMPOS_HUELLA:
+            valor = datos.get(campo)
+            if valor is not None:
+                valor = str(cls._meta.get_field(campo).to_python(valor))
+            valores.append(valor)
+        return hashlib.sha256(json.dumps(valores).encode()).hexdigest()
+
+    @classmethod
+    def huerfanas(cls):
+        """
+        Impresoras que no usa ningún particular ni institución (por ejemplo,
+        las que dejaron las importaciones anteriores a la huella).
+        """
+        return cls.objects.filter(particular__isnull=True, institucion__isnull=True)
+
+    def completar_huella(self):
+        """
+        Calcula la huella con los datos actuales. Lo usa save() y también
+        las importaciones en lote, que no pasan por save().
+        """
+        self.huella = self.calcular_huella({campo: getattr(self, campo) for campo in self.CAMPOS_HUELLA})
+
+    def save(self, *args, **kwargs):
+        self.completar_huella()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'huella'}
+        super().save(*args, **kwargs)
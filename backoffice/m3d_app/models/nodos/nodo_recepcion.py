@@ -17,6 +17,7 @@ class NodoRecepcion(models.Model):
     email = models.EmailField()
     nodo_seleccionado = models.CharField(max_length=100, choices=Provincia.get_some_provincias)
     detalles_nodo = models.TextField(blank=True, null=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"Nodo: {self.nodo_seleccionado} - {self.suscriptor}"
@@ -7,6 +7,7 @@ class InstitucionConImpresora(models.Model):
     impresora = models.OneToOneField(Impresora, on_delete=models.CASCADE, related_name='institucion', null=True, blank=True)
     nombre_responsable = models.CharField(max_length=100, blank=True, null=True)
     dni_responsable = models.CharField(max_length=20, blank=True, null=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.suscriptor.nombre_institucion} (Con impresora)"
\ No newline at end of file
@@ -5,6 +5,7 @@ class InstitucionSinImpresora(models.Model):
     suscriptor = models.OneToOneField(Suscriptor, on_delete=models.CASCADE, related_name='institucion_sin_impresora')
     nombre_responsable = models.CharField(max_length=100, blank=True, null=True)
     dni_responsable = models.CharField(max_length=20, blank=True, null=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.suscriptor.nombre_institucion} (Sin impresora)"
\ No newline at end of file
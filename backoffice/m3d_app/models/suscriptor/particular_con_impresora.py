@@ -5,6 +5,7 @@ from ..impresora.impresora import Impresora
 class ParticularConImpresora(models.Model):
     suscriptor = models.OneToOneField(Suscriptor, on_delete=models.CASCADE, related_name='particular_con_impresora')
     impresora = models.OneToOneField(Impresora, on_delete=models.CASCADE, related_name='particular', null=True, blank=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.suscriptor.nombre} {self.suscriptor.apellido} (Con impresora)"
\ No newline at end of file
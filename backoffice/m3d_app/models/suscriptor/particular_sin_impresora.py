@@ -3,6 +3,7 @@ from .suscriptor import Suscriptor
 
 class ParticularSinImpresora(models.Model):
     suscriptor = models.OneToOneField(Suscriptor, on_delete=models.CASCADE, related_name='particular_sin_impresora')
+    fecha_modificacion = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.suscriptor.nombre} {self.suscriptor.apellido} (Sin impresora)"
\ No newline at end of file
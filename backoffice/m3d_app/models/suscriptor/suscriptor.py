@@ -1,4 +1,5 @@
 from django.db import models
+from ..choices.estado import Estado
 
 class Suscriptor(models.Model):
     nombre = models.CharField(max_length=100)
@@ -15,6 +16,7 @@ class Suscriptor(models.Model):
     fecha_nacimiento = models.DateField(blank=True, null=True)  # Para particulares
     dni = models.CharField(max_length=20, blank=True, null=True)  # Para particulares
     fecha_registro = models.DateTimeField(auto_now_add=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True, db_index=True)
     tipo = models.CharField(max_length=20, choices=[('particular', 'Particular'), ('institucion', 'Institución')])
     como_se_entero = models.TextField(blank=True, null=True)
     motivo_participacion = models.TextField(blank=True, null=True)
@@ -22,6 +24,25 @@ class Suscriptor(models.Model):
     diploma_entregado = models.BooleanField(default=False)
     contactado = models.BooleanField(default=False)
 
+    # Agregados de sus bloques, mantenidos por AgregadosSuscriptor desde las
+    # señales de Bloque (reparar con recompute_subscriber_aggregates)
+    bloques_count = models.PositiveIntegerField('Bloques', default=0, db_index=True, editable=False)
+    # Nivel del estado más avanzado de sus bloques (ver Estado.get_jerarquia)
+    estado_max = models.PositiveSmallIntegerField('Estado máximo', choices=Estado.get_all_niveles, default=0, db_index=True, editable=False)
+
+    CAMPOS_AGREGADOS = ('bloques_count', 'estado_max')
+
+    def save(self, *args, **kwargs):
+        # Los agregados se escriben solo con AgregadosSuscriptor: guardar una
+        # instancia cargada antes de un cambio en sus bloques no los pisa
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            diferidos = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name not in self.CAMPOS_AGREGADOS and campo.attname not in diferidos
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         if self.nombre_institucion:
             return f"{self.nombre_institucion} - {self.email}"
@@ -0,0 +1,43 @@
+from django.db import models
+from .suscriptor import Suscriptor
+
+
+class CampoFts(models.TextField):
+    """
+    Columna de una tabla FTS5 que admite el lookup __match (MATCH de SQLite).
+    """
+
+
+@CampoFts.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+class SuscriptorBusqueda(models.Model):
+    """
+    Índice de búsqueda de suscriptores: tabla virtual FTS5 con tokenizer
+    trigram, creada por la migración 0012 solo en SQLite (en Postgres se usan
+    índices pg_trgm). La mantienen las señales de m3d_app/signals.py a través
+    de BusquedaSuscriptores; no se escribe con el ORM.
+    """
+    suscriptor = models.OneToOneField(
+        Suscriptor,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        related_name='busqueda',
+    )
+    # Columna oculta de FTS5 con el nombre de la tabla: MATCH sobre todas las columnas
+    documento = CampoFts(db_column='m3d_app_suscriptor_busqueda')
+    # Relevancia de la fila (bm25, menor es mejor); solo tiene valor junto con MATCH
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'm3d_app_suscriptor_busqueda'
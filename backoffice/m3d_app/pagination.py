@@ -0,0 +1,64 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class PaginacionCursorPorId(CursorPagination):
+    """
+    Paginación por cursor sobre el id: cada página es un WHERE id > ... LIMIT,
+    sin COUNT(*) ni OFFSET, así que cuesta lo mismo la primera que la última.
+    Pensada para las sincronizaciones completas de los integradores.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class PaginacionHibrida(PageNumberPagination):
+    """
+    Paginación por defecto de la API. Sin parámetros se comporta como siempre
+    (?page=N, con "count"). Con ?paginacion=cursor, o cuando llega un ?cursor=
+    de un link "next"/"previous", pagina con PaginacionCursorPorId y el cliente
+    puede elegir el tamaño con ?page_size= (hasta max_page_size).
+    """
+    parametro_modo = 'paginacion'
+    paginacion_cursor_class = PaginacionCursorPorId
+
+    def __init__(self):
+        self.paginacion_cursor = None
+
+    def usa_cursor(self, request):
+        params = request.query_params
+        return params.get(self.parametro_modo) == 'cursor' or self.paginacion_cursor_class.cursor_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.usa_cursor(request):
+            self.paginacion_cursor = None
+            return super().paginate_queryset(queryset, request, view)
+
+        self.paginacion_cursor = self.paginacion_cursor_class()
+        pagina = self.paginacion_cursor.paginate_queryset(queryset, request, view)
+        self.display_page_controls = self.paginacion_cursor.display_page_controls
+        return pagina
+
+    def get_paginated_response(self, data):
+        if self.paginacion_cursor:
+            return self.paginacion_cursor.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.paginacion_cursor:
+            return self.paginacion_cursor.to_html()
+        return super().to_html()
+
+    def get_schema_operation_parameters(self, view):
+        parametros = super().get_schema_operation_parameters(view)
+        parametros += [
+            {
+                'name': self.parametro_modo,
+                'required': False,
+                'in': 'query',
+                'description': 'Con "cursor", pagina por id sin contar el total.',
+                'schema': {'type': 'string', 'enum': ['cursor']},
+            },
+            *self.paginacion_cursor_class().get_schema_operation_parameters(view),
+        ]
+        return parametros
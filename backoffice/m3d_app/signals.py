@@ -0,0 +1,57 @@
+# backoffice/m3d_app/signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from .models.suscriptor.suscriptor import Suscriptor
+from .models.bloque3d.bloque import Bloque
+from .models.bloque3d.version_mapa import VersionMapa
+from .utils.agregados_suscriptor import AgregadosSuscriptor
+from .utils.busqueda_suscriptores import BusquedaSuscriptores
+
+# Se envía después de modificar bloques con queryset.update(), bulk_create o
+# bulk_update, operaciones que no disparan post_save/post_delete.
+# Argumentos: sender=Bloque
+bloques_actualizados_en_lote = Signal()
+
+@receiver(post_delete, sender=Bloque)
+@receiver(bloques_actualizados_en_lote, sender=Bloque)
+def avanzar_version_mapa(sender, **kwargs):
+    """
+    Las bajas y los cambios en lote no se pueden expresar como delta:
+    se avanza la versión del mapa pidiendo a los clientes que recarguen todo.
+    """
+    VersionMapa.siguiente(resincronizar=True)
+
+@receiver(post_save, sender=Suscriptor)
+@receiver(post_delete, sender=Suscriptor)
+def actualizar_busqueda_suscriptor(sender, instance, **kwargs):
+    BusquedaSuscriptores.actualizar([instance.pk])
+
+@receiver(post_save, sender=Bloque)
+@receiver(post_delete, sender=Bloque)
+def actualizar_busqueda_bloque(sender, instance, **kwargs):
+    # Los números de bloque también se buscan desde el suscriptor
+    BusquedaSuscriptores.actualizar_bloque(instance)
+
+@receiver(bloques_actualizados_en_lote, sender=Bloque)
+def reconstruir_busqueda(sender, **kwargs):
+    BusquedaSuscriptores.reconstruir()
+
+@receiver(post_save, sender=Bloque)
+def actualizar_agregados_bloque_guardado(sender, instance, created, **kwargs):
+    # post_save corre dentro de la transacción de Bloque.save(): el bloque y los
+    # agregados de su suscriptor (y del anterior, si se reasignó) se guardan juntos
+    if (
+        created
+        or instance.estado != instance._estado_original
+        or instance.suscriptor_id != instance._suscriptor_original_id
+    ):
+        AgregadosSuscriptor.recalcular([instance.suscriptor_id, instance._suscriptor_original_id])
+
+@receiver(post_delete, sender=Bloque)
+def actualizar_agregados_bloque_borrado(sender, instance, **kwargs):
+    AgregadosSuscriptor.recalcular([instance.suscriptor_id])
+
+@receiver(bloques_actualizados_en_lote, sender=Bloque)
+def actualizar_agregados_en_lote(sender, **kwargs):
+    AgregadosSuscriptor.recalcular()
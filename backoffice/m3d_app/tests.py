@@ -1,3 +1,1339 @@
-from django.test import TestCase
+import codecs
+import csv
+import json
+import os
+import tempfile
+from datetime import datetime, time, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+import pandas as pd
+from openpyxl import load_workbook
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from m3d_app.models import Bloque, NodoRecepcion, ProgresoDiario, Suscriptor, TrabajoExportacion
+from m3d_app.models.bloque3d.version_mapa import VersionMapa
+from m3d_app.models.impresora.impresora import Impresora
+from m3d_app.models.suscriptor.particular_con_impresora import ParticularConImpresora
+from m3d_app.models.suscriptor.particular_sin_impresora import ParticularSinImpresora
+from m3d_app.models.suscriptor.institucion_con_impresora import InstitucionConImpresora
+from m3d_app.models.suscriptor.institucion_sin_impresora import InstitucionSinImpresora
+from m3d_app.pagination import PaginacionCursorPorId
+from m3d_app.serializers import ParticularConImpresoraSerializer, SuscriptorConBloquesSerializer
+from m3d_app.signals import bloques_actualizados_en_lote
+from m3d_app.utils.benchmark_api import BenchmarkApi
+from m3d_app.utils.busqueda_suscriptores import BusquedaSuscriptores
+from m3d_app.utils.datos_sinteticos import DatosSinteticos
+from m3d_app.utils.estado_excel import EstadoExcel
+from m3d_app.utils.estadisticas_bloques import EstadisticasBloques
+from m3d_app.utils.excel_manager.base import ExcelManagerBase
+from m3d_app.utils.excel_manager.columnas import ResolvedorColumnas
+from m3d_app.utils.excel_manager.manage_bloques import ExcelManagerForBloques
+from m3d_app.utils.excel_manager.manage_subs import ExcelManagerForSubs
+from m3d_app.utils.excel_parser import ExcelParser
+from m3d_app.utils.exportacion import ExportacionBloques, ExportacionSuscriptores, ExportadorExcel, ProcesadorExportaciones
+from m3d_app.utils.plan_consultas import PlanConsultas
+from m3d_app.utils.relaciones_serializer import RelacionesSerializer
+from mapa_malvinas.utils.mapa_snapshot import MapaSnapshot
+
+
+def crear_suscriptor(indice, **kwargs):
+    datos = {
+        'nombre': f'Nombre {indice}',
+        'apellido': f'Apellido {indice}',
+        'email': f'suscriptor{indice}@m3d.test',
+        'telefono': '1100000000',
+        'calle': 'Calle',
+        'numero': '123',
+        'codigo_postal': '1000',
+        'ciudad': 'Ciudad',
+        'provincia': 'Buenos Aires',
+        'tipo': 'particular',
+    }
+    datos.update(kwargs)
+    return Suscriptor.objects.create(**datos)
+
+
+def crear_nodo(suscriptor, indice):
+    return NodoRecepcion.objects.create(
+        suscriptor=suscriptor,
+        numero_orden=indice,
+        numero_bloque=f'01-{indice:02d}',
+        responsable_impresion='Responsable',
+        calle='Calle',
+        numero='1',
+        codigo_postal='1000',
+        localidad='Localidad',
+        provincia='Buenos Aires',
+        telefono='1100000000',
+        email=suscriptor.email,
+        nodo_seleccionado='Buenos Aires',
+    )
+
+
+def importar_participantes(metodo, filas):
+    """
+    Corre un importador del Excel de participantes (por nombre de método de
+    ExcelManagerForBloques) sobre filas dadas, sin archivo ni log.
+    """
+    manager = ExcelManagerForBloques()
+    df = pd.DataFrame(filas, columns=['N sorteo', 'BLOQUE', 'MAIL', 'Valido FOTO', 'anoto nodo', 'RECIBIMOS', 'Diploma OK'])
+    with mock.patch.object(manager, 'read_excel', return_value=df), \
+            mock.patch.object(manager, 'log'):
+        return getattr(manager, metodo)('participantes.xlsx')
+
+
+class ChangelistConsultasTests(TestCase):
+    """
+    Los listados del admin tienen que hacer la misma cantidad de consultas
+    sin importar cuántas filas muestran (sin N+1 por columna).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_superuser('admin', 'admin@m3d.test', 'clave')
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+
+    def agregar_filas(self, desde, cantidad):
+        for indice in range(desde, desde + cantidad):
+            suscriptor = crear_suscriptor(indice)
+            crear_nodo(suscriptor, indice)
+            for numero in range(1, 3):
+                Bloque.objects.create(
+                    numero_bloque=f'{indice:02d}-{numero:02d}',
+                    suscriptor=suscriptor,
+                    estado='asignado',
+                )
+
+    def consultas(self, url):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(contexto.captured_queries)
+
+    def assertConsultasConstantes(self, nombre_url):
+        url = reverse(nombre_url)
+        self.agregar_filas(1, 2)
+        # Primer render para que el tema del admin quede creado y cacheado
+        self.client.get(url)
+        pocas_filas = self.consultas(url)
+
+        self.agregar_filas(3, 8)
+        self.assertEqual(self.consultas(url), pocas_filas)
+
+    def test_listado_de_suscriptores(self):
+        self.assertConsultasConstantes('admin:m3d_app_suscriptor_changelist')
+
+    def test_listado_de_bloques(self):
+        self.assertConsultasConstantes('admin:m3d_app_bloque_changelist')
+
+    def test_listado_de_nodos(self):
+        self.assertConsultasConstantes('admin:m3d_app_nodorecepcion_changelist')
+
+    def test_cantidad_de_bloques_ordenable(self):
+        self.agregar_filas(1, 3)
+        Bloque.objects.filter(numero_bloque='02-02').update(suscriptor=None)
+        bloques_actualizados_en_lote.send(sender=Bloque)
+
+        url = reverse('admin:m3d_app_suscriptor_changelist')
+        columna = self.client.get(url).context['cl'].list_display.index('bloques_count')
+        response = self.client.get(url, {'o': f'-{columna}'})
+
+        suscriptores = list(response.context['cl'].result_list)
+        self.assertEqual([s.bloques_count for s in suscriptores], [2, 2, 1])
+        self.assertEqual(suscriptores[-1].email, 'suscriptor2@m3d.test')
+
+
+class ApiTiposSuscriptorConsultasTests(TestCase):
+    """
+    Los listados de la API por tipo de suscriptor traen el suscriptor y la
+    impresora anidados en la misma consulta: una página llena cuesta lo
+    mismo que una con dos filas.
+    """
+
+    def agregar_filas(self, modelo, desde, cantidad):
+        for indice in range(desde, desde + cantidad):
+            datos = {'suscriptor': crear_suscriptor(indice)}
+            if modelo in (ParticularConImpresora, InstitucionConImpresora):
+                datos['impresora'] = Impresora.objects.create(cantidad_equipos=1)
+            modelo.objects.create(**datos)
+
+    def consultas(self, url):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(contexto.captured_queries), len(response.json()['results'])
+
+    def assertConsultasConstantes(self, modelo, nombre_url):
+        url = reverse(nombre_url)
+        self.agregar_filas(modelo, 1, 2)
+        pocas_filas, filas = self.consultas(url)
+        self.assertEqual(filas, 2)
+
+        # Página llena (PAGE_SIZE = 10)
+        self.agregar_filas(modelo, 3, 8)
+        self.assertEqual(self.consultas(url), (pocas_filas, 10))
+
+    def test_particulares_con_impresora(self):
+        self.assertConsultasConstantes(ParticularConImpresora, 'particularconimpresora-list')
+
+    def test_particulares_sin_impresora(self):
+        self.assertConsultasConstantes(ParticularSinImpresora, 'particularsinimpresora-list')
+
+    def test_instituciones_con_impresora(self):
+        self.assertConsultasConstantes(InstitucionConImpresora, 'institucionconimpresora-list')
+
+    def test_instituciones_sin_impresora(self):
+        self.assertConsultasConstantes(InstitucionSinImpresora, 'institucionsinimpresora-list')
+
+    def test_relaciones_segun_el_serializer(self):
+        self.assertEqual(
+            RelacionesSerializer.calcular(ParticularConImpresoraSerializer),
+            (('suscriptor', 'impresora'), ())
+        )
+        self.assertEqual(RelacionesSerializer.calcular(SuscriptorConBloquesSerializer), ((), ('bloques',)))
+
+
+class PaginacionCursorTests(TestCase):
+    """
+    La API pagina por número de página por defecto y por cursor sobre el id
+    cuando el cliente lo pide con ?paginacion=cursor.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for indice in range(1, 26):
+            crear_suscriptor(indice)
+
+    def test_por_defecto_pagina_por_numero(self):
+        datos = self.client.get(reverse('suscriptor-list'), {'page': 2}).json()
+
+        self.assertEqual(datos['count'], 25)
+        self.assertEqual(len(datos['results']), 10)
+
+    def test_cursor_recorre_todo_sin_contar(self):
+        url = reverse('suscriptor-list') + '?paginacion=cursor&page_size=7'
+        ids = []
+        while url:
+            with CaptureQueriesContext(connection) as contexto:
+                datos = self.client.get(url).json()
+            self.assertNotIn('count', datos)
+            self.assertFalse(any('__count' in q['sql'] or 'OFFSET' in q['sql'] for q in contexto.captured_queries))
+            ids += [fila['id'] for fila in datos['results']]
+            url = datos['next']
+
+        self.assertEqual(ids, sorted(Suscriptor.objects.values_list('id', flat=True)))
+
+    @mock.patch.object(PaginacionCursorPorId, 'max_page_size', 5)
+    def test_cursor_limita_el_tamano_de_pagina(self):
+        datos = self.client.get(reverse('suscriptor-list'), {'paginacion': 'cursor', 'page_size': 1000}).json()
+
+        self.assertEqual(len(datos['results']), 5)
+        self.assertIn('cursor=', datos['next'])
+
+
+class BloquesNdjsonTests(TestCase):
+    """
+    /api/bloques/ndjson/ devuelve todos los bloques, un JSON por línea, en una
+    sola consulta sin importar cuántos sean.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        particular = crear_suscriptor(1)
+        institucion = crear_suscriptor(2, tipo='institucion', nombre_institucion='Escuela N° 2')
+        Bloque.objects.create(numero_bloque='01-01', suscriptor=particular, estado='asignado')
+        Bloque.objects.create(numero_bloque='01-02', suscriptor=institucion, estado='validacion')
+        Bloque.objects.create(numero_bloque='01-03')
+
+    def test_un_bloque_por_linea_con_el_nombre_del_suscriptor(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('bloque-ndjson'))
+            lineas = b''.join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        registros = {registro['numero_bloque']: registro for registro in map(json.loads, lineas)}
+        self.assertEqual(len(registros), 3)
+        self.assertEqual(registros['01-01']['nombre_suscriptor'], 'Nombre 1 Apellido 1')
+        self.assertEqual(registros['01-02']['nombre_suscriptor'], 'Escuela N° 2')
+        self.assertIsNone(registros['01-03']['nombre_suscriptor'])
+        self.assertEqual(registros['01-01']['nro_sorteo'], Bloque.objects.get(numero_bloque='01-01').nro_sorteo)
+
+
+class ExportacionAdminTests(TestCase):
+    """
+    Las acciones exportar_excel y exportar_csv del admin generan la planilla
+    fila por fila: el .xlsx write-only se abre con openpyxl y el CSV llega en
+    streaming con su encabezado, con celdas vacías para lo que no hay.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@m3d.test', 'clave')
+        cls.particular = crear_suscriptor(1, piso_depto='2B')
+        ParticularConImpresora.objects.create(suscriptor=cls.particular, impresora=None)
+        Bloque.objects.create(numero_bloque='01-01', suscriptor=cls.particular, estado='recibido_m3d', nro_sorteo='0101')
+        Bloque.objects.create(numero_bloque='01-02')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def ejecutar(self, modelo, accion, seleccion):
+        response = self.client.post(
+            reverse(f'admin:m3d_app_{modelo}_changelist'),
+            {'action': accion, '_selected_action': [objeto.pk for objeto in seleccion]},
+        )
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def leer_xlsx(self, contenido):
+        workbook = load_workbook(BytesIO(contenido), read_only=True)
+        return [list(fila) for fila in workbook.active.iter_rows(values_only=True)]
+
+    def leer_csv(self, response, contenido):
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertTrue(contenido.startswith(codecs.BOM_UTF8))
+        return list(csv.reader(StringIO(contenido.decode('utf-8-sig'))))
+
+    def test_bloques_a_excel_y_csv(self):
+        titulos = [titulo for titulo, _ in ExportacionBloques.COLUMNAS]
+
+        response, contenido = self.ejecutar('bloque', 'exportar_excel', Bloque.objects.all())
+        self.assertEqual(response['Content-Type'], ExportadorExcel.CONTENT_TYPE_XLSX)
+        self.assertIn('bloques_malvinas3d.xlsx', response['Content-Disposition'])
+        filas = self.leer_xlsx(contenido)
+        self.assertEqual(filas[0], titulos)
+        bloques = {fila['bloque']: fila for fila in (dict(zip(titulos, fila)) for fila in filas[1:])}
+        self.assertEqual(set(bloques), {'01-01', '01-02'})
+        self.assertEqual(bloques['01-01']['NOMBRE'], 'Nombre 1 Apellido 1')
+        self.assertEqual(bloques['01-01']['Direccion'], 'Calle, 123, 2B, Ciudad, Buenos Aires')
+        self.assertEqual([bloques['01-01'][titulo] for titulo in titulos[-4:]], [1, 1, 1, 0])
+        # Sin suscriptor, las columnas relacionadas quedan vacías
+        self.assertEqual(bloques['01-02']['Estado Bloque'], 'libre')
+        self.assertFalse(bloques['01-02']['MAIL'])
+        self.assertFalse(bloques['01-02']['N sorteo'])
+
+        response, contenido = self.ejecutar('bloque', 'exportar_csv', Bloque.objects.all())
+        filas = self.leer_csv(response, contenido)
+        self.assertEqual(filas[0], titulos)
+        bloques = {fila[2]: fila for fila in filas[1:]}
+        self.assertEqual(bloques['01-01'][:4], ['0101', 'M3D', '01-01', 'suscriptor1@m3d.test'])
+        self.assertEqual(bloques['01-02'][:4], ['', 'M3D', '01-02', ''])
+        self.assertEqual(bloques['01-02'][-6:], ['libre', '', '0', '0', '0', '0'])
+
+    def test_suscriptores_a_excel_y_csv(self):
+        titulos = [titulo for titulo, _ in ExportacionSuscriptores.COLUMNAS]
+
+        _, contenido = self.ejecutar('suscriptor', 'exportar_excel', [self.particular])
+        filas = self.leer_xlsx(contenido)
+        self.assertEqual(filas[0], titulos)
+        fila = dict(zip(titulos, filas[1]))
+        self.assertEqual(fila['Email'], 'suscriptor1@m3d.test')
+        self.assertEqual(fila['Tiene Impresora'], 'Sí')
+        self.assertEqual(fila['Bloques Asignados'], '01-01 (recibido_m3d)')
+        # Impresora sin cargar y campos opcionales en None: celdas vacías
+        self.assertFalse(fila['Marcas y Modelos'])
+        self.assertFalse(fila['DNI'])
+
+        response, contenido = self.ejecutar('suscriptor', 'exportar_csv', [self.particular])
+        filas = self.leer_csv(response, contenido)
+        self.assertEqual(filas[0], titulos)
+        fila = dict(zip(titulos, filas[1]))
+        self.assertEqual(fila['Cantidad Bloques'], '1')
+        self.assertEqual(fila['Marcas y Modelos'], '')
+        self.assertEqual(fila['Nombre Institución'], '')
+
+
+class ExportacionesTests(TestCase):
+    """
+    Las exportaciones del admin se encolan sin duplicarse, las toma un solo
+    proceso, reutilizan el archivo si el contenido no cambió y no quedan
+    trabadas si el proceso que las tomó se cortó.
+    """
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        media = override_settings(MEDIA_ROOT=directorio.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        Bloque.objects.create(numero_bloque='01-01', suscriptor=crear_suscriptor(1))
+
+    def test_encolar_no_duplica(self):
+        trabajo, creado = TrabajoExportacion.encolar('bloques', 'csv')
+        self.assertTrue(creado)
+        self.assertEqual(TrabajoExportacion.encolar('bloques', 'csv'), (trabajo, False))
+        self.assertTrue(TrabajoExportacion.encolar('bloques', 'xlsx')[1])
+
+        # En curso también cuenta, salvo que esté vencido
+        self.assertEqual(ProcesadorExportaciones.tomar_siguiente(), trabajo)
+        self.assertEqual(TrabajoExportacion.encolar('bloques', 'csv'), (trabajo, False))
+        vencimiento = timezone.now() - timedelta(minutes=TrabajoExportacion.MINUTOS_VENCIMIENTO + 1)
+        TrabajoExportacion.objects.filter(pk=trabajo.pk).update(fecha_inicio=vencimiento)
+        nuevo, creado = TrabajoExportacion.encolar('bloques', 'csv')
+        self.assertTrue(creado)
+        self.assertNotEqual(nuevo, trabajo)
+
+    def test_tomar_siguiente(self):
+        primero = TrabajoExportacion.encolar('bloques', 'csv')[0]
+        segundo = TrabajoExportacion.encolar('suscriptores', 'csv')[0]
+
+        tomado = ProcesadorExportaciones.tomar_siguiente()
+        self.assertEqual(tomado, primero)
+        self.assertEqual(tomado.estado, 'procesando')
+        self.assertIsNotNone(tomado.fecha_inicio)
+        self.assertEqual(ProcesadorExportaciones.tomar_siguiente(), segundo)
+        self.assertIsNone(ProcesadorExportaciones.tomar_siguiente())
+
+    def test_trabajo_vencido_queda_con_error(self):
+        trabajo = TrabajoExportacion.encolar('bloques', 'csv')[0]
+        ProcesadorExportaciones.tomar_siguiente()
+        vencimiento = timezone.now() - timedelta(minutes=TrabajoExportacion.MINUTOS_VENCIMIENTO + 1)
+        TrabajoExportacion.objects.filter(pk=trabajo.pk).update(fecha_inicio=vencimiento)
+        en_curso = TrabajoExportacion.encolar('suscriptores', 'csv')[0]
+        ProcesadorExportaciones.tomar_siguiente()
+
+        self.assertIsNone(ProcesadorExportaciones.tomar_siguiente())
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, 'error')
+        self.assertIsNotNone(trabajo.fecha_fin)
+        # Uno en curso dentro del plazo no se toca
+        en_curso.refresh_from_db()
+        self.assertEqual(en_curso.estado, 'procesando')
+
+    def test_procesar_reutiliza_el_archivo_sin_cambios(self):
+        def procesar():
+            return ProcesadorExportaciones.procesar(TrabajoExportacion.objects.create(tipo='bloques', formato='csv'))
+
+        primero = procesar()
+        self.assertEqual((primero.estado, primero.reutilizado, primero.filas), ('terminado', False, 1))
+        with primero.archivo.open('rb') as archivo:
+            self.assertIn('01-01', archivo.read().decode('utf-8-sig'))
+
+        # Reutilizar no recorre las filas: solo el validador, una consulta por modelo
+        with mock.patch('m3d_app.utils.exportacion.ExportacionBloques.filas', side_effect=AssertionError('recorrió las filas')):
+            segundo = procesar()
+        self.assertTrue(segundo.reutilizado)
+        self.assertEqual((segundo.archivo.name, segundo.huella, segundo.filas), (primero.archivo.name, primero.huella, 1))
+
+        Bloque.objects.create(numero_bloque='01-02')
+        tercero = procesar()
+        self.assertFalse(tercero.reutilizado)
+        self.assertNotEqual(tercero.huella, primero.huella)
+        self.assertEqual(tercero.filas, 2)
+
+        # Los datos del suscriptor también están en la planilla de bloques
+        suscriptor = Suscriptor.objects.get()
+        suscriptor.telefono = '1199999999'
+        suscriptor.save()
+        cuarto = procesar()
+        self.assertFalse(cuarto.reutilizado)
+        with cuarto.archivo.open('rb') as archivo:
+            self.assertIn('1199999999', archivo.read().decode('utf-8-sig'))
+
+    def test_procesar_con_error(self):
+        trabajo = TrabajoExportacion.objects.create(tipo='bloques', formato='csv')
+        with mock.patch('m3d_app.utils.exportacion.ExportacionBloques.filas', side_effect=ValueError('sin conexión')):
+            trabajo = ProcesadorExportaciones.procesar(trabajo)
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, 'error')
+        self.assertEqual(trabajo.error, 'sin conexión')
+        self.assertIsNotNone(trabajo.fecha_fin)
+        self.assertFalse(trabajo.archivo)
+
+    def test_comando_procesar_exportaciones(self):
+        TrabajoExportacion.encolar('bloques', 'csv')
+        TrabajoExportacion.encolar('suscriptores', 'xlsx')
+
+        salida = StringIO()
+        call_command('procesar_exportaciones', stdout=salida)
+        self.assertIn('Exportaciones procesadas: 2', salida.getvalue())
+        self.assertEqual(set(TrabajoExportacion.objects.values_list('estado', flat=True)), {'terminado'})
+        self.assertTrue(all(trabajo.archivo.storage.exists(trabajo.archivo.name) for trabajo in TrabajoExportacion.objects.all()))
+
+
+class SuscriptoresConBloquesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.con_bloques = crear_suscriptor(1)
+        cls.sin_bloques = crear_suscriptor(2)
+        for numero in range(1, 4):
+            Bloque.objects.create(numero_bloque=f'01-{numero:02d}', suscriptor=cls.con_bloques, estado='asignado')
+
+    def test_solo_con_bloques_sin_duplicados_ni_distinct(self):
+        with CaptureQueriesContext(connection) as contexto:
+            datos = self.client.get(reverse('suscriptor-con-bloques-list')).json()
+
+        self.assertEqual(datos['count'], 1)
+        self.assertEqual([fila['id'] for fila in datos['results']], [self.con_bloques.pk])
+        self.assertEqual(len(datos['results'][0]['bloques']), 3)
+        self.assertFalse(any('DISTINCT' in q['sql'] for q in contexto.captured_queries))
+
+        datos = self.client.get(reverse('suscriptor-con-bloques-list'), {'solo_con_bloques': 'false'}).json()
+        self.assertEqual(datos['count'], 2)
+
+
+class GetCondicionalTests(TestCase):
+    """
+    Los ViewSets con modelos_validador responden 304 sin serializar cuando
+    el ETag del cliente sigue vigente, y uno nuevo después de altas, cambios o bajas.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for indice in range(1, 4):
+            Bloque.objects.create(numero_bloque=f'01-{indice:02d}', suscriptor=crear_suscriptor(indice), estado='asignado')
+
+    def setUp(self):
+        self.url = reverse('bloque-list')
+        self.etag = self.client.get(self.url)['ETag']
+
+    def test_sin_cambios_responde_304_solo_con_el_validador(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=self.etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertIn('Last-Modified', response)
+
+    def test_cambio_alta_y_baja_cambian_el_etag(self):
+        bloque = Bloque.objects.get(numero_bloque='01-01')
+        bloque.estado = 'validacion'
+        bloque.save(update_fields=['estado'])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        Bloque.objects.create(numero_bloque='01-04')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        Bloque.objects.filter(numero_bloque='01-04').delete()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_suscriptores_con_bloques_depende_de_ambos_modelos(self):
+        url = reverse('suscriptor-con-bloques-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Bloque.objects.filter(numero_bloque='01-02').update(estado='validacion', fecha_modificacion=timezone.now())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_tipo_de_suscriptor_depende_del_subtipo_suscriptor_e_impresora(self):
+        suscriptor = Suscriptor.objects.get(email='suscriptor1@m3d.test')
+        impresora = Impresora.objects.create(cantidad_equipos=1)
+        ParticularConImpresora.objects.create(suscriptor=suscriptor, impresora=impresora)
+        url = reverse('particularconimpresora-list')
+
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Cada tabla que muestra el listado invalida el ETag
+        for instancia, campo, valor in [(impresora, 'cantidad_equipos', 2), (suscriptor, 'ciudad', 'Otra ciudad')]:
+            setattr(instancia, campo, valor)
+            instancia.save()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+
+        ParticularConImpresora.objects.all().delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class AgregadosSuscriptorTests(TestCase):
+    """
+    bloques_count y estado_max de Suscriptor acompañan a sus bloques al
+    crearlos, cambiarles el estado, reasignarlos y borrarlos.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.uno = crear_suscriptor(1)
+        cls.dos = crear_suscriptor(2)
+
+    def agregados(self, suscriptor):
+        suscriptor.refresh_from_db()
+        return suscriptor.bloques_count, suscriptor.estado_max
+
+    def test_siguen_a_los_bloques(self):
+        bloque = Bloque.objects.create(numero_bloque='01-01', suscriptor=self.uno, estado='asignado')
+        Bloque.objects.create(numero_bloque='01-02', suscriptor=self.uno, estado='asignado')
+        self.assertEqual(self.agregados(self.uno), (2, 1))
+
+        bloque.estado = 'recibido_m3d'
+        bloque.save()
+        self.assertEqual(self.agregados(self.uno), (2, 4))
+
+        bloque.suscriptor = self.dos
+        bloque.save()
+        self.assertEqual(self.agregados(self.uno), (1, 1))
+        self.assertEqual(self.agregados(self.dos), (1, 4))
+
+        bloque.delete()
+        self.assertEqual(self.agregados(self.dos), (0, 0))
+
+    def test_guardar_un_suscriptor_viejo_no_pisa_los_agregados(self):
+        viejo = Suscriptor.objects.get(pk=self.uno.pk)
+        Bloque.objects.create(numero_bloque='01-01', suscriptor=self.uno, estado='validacion')
+
+        viejo.contactado = True
+        viejo.save()
+        self.assertEqual(self.agregados(self.uno), (1, 2))
+        self.assertTrue(self.uno.contactado)
+
+    def test_cambios_en_lote(self):
+        Bloque.objects.create(numero_bloque='01-01', suscriptor=self.uno, estado='asignado')
+        Bloque.objects.filter(numero_bloque='01-01').update(suscriptor=self.dos, estado='diploma_entregado')
+        bloques_actualizados_en_lote.send(sender=Bloque)
+
+        self.assertEqual(self.agregados(self.uno), (0, 0))
+        self.assertEqual(self.agregados(self.dos), (1, 5))
+
+    def test_comando_repara_los_desincronizados(self):
+        Bloque.objects.create(numero_bloque='01-01', suscriptor=self.uno, estado='entregado_nodo')
+        Suscriptor.objects.filter(pk=self.uno.pk).update(bloques_count=7, estado_max=0)
+
+        salida = StringIO()
+        call_command('recompute_subscriber_aggregates', '--dry-run', stdout=salida)
+        self.assertIn('desincronizados: 1', salida.getvalue())
+        self.assertEqual(self.agregados(self.uno), (7, 0))
+
+        call_command('recompute_subscriber_aggregates', stdout=StringIO())
+        self.assertEqual(self.agregados(self.uno), (1, 3))
+
+
+class PlanConsultasTests(TestCase):
+    """
+    Las consultas frecuentes sobre bloques usan los índices compuestos de Bloque.
+    """
+
+    def test_todas_usan_sus_indices(self):
+        for resultado in PlanConsultas.revisar():
+            with self.subTest(resultado['nombre']):
+                self.assertTrue(resultado['usa_indice'], resultado['plan'])
+
+    def test_comando(self):
+        salida = StringIO()
+        call_command('explicar_consultas', stdout=salida)
+        self.assertIn('Todas las consultas usan sus índices', salida.getvalue())
+
+        with mock.patch.object(PlanConsultas, 'usa_indice', return_value=False):
+            with self.assertRaises(CommandError):
+                call_command('explicar_consultas', stdout=StringIO())
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class EstadisticasTests(TestCase):
+    """
+    /api/estadisticas/ arma el embudo de estados con una consulta agrupada y
+    lo sirve desde el cache mientras no vence.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        uno = crear_suscriptor(1, provincia='Córdoba')
+        dos = crear_suscriptor(2)
+        nodo = crear_nodo(dos, 1)
+        Bloque.objects.create(numero_bloque='01-01', suscriptor=uno, estado='asignado', nro_sorteo='0101')
+        Bloque.objects.create(numero_bloque='01-02', suscriptor=dos, estado='recibido_m3d', nodo_recepcion=nodo)
+        Bloque.objects.create(numero_bloque='02-01', suscriptor=dos, estado='validacion', nodo_recepcion=nodo)
+        Bloque.objects.create(numero_bloque='02-02')
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('estadisticas')
+
+    def test_embudo_total_y_desgloses(self):
+        with CaptureQueriesContext(connection) as contexto:
+            datos = self.client.get(self.url).json()
+        self.assertEqual(len(contexto.captured_queries), 1)
+
+        total = datos['total']
+        self.assertEqual(total['total'], 4)
+        self.assertEqual(total['con_sorteo'], 1)
+        self.assertEqual(total['estados']['libre'], 1)
+        self.assertEqual(
+            list(total['embudo'].values()),
+            [4, 3, 2, 1, 1, 0],
+        )
+
+        por_seccion = {fila['seccion']: fila for fila in datos['por_seccion']}
+        self.assertEqual(por_seccion['01']['total'], 2)
+        self.assertEqual(por_seccion['02']['estados']['validacion'], 1)
+
+        por_provincia = {fila['provincia']: fila['total'] for fila in datos['por_provincia']}
+        self.assertEqual(por_provincia, {'Buenos Aires': 2, 'Córdoba': 1, None: 1})
+        self.assertIsNone(datos['por_provincia'][-1]['provincia'])
+
+        por_nodo = {fila['nodo_seleccionado']: fila['embudo']['validacion'] for fila in datos['por_nodo']}
+        self.assertEqual(por_nodo, {'Buenos Aires': 2, None: 0})
+
+    def test_se_sirve_desde_el_cache(self):
+        primera = self.client.get(self.url).json()
+        Bloque.objects.create(numero_bloque='03-01')
+
+        with CaptureQueriesContext(connection) as contexto:
+            segunda = self.client.get(self.url).json()
+        self.assertEqual(len(contexto.captured_queries), 0)
+        self.assertEqual(segunda, primera)
+
+        cache.delete(EstadisticasBloques.CACHE_KEY)
+        self.assertEqual(self.client.get(self.url).json()['total']['total'], 5)
+
+    def test_etag_del_cache_responde_304_sin_consultar(self):
+        response = self.client.get(self.url)
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(0):
+            no_modificado = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(no_modificado.status_code, 304)
+
+        # Recalculadas, las estadísticas traen otro ETag
+        Bloque.objects.create(numero_bloque='03-01')
+        cache.delete(EstadisticasBloques.CACHE_KEY)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+
+class ProgresoDiarioTests(TestCase):
+    """
+    actualizar_progreso_diario agrega los días que faltan sin duplicar los ya
+    guardados, y /api/progreso-diario/ lee la serie en una consulta.
+    """
+
+    def crear_bloque(self, numero_bloque, **fechas):
+        # update() para que save() no complete fecha_asignacion con la hora actual
+        bloque = Bloque.objects.create(numero_bloque=numero_bloque)
+        Bloque.objects.filter(pk=bloque.pk).update(**{
+            campo: timezone.make_aware(datetime.combine(dia, time(12))) for campo, dia in fechas.items()
+        })
+
+    def test_agrega_los_dias_que_faltan(self):
+        hoy = timezone.localdate()
+        ayer = hoy - timedelta(days=1)
+        antes = hoy - timedelta(days=3)
+        self.crear_bloque('01-01', fecha_asignacion=antes, fecha_validacion=ayer)
+        self.crear_bloque('01-02', fecha_asignacion=antes)
+
+        call_command('actualizar_progreso_diario', stdout=StringIO())
+        self.assertEqual(ProgresoDiario.objects.count(), 4)
+        self.assertEqual(ProgresoDiario.objects.get(fecha=antes).asignados, 2)
+        self.assertEqual(ProgresoDiario.objects.get(fecha=ayer).validados, 1)
+
+        # La segunda corrida rehace solo el último día (hoy), sin duplicar
+        self.crear_bloque('01-03', fecha_asignacion=hoy, fecha_recepcion_m3d=hoy)
+        self.assertEqual(ProgresoDiario.actualizar(), 1)
+        self.assertEqual(ProgresoDiario.objects.count(), 4)
+        self.assertEqual(ProgresoDiario.objects.get(fecha=hoy).recibidos_m3d, 1)
+
+        with CaptureQueriesContext(connection) as contexto:
+            serie = self.client.get(reverse('progreso-diario')).json()
+        self.assertEqual(len(contexto.captured_queries), 1)
+        self.assertEqual([fila['fecha'] for fila in serie][0], antes.isoformat())
+        self.assertEqual(serie[-1]['asignados'], 1)
+        self.assertEqual(serie[-1]['acumulados']['asignados'], 3)
+        self.assertEqual(serie[-1]['acumulados']['validados'], 1)
+
+    def test_desde_recalcula_dias_anteriores(self):
+        ayer = timezone.localdate() - timedelta(days=1)
+        self.crear_bloque('01-01', fecha_asignacion=ayer)
+        ProgresoDiario.actualizar()
+        Bloque.objects.update(fecha_asignacion=None)
+
+        call_command('actualizar_progreso_diario', f'--desde={ayer.isoformat()}', stdout=StringIO())
+        self.assertEqual(ProgresoDiario.objects.get(fecha=ayer).asignados, 0)
+
+        with self.assertRaises(CommandError):
+            call_command('actualizar_progreso_diario', '--desde=ayer', stdout=StringIO())
+
+    def test_serie_sin_cambios_responde_304(self):
+        ayer = timezone.localdate() - timedelta(days=1)
+        self.crear_bloque('01-01', fecha_asignacion=ayer)
+        ProgresoDiario.actualizar()
+        url = reverse('progreso-diario')
+
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.crear_bloque('01-02', fecha_asignacion=ayer)
+        ProgresoDiario.actualizar(desde=ayer)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['asignados'], 2)
+
+    def test_reimportar_no_vuelve_a_contar_los_bloques(self):
+        for indice in range(1, 4):
+            crear_suscriptor(indice)
+        filas = [
+            [None, f'01-0{indice}', f'suscriptor{indice}@m3d.test', 1 if indice == 1 else None, None, None, None]
+            for indice in range(1, 4)
+        ]
+        ayer = timezone.make_aware(datetime.combine(timezone.localdate() - timedelta(days=1), time(12)))
+
+        for metodo in ('import_bloques_participantes', 'import_bloques_participantes_en_lote'):
+            with self.subTest(metodo=metodo):
+                # Primera importación, ayer
+                importar_participantes(metodo, filas)
+                Bloque.objects.update(fecha_asignacion=ayer)
+                Bloque.objects.filter(fecha_validacion__isnull=False).update(fecha_validacion=ayer)
+                ProgresoDiario.actualizar(desde=ayer.date())
+
+                # La misma planilla hoy: las fechas ya marcadas no cambian
+                importar_participantes(metodo, filas)
+                self.assertFalse(Bloque.objects.exclude(fecha_asignacion=ayer).exists())
+                self.assertEqual(Bloque.objects.filter(fecha_validacion=ayer).count(), 1)
+                ProgresoDiario.actualizar()
+                acumulados = ProgresoDiario.serie()[-1]['acumulados']
+                self.assertEqual(acumulados['asignados'], 3)
+                self.assertEqual(acumulados['validados'], 1)
+
+                Bloque.objects.all().delete()
+                ProgresoDiario.objects.all().delete()
+
+    def test_contar_valores_fotos_validadas_no_vuelve_a_contar_los_bloques(self):
+        for indice in range(1, 4):
+            crear_suscriptor(indice)
+            Bloque.objects.create(numero_bloque=f'01-0{indice}')
+        Bloque.objects.create(numero_bloque='01-04', suscriptor=Suscriptor.objects.first(), estado='asignado')
+        filas = [
+            [f'01-0{indice}', f'suscriptor{indice}@m3d.test', 1 if indice == 1 else None, None, None, None]
+            for indice in range(1, 4)
+        ]
+        df = pd.DataFrame(filas, columns=['BLOQUE', 'MAIL', 'Valido FOTO', 'anoto nodo', 'RECIBIMOS', 'Diploma OK'])
+        ayer = timezone.make_aware(datetime.combine(timezone.localdate() - timedelta(days=1), time(12)))
+
+        with tempfile.NamedTemporaryFile(suffix='.xlsx') as archivo:
+            df.to_excel(archivo.name, index=False)
+
+            # Primera corrida, ayer; el bloque que no está en la planilla queda libre y sin fechas
+            call_command('contar_valores_fotos_validadas', f'--file={archivo.name}', stdout=StringIO())
+            self.assertEqual(Bloque.objects.get(numero_bloque='01-04').estado, 'libre')
+            self.assertIsNone(Bloque.objects.get(numero_bloque='01-04').fecha_asignacion)
+            Bloque.objects.filter(fecha_asignacion__isnull=False).update(fecha_asignacion=ayer)
+            Bloque.objects.filter(fecha_validacion__isnull=False).update(fecha_validacion=ayer)
+            ProgresoDiario.actualizar(desde=ayer.date())
+            antes = ProgresoDiario.serie()[-1]['acumulados']
+
+            # La segunda corrida no mueve las fechas a hoy
+            call_command('contar_valores_fotos_validadas', f'--file={archivo.name}', stdout=StringIO())
+
+        self.assertEqual(Bloque.objects.filter(fecha_asignacion=ayer).count(), 3)
+        self.assertEqual(Bloque.objects.filter(fecha_validacion=ayer).count(), 1)
+        ProgresoDiario.actualizar()
+        acumulados = ProgresoDiario.serie()[-1]['acumulados']
+        self.assertEqual(acumulados, antes)
+        self.assertEqual(acumulados['asignados'], 3)
+        self.assertEqual(acumulados['validados'], 1)
+
+
+class EstadoExcelTests(TestCase):
+    """
+    EstadoExcel.derivar elige el estado más alto marcado con 1 en cada fila,
+    con cualquier tipo de celda, y revisar_estados_bloques lo usa para comparar
+    (y corregir con --apply) el estado de los bloques.
+    """
+
+    COLUMNAS = ['VALIDA FOTO', 'anoto nodo', 'RECIBIMOS', 'Diploma OK']
+
+    def derivar(self, df, **kwargs):
+        return EstadoExcel.derivar(df, *self.COLUMNAS, **kwargs)
+
+    def test_precedencia_y_tipos_de_celda(self):
+        nan = float('nan')
+        casos = [
+            # validacion, entregado, recibido, diploma -> estado
+            ([None, None, None, None], 'asignado'),
+            ([1, None, None, None], 'validacion'),
+            ([1.0, 1, None, None], 'entregado_nodo'),
+            ([1, 1, 1.0, None], 'recibido_m3d'),
+            ([1, 1, 1, 1], 'diploma_entregado'),
+            ([None, None, None, 1], 'diploma_entregado'),
+            ([None, 1, None, 1.0], 'diploma_entregado'),
+            ([1, None, 1, None], 'recibido_m3d'),
+            # Solo cuenta el número 1: ni el texto '1', ni otros números, ni NaN
+            (['1', None, None, None], 'asignado'),
+            ([2, 0, nan, None], 'asignado'),
+            ([1, 'si', nan, '1'], 'validacion'),
+        ]
+        df = pd.DataFrame([fila for fila, _ in casos], columns=self.COLUMNAS)
+        # Columnas numéricas (float con NaN) y de texto mezcladas
+        df = df.astype({'RECIBIMOS': float})
+
+        estados = self.derivar(df)
+        for (fila, esperado), estado in zip(casos, estados):
+            with self.subTest(fila=fila):
+                self.assertEqual(estado, esperado)
+        self.assertTrue(estados.index.equals(df.index))
+
+    def test_base_por_fila_y_columnas_que_faltan(self):
+        df = pd.DataFrame({'VALIDA FOTO': [1, None, None]}, index=[10, 20, 30])
+        base = pd.Series(['asignado', 'libre', 'asignado'], index=df.index)
+
+        estados = EstadoExcel.derivar(df, col_validacion='VALIDA FOTO', col_diploma='Diploma OK', base=base)
+        self.assertEqual(list(estados), ['validacion', 'libre', 'asignado'])
+        self.assertEqual(list(estados.index), [10, 20, 30])
+
+        self.assertEqual(list(EstadoExcel.derivar(df)), ['asignado'] * 3)
+
+    def test_revisar_estados_bloques(self):
+        suscriptor = crear_suscriptor(1)
+        ayer = timezone.now() - timedelta(days=1)
+        Bloque.objects.create(numero_bloque='01-01', suscriptor=suscriptor, estado='asignado', fecha_asignacion=ayer)
+        Bloque.objects.create(numero_bloque='01-02', suscriptor=suscriptor, estado='asignado')
+        Bloque.objects.create(numero_bloque='01-03', estado='validacion')
+
+        # Planilla sin encabezados reconocidos: columnas por posición, con la fila de títulos
+        encabezados = [f'col{indice}' for indice in range(16)]
+        encabezados[2], encabezados[3] = 'BLOQUE', 'MAIL'
+        filas = [encabezados]
+        for bloque, email, marcas in [
+            ('01-01', 'suscriptor1@m3d.test', [1, 1, None, None]),
+            ('01-02', 'suscriptor1@m3d.test', [None, None, None, None]),
+            ('01-03', None, [None, None, None, None]),
+            ('09-09', 'suscriptor1@m3d.test', [1, None, None, None]),
+        ]:
+            filas.append([None, None, bloque, email] + [None] * 8 + marcas)
+
+        with tempfile.NamedTemporaryFile(suffix='.xlsx') as archivo:
+            pd.DataFrame(filas).to_excel(archivo.name, index=False, header=False)
+
+            salida = StringIO()
+            call_command('revisar_estados_bloques', f'--file={archivo.name}', stdout=salida)
+            self.assertIn('Total de bloques en Excel: 4', salida.getvalue())
+            self.assertIn('- Con foto de validación: 1', salida.getvalue())
+            self.assertIn('- No encontrados en BD: 1', salida.getvalue())
+            self.assertIn('Cambios necesarios: 2', salida.getvalue())
+            self.assertEqual(Bloque.objects.get(numero_bloque='01-01').estado, 'asignado')
+
+            call_command('revisar_estados_bloques', f'--file={archivo.name}', '--apply', stdout=StringIO())
+
+        estados = dict(Bloque.objects.values_list('numero_bloque', 'estado'))
+        self.assertEqual(estados, {'01-01': 'entregado_nodo', '01-02': 'asignado', '01-03': 'libre'})
+        # La fecha que ya tenía el bloque se conserva
+        bloque = Bloque.objects.get(numero_bloque='01-01')
+        self.assertEqual(bloque.fecha_asignacion, ayer)
+        self.assertIsNotNone(bloque.fecha_entrega_nodo)
+
+
+class ImportacionBloquesTests(TestCase):
+    """
+    La importación en lote del Excel de participantes deja los bloques igual
+    que la importación fila por fila, y avisa el cambio con
+    bloques_actualizados_en_lote (versión del mapa, búsqueda, agregados y
+    snapshot del mapa).
+    """
+
+    FILAS = [
+        ['0101', '01-01', 'suscriptor1@m3d.test', 1, 1, None, None],
+        [None, '01-02', 'suscriptor2@m3d.test', None, None, None, None],
+        # Bloques adicionales de la institución de la fila anterior
+        [None, '01-03', None, None, None, None, None],
+        [None, '01-04', None, None, None, None, None],
+        [None, '01-05', 'suscriptor1@m3d.test', None, None, None, None],
+        # Sin email después de un particular: queda libre
+        [None, '01-06', None, None, None, None, None],
+        [None, '01-07', 'nadie@m3d.test', None, None, None, None],
+    ]
+
+    def setUp(self):
+        self.particular = crear_suscriptor(1)
+        self.institucion = crear_suscriptor(2, tipo='institucion', nombre_institucion='Escuela 2')
+        self.nodo = crear_nodo(self.particular, 1)
+
+    def estado_bloques(self):
+        campos = ['numero_bloque', 'estado', 'suscriptor__email', 'nodo_recepcion_id', 'nro_sorteo', 'seccion', 'numero', 'clave_canonica']
+        fechas = ['fecha_asignacion', 'fecha_validacion', 'fecha_entrega_nodo', 'fecha_recepcion_m3d', 'fecha_entrega_diploma']
+        return [
+            (*fila[:len(campos)], *(fecha is not None for fecha in fila[len(campos):]))
+            for fila in Bloque.objects.order_by('numero_bloque').values_list(*campos, *fechas)
+        ]
+
+    def importar(self, metodo):
+        Bloque.objects.all().delete()
+        # Un bloque ya asignado que el Excel deja libre
+        Bloque.objects.create(numero_bloque='01-06', suscriptor=self.particular, estado='asignado')
+        return importar_participantes(metodo, self.FILAS)
+
+    def test_en_lote_igual_que_fila_por_fila(self):
+        resultado_por_fila = self.importar('import_bloques_participantes')
+        estado_por_fila = self.estado_bloques()
+
+        _, resincronizar_antes = VersionMapa.actual()
+        with mock.patch.object(MapaSnapshot, 'invalidar') as invalidar, \
+                self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                resultado_en_lote = self.importar('import_bloques_participantes_en_lote')
+
+        self.assertEqual(resultado_en_lote, resultado_por_fila)
+        self.assertEqual(resultado_en_lote, (5, 1, 1))
+        self.assertEqual(self.estado_bloques(), estado_por_fila)
+        self.assertEqual(
+            [(numero_bloque, estado, email) for numero_bloque, estado, email, *_ in estado_por_fila],
+            [
+                ('01-01', 'entregado_nodo', 'suscriptor1@m3d.test'),
+                ('01-02', 'asignado', 'suscriptor2@m3d.test'),
+                ('01-03', 'asignado', 'suscriptor2@m3d.test'),
+                ('01-04', 'asignado', 'suscriptor2@m3d.test'),
+                ('01-05', 'asignado', 'suscriptor1@m3d.test'),
+                ('01-06', 'libre', None),
+            ],
+        )
+        self.assertEqual(Bloque.objects.get(numero_bloque='01-01').nodo_recepcion, self.nodo)
+
+        # Efectos de bloques_actualizados_en_lote
+        self.assertGreater(VersionMapa.actual()[1], resincronizar_antes)
+        self.assertTrue(invalidar.called)
+        self.institucion.refresh_from_db()
+        self.assertEqual(self.institucion.bloques_count, 3)
+        self.particular.refresh_from_db()
+        self.assertEqual(
+            (self.particular.bloques_count, self.particular.estado_max),
+            (2, ExcelManagerForBloques.JERARQUIA_ESTADOS['entregado_nodo']),
+        )
+        self.assertEqual(list(BusquedaSuscriptores.buscar(Suscriptor.objects.all(), '01-04')), [self.institucion])
+
+
+class ImportacionSuscriptoresTests(TestCase):
+    """
+    La importación de suscriptores guarda por lotes con bulk_create/bulk_update
+    y, si un lote falla, lo rehace fila por fila informando cada error. Las
+    impresoras que no cambiaron se reutilizan.
+    """
+
+    def fila(self, indice, **kwargs):
+        fila = {
+            'Nombre y Apellido: Nombre': f'Nombre {indice}',
+            'Nombre y Apellido: Apellidos': f'Apellido {indice}',
+            'Correo electrónico': f'suscriptor{indice}@m3d.test',
+            'Teléfono': '11 0000-0000',
+            'Provincia': 'Buenos Aires',
+            '¿Cuántos equipos tenés?': '2',
+            '¿De qué Marcas y Modelos son tus equipos?': f'Impresora {indice}',
+        }
+        fila.update(kwargs)
+        return fila
+
+    def importar(self, filas):
+        manager = ExcelManagerForSubs()
+        with mock.patch.object(manager, 'read_excel', return_value=pd.DataFrame(filas)), \
+                mock.patch.object(manager, 'log'):
+            return manager.import_particulares_con_impresora('form.xlsx')
+
+    def test_crea_y_actualiza_en_pocas_consultas(self):
+        existente = crear_suscriptor(1, nombre='Viejo')
+        filas = [self.fila(indice) for indice in range(1, 41)]
+        # Email repetido: gana la última fila, como en la carga fila por fila
+        filas.append(self.fila(2, **{'Nombre y Apellido: Nombre': 'Repetido'}))
+        filas.append(self.fila(99, **{'Correo electrónico': None}))
+
+        with CaptureQueriesContext(connection) as contexto:
+            resultado = self.importar(filas)
+        self.assertEqual(resultado, (41, 1))
+        self.assertLess(len(contexto.captured_queries), 20)
+
+        existente.refresh_from_db()
+        self.assertEqual(existente.nombre, 'Nombre 1')
+        self.assertEqual(Suscriptor.objects.get(email='suscriptor2@m3d.test').nombre, 'Repetido')
+        self.assertEqual(ParticularConImpresora.objects.count(), 40)
+        # Una impresora por suscriptor: la del email repetido es la de su última fila
+        self.assertEqual(Impresora.objects.count(), 40)
+        particular = ParticularConImpresora.objects.get(suscriptor__email='suscriptor2@m3d.test')
+        self.assertEqual(particular.impresora.cantidad_equipos, 2)
+        self.assertEqual(particular.impresora.marcas_modelos_equipos, 'Impresora 2')
+
+        # El índice de búsqueda se rearma al final
+        self.assertEqual(list(BusquedaSuscriptores.buscar(Suscriptor.objects.all(), 'Repetido')), [particular.suscriptor])
+
+    def test_plan_compilado_por_archivo(self):
+        especificacion = ExcelManagerForSubs.ESPECIFICACIONES['particulares_con_impresora']
+        df = pd.DataFrame([self.fila(1, DNI=None), self.fila(2, **{'Teléfono': "'+54 11 5555"})])
+        plan = especificacion.compilar(df.columns)
+
+        # Solo las columnas que trae el archivo, con su conversor ya resuelto
+        self.assertEqual({campo for _, campo, _ in plan.destinos['suscriptor']}, {'nombre', 'apellido', 'email', 'telefono', 'provincia', 'dni'})
+        self.assertNotIn('subtipo', [destino for destino, campos in plan.destinos.items() if campos])
+
+        filas = [plan.convertir(valores) for _, valores in plan.filas(df)]
+        self.assertEqual(filas[0]['impresora']['cantidad_equipos'], 2)
+        self.assertEqual(filas[1]['suscriptor']['telefono'], ExcelParser.clean_phone_number("'+54 11 5555"))
+        self.assertNotIn('dni', filas[0]['suscriptor'])
+
+    def test_lote_con_error_se_rehace_fila_por_fila(self):
+        # Un valor que la base no acepta (un entero de 25 cifras) hace fallar el lote entero
+        filas = [self.fila(1), self.fila(2, **{'¿Cuántos equipos tenés?': '9' * 25}), self.fila(3)]
+
+        resultado = self.importar(filas)
+        self.assertEqual(resultado, (2, 1))
+        self.assertCountEqual(
+            Suscriptor.objects.values_list('email', flat=True),
+            ['suscriptor1@m3d.test', 'suscriptor3@m3d.test'],
+        )
+        self.assertEqual(ParticularConImpresora.objects.count(), 2)
+        self.assertEqual(Impresora.objects.count(), 2)
+
+    def test_reimportar_reutiliza_las_impresoras(self):
+        filas = [self.fila(indice) for indice in range(1, 6)]
+        self.importar(filas)
+        impresoras = dict(ParticularConImpresora.objects.values_list('suscriptor__email', 'impresora_id'))
+
+        # Mismos datos: no se crean impresoras nuevas; datos cambiados: una nueva
+        filas[0]['¿De qué Marcas y Modelos son tus equipos?'] = 'Otra impresora'
+        self.assertEqual(self.importar(filas), (5, 0))
+        self.assertEqual(Impresora.objects.count(), 6)
+        reimportadas = dict(ParticularConImpresora.objects.values_list('suscriptor__email', 'impresora_id'))
+        self.assertNotEqual(reimportadas.pop('suscriptor1@m3d.test'), impresoras.pop('suscriptor1@m3d.test'))
+        self.assertEqual(reimportadas, impresoras)
+        self.assertEqual(Impresora.huerfanas().count(), 1)
+
+    def test_huella_normaliza_los_valores(self):
+        impresora = Impresora.objects.create(cantidad_equipos=3, marcas_modelos_equipos='Ender 3')
+        self.assertEqual(impresora.huella, Impresora.calcular_huella({'cantidad_equipos': '3', 'marcas_modelos_equipos': 'Ender 3'}))
+
+        impresora.cantidad_equipos = 4
+        impresora.save(update_fields=['cantidad_equipos'])
+        impresora.refresh_from_db()
+        self.assertEqual(impresora.huella, Impresora.calcular_huella({'cantidad_equipos': 4, 'marcas_modelos_equipos': 'Ender 3'}))
+
+    def test_purgar_impresoras_huerfanas(self):
+        self.importar([self.fila(1), self.fila(2)])
+        huerfanas = [Impresora.objects.create(cantidad_equipos=indice) for indice in range(3)]
+
+        salida = StringIO()
+        call_command('purgar_impresoras_huerfanas', '--dry-run', stdout=salida)
+        self.assertIn('Impresoras huérfanas: 3 de 5', salida.getvalue())
+        self.assertEqual(Impresora.objects.count(), 5)
+
+        call_command('purgar_impresoras_huerfanas', stdout=StringIO())
+        self.assertFalse(Impresora.objects.filter(pk__in=[impresora.pk for impresora in huerfanas]).exists())
+        self.assertEqual(ParticularConImpresora.objects.filter(impresora__isnull=False).count(), 2)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ResolvedorColumnasTests(TestCase):
+    """
+    Las columnas del Excel se encuentran con los encabezados normalizados, por
+    palabra y no por subcadena, y se resuelven una vez por plantilla (el
+    resultado queda en el cache de Django, entre corridas de import_excel).
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_columnas_del_excel_de_participantes(self):
+        encabezados = ['N sorteo', 'prefijo', 'BLOQUE', 'MAIL', 'NOMBRE', 'Valido FOTO', 'anoto nodo', 'RECIBIMOS', 'Diploma OK']
+        self.assertEqual(ExcelManagerForBloques.COLUMNAS_PARTICIPANTES.resolver(encabezados), {
+            'bloque': 'BLOQUE',
+            'email': 'MAIL',
+            'nro_sorteo': 'N sorteo',
+            'validacion': 'Valido FOTO',
+            'entregado': 'anoto nodo',
+            'recibido': 'RECIBIMOS',
+            'diploma': 'Diploma OK',
+        })
+
+    def test_normaliza_y_no_confunde_subcadenas(self):
+        resolvedor = ResolvedorColumnas({
+            'email': ['mail', 'email', 'correo'],
+            'entregado': ['entregado', 'nodo'],
+            'diploma': ['diploma', 'ok'],
+        })
+        columnas = resolvedor.resolver(['Facebook', 'Código de nodo', '  Correo   Electrónico ', 'Nodo', 'OK'])
+        self.assertEqual(columnas, {'email': '  Correo   Electrónico ', 'entregado': 'Nodo', 'diploma': 'OK'})
+        self.assertEqual(resolvedor.resolver(['E-MAIL', 'Teléfono']), {'email': 'E-MAIL', 'entregado': None, 'diploma': None})
+
+    def test_resuelve_una_vez_por_plantilla(self):
+        with mock.patch.object(ResolvedorColumnas, '_resolver', autospec=True, side_effect=ResolvedorColumnas._resolver) as resolver:
+            self.assertEqual(ResolvedorColumnas({'bloque': ['bloque']}).resolver(['BLOQUE', 'MAIL']), {'bloque': 'BLOQUE'})
+            # Otra instancia (como en otra corrida del comando) usa lo guardado
+            self.assertEqual(ResolvedorColumnas({'bloque': ['bloque']}).resolver(['BLOQUE', 'MAIL']), {'bloque': 'BLOQUE'})
+            self.assertEqual(resolver.call_count, 1)
+
+            # Otros encabezados u otros términos se resuelven de nuevo
+            self.assertEqual(ResolvedorColumnas({'bloque': ['bloque']}).resolver(['MAIL', 'Bloque']), {'bloque': 'Bloque'})
+            self.assertEqual(ResolvedorColumnas({'bloque': ['nro bloque', 'bloque']}).resolver(['BLOQUE', 'MAIL']), {'bloque': 'BLOQUE'})
+            self.assertEqual(resolver.call_count, 3)
+
+
+class LecturaExcelTests(TestCase):
+    """
+    read_excel lee solo las columnas pedidas, con su tipo, y si el motor
+    preferido falla reintenta con openpyxl.
+    """
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.archivo = os.path.join(directorio.name, 'participantes.xlsx')
+        pd.DataFrame({
+            'N sorteo': ['0501', None],
+            'BLOQUE': ['05-01', '05-02'],
+            'MAIL': ['a@m3d.test', 'b@m3d.test'],
+            'Direccion': ['Calle 1', 'Calle 2'],
+            'Valido FOTO': [1, None],
+            'Codigo Postal': [1765, 1754],
+        }).to_excel(self.archivo, index=False)
+        self.manager = ExcelManagerBase()
+
+    def test_solo_las_columnas_pedidas_con_su_tipo(self):
+        df = self.manager.read_excel(self.archivo, columnas={'MAIL': str, 'Codigo Postal': str, 'Otra': str})
+        self.assertEqual(list(df.columns), ['MAIL', 'Codigo Postal'])
+        self.assertEqual(list(df['Codigo Postal']), ['1765', '1754'])
+
+        df = self.manager.read_excel(self.archivo, columnas=ExcelManagerForBloques.columnas_participantes)
+        self.assertEqual(list(df.columns), ['N sorteo', 'BLOQUE', 'MAIL', 'Valido FOTO'])
+        self.assertEqual(df['N sorteo'][0], '0501')
+        self.assertEqual(df['Valido FOTO'][0], 1)
+
+    def test_reintenta_con_openpyxl(self):
+        leer = ExcelManagerBase._leer_excel
+
+        def leer_sin_calamine(file_path, sheet_name, columnas, motor):
+            if motor == 'calamine':
+                raise ValueError('formato no soportado')
+            return leer(file_path, sheet_name, columnas, motor)
+
+        with mock.patch.object(ExcelManagerBase, 'motores_excel', return_value=['calamine', 'openpyxl']), \
+                mock.patch.object(ExcelManagerBase, '_leer_excel', side_effect=leer_sin_calamine), \
+                mock.patch.object(self.manager, 'log') as log:
+            df = self.manager.read_excel(self.archivo, columnas={'BLOQUE': str})
+        self.assertEqual(list(df['BLOQUE']), ['05-01', '05-02'])
+        self.assertEqual(log.call_args.args[1], 'warning')
+
+
+class BusquedaSuscriptoresTests(TestCase):
+    """
+    La búsqueda usa el índice FTS5 (la base de los tests es SQLite), se
+    mantiene al día con las señales y ordena por relevancia.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.maria = crear_suscriptor(1, nombre='María', apellido='Gómez', dni='30111222')
+        cls.mariano = crear_suscriptor(2, nombre='Mariano', apellido='Pérez')
+        cls.escuela = crear_suscriptor(
+            3, nombre='Ana', apellido=None, tipo='institucion', nombre_institucion='Escuela Técnica Gómez'
+        )
+        Bloque.objects.create(numero_bloque='*12-07', suscriptor=cls.maria, estado='asignado')
+
+    def buscar(self, texto, **kwargs):
+        return list(BusquedaSuscriptores.buscar(Suscriptor.objects.all(), texto, **kwargs))
+
+    def test_usa_el_indice_fts(self):
+        self.assertTrue(BusquedaSuscriptores.usa_fts())
+
+    def test_sin_distinguir_mayusculas_ni_acentos(self):
+        self.assertCountEqual(self.buscar('MARIA'), [self.maria, self.mariano])
+        self.assertEqual(self.buscar('tecnica'), [self.escuela])
+
+    def test_dni_y_numero_de_bloque(self):
+        self.assertEqual(self.buscar('30111222'), [self.maria])
+        self.assertEqual(self.buscar('12-07'), [self.maria])
+
+    def test_ordena_por_relevancia(self):
+        # Coincidir en el nombre o el apellido pesa más que en el email
+        luis = crear_suscriptor(4, nombre='Luis', apellido='Sosa', email='gomezluis@m3d.test')
+
+        resultados = self.buscar('gomez')
+        self.assertCountEqual(resultados[:2], [self.maria, self.escuela])
+        self.assertEqual(resultados[2], luis)
+
+    def test_solo_en_las_columnas_pedidas(self):
+        self.assertEqual(self.buscar('gomez', columnas=['nombre', 'apellido']), [self.maria])
+
+    def test_sin_fts_no_vuelve_a_consultar_las_tablas(self):
+        with mock.patch.dict(BusquedaSuscriptores._bases_con_fts, clear=True), \
+                mock.patch.object(connection.introspection, 'table_names', return_value=[]) as table_names:
+            self.assertFalse(BusquedaSuscriptores.usa_fts())
+            self.assertFalse(BusquedaSuscriptores.usa_fts())
+            crear_suscriptor(99)
+        self.assertEqual(table_names.call_count, 1)
+
+    def test_texto_corto_busca_con_icontains(self):
+        self.assertCountEqual(self.buscar('An'), [self.escuela, self.mariano])
+
+    def test_las_senales_mantienen_el_indice(self):
+        self.mariano.apellido = 'Quiroga'
+        self.mariano.save()
+        self.assertEqual(self.buscar('quiroga'), [self.mariano])
+        self.assertEqual(self.buscar('perez'), [])
+
+        # El bloque pasa a otro suscriptor
+        bloque = Bloque.objects.get(numero_bloque='*12-07')
+        bloque.suscriptor = self.mariano
+        bloque.save()
+        self.assertEqual(self.buscar('12-07'), [self.mariano])
+
+        bloque.delete()
+        self.assertEqual(self.buscar('12-07'), [])
+
+        self.mariano.delete()
+        self.assertEqual(self.buscar('quiroga'), [])
+
+    def test_cambios_en_lote_reconstruyen_el_indice(self):
+        Bloque.objects.filter(numero_bloque='*12-07').update(suscriptor=self.escuela)
+        bloques_actualizados_en_lote.send(sender=Bloque)
+
+        self.assertEqual(self.buscar('12-07'), [self.escuela])
+
+    def test_api_y_admin_usan_la_busqueda(self):
+        datos = self.client.get(reverse('suscriptor-con-bloques-list'), {'q': '12-07'}).json()
+        self.assertEqual([fila['id'] for fila in datos['results']], [self.maria.pk])
+
+        datos = self.client.get(reverse('suscriptor-con-bloques-list'), {'nombre': 'maria', 'solo_con_bloques': 'false'}).json()
+        self.assertCountEqual([fila['id'] for fila in datos['results']], [self.maria.pk, self.mariano.pk])
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@m3d.test', 'clave'))
+        response = self.client.get(reverse('admin:m3d_app_suscriptor_changelist'), {'q': '30111222'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.maria])
+
+        response = self.client.get(reverse('admin:m3d_app_bloque_changelist'), {'q': 'gomez'})
+        self.assertEqual([b.numero_bloque for b in response.context['cl'].result_list], ['*12-07'])
+
+
+class ApiRegresionTests(TestCase):
+    """
+    Cada endpoint del router, sobre datos sintéticos del tamaño de producción,
+    no puede hacer más consultas que las registradas en la línea base
+    (m3d_app/benchmark/linea_base_api.json). La latencia la controla el
+    comando benchmark_api, porque depende de la máquina.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datos = DatosSinteticos.generar()
+
+    def test_datos_de_la_linea_base(self):
+        self.assertEqual(self.datos, BenchmarkApi.cargar_linea_base()['datos'])
+
+    def test_consultas_por_endpoint(self):
+        resultados = BenchmarkApi.medir(repeticiones=1)
+        linea_base = BenchmarkApi.cargar_linea_base()
+
+        self.assertEqual(set(resultados), set(linea_base['endpoints']))
+        self.assertEqual(BenchmarkApi.comparar(resultados, linea_base, latencia=False), [])
+
+    def test_detecta_consultas_de_mas(self):
+        linea_base = {'endpoints': {'bloques-list': {'consultas': 2, 'p50_ms': 1.0, 'p95_ms': 1.0}}}
+        resultados = {'bloques-list': {'consultas': 3, 'p50_ms': 1.0, 'p95_ms': 1.0}}
+
+        self.assertEqual(len(BenchmarkApi.comparar(resultados, linea_base)), 1)
+
+    def test_detecta_latencia_por_encima_del_umbral(self):
+        linea_base = {'endpoints': {'bloques-list': {'consultas': 2, 'p50_ms': 10.0, 'p95_ms': 10.0}}}
+
+        dentro = {'bloques-list': {'consultas': 2, 'p50_ms': 12.0, 'p95_ms': 14.0}}
+        fuera = {'bloques-list': {'consultas': 2, 'p50_ms': 20.0, 'p95_ms': 30.0}}
+        self.assertEqual(BenchmarkApi.comparar(dentro, linea_base), [])
+        self.assertEqual(len(BenchmarkApi.comparar(fuera, linea_base)), 1)
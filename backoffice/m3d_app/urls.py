@@ -13,6 +13,8 @@ from m3d_app.views import (
     BloqueViewSet,
     NodoRecepcionViewSet,
     SuscriptorConBloquesViewSet,
+    estadisticas,
+    progreso_diario,
 )
 
 # Configurar el router para APIs
@@ -31,6 +33,9 @@ router.register(r'suscriptores-con-bloques', SuscriptorConBloquesViewSet, basena
 urlpatterns = [
     #path('', lambda request: redirect('/admin/', permanent=True)), 
     path('admin/', admin.site.urls),
+    # Estadísticas y progreso de bloques (fuera del router: no son recursos de modelo)
+    path('api/estadisticas/', estadisticas, name='estadisticas'),
+    path('api/progreso-diario/', progreso_diario, name='progreso-diario'),
     # Incluir las URLs de la API
     path('api/', include(router.urls)),
     # Incluir URLs de autenticación para el navegador API
@@ -0,0 +1,64 @@
+from django.db.models import Case, Count, F, Max, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from m3d_app.models.choices.estado import Estado
+from m3d_app.models.suscriptor.suscriptor import Suscriptor
+from m3d_app.models.bloque3d.bloque import Bloque
+
+
+class AgregadosSuscriptor:
+    """
+    Mantiene Suscriptor.bloques_count y Suscriptor.estado_max. Se recalculan
+    en la base con un UPDATE de subconsultas (no se suman ni restan en Python),
+    dentro de la misma transacción que el cambio del bloque.
+    """
+
+    TAMANO_LOTE = 500
+
+    @staticmethod
+    def expresiones():
+        """
+        Subconsultas con la cantidad de bloques y el nivel máximo de estado de
+        cada suscriptor, para usar en update() o annotate().
+        """
+        bloques = Bloque.objects.filter(suscriptor=OuterRef('pk')).order_by().values('suscriptor')
+        nivel = Case(
+            *[When(estado=estado, then=Value(nivel)) for estado, nivel in Estado.get_jerarquia().items()],
+            default=Value(0),
+        )
+        return {
+            'bloques_count': Coalesce(Subquery(bloques.annotate(total=Count('pk')).values('total')), 0),
+            'estado_max': Coalesce(Subquery(bloques.annotate(nivel=Max(nivel)).values('nivel')), 0),
+        }
+
+    @classmethod
+    def desincronizados(cls):
+        """
+        Suscriptores cuyos agregados guardados no coinciden con sus bloques.
+        """
+        calculados = {f'{campo}_real': expresion for campo, expresion in cls.expresiones().items()}
+        return Suscriptor.objects.annotate(**calculados).exclude(
+            bloques_count=F('bloques_count_real'),
+            estado_max=F('estado_max_real'),
+        )
+
+    @classmethod
+    def recalcular(cls, ids=None):
+        """
+        Recalcula los agregados de los suscriptores indicados, o de los
+        desincronizados si no se indica ninguno.
+
+        Returns:
+            Cantidad de suscriptores actualizados.
+        """
+        if ids is None:
+            ids = cls.desincronizados().values_list('pk', flat=True)
+        ids = sorted({pk for pk in ids if pk is not None})
+
+        actualizados = 0
+        for inicio in range(0, len(ids), cls.TAMANO_LOTE):
+            actualizados += Suscriptor.objects.filter(pk__in=ids[inicio:inicio + cls.TAMANO_LOTE]).update(
+                **cls.expresiones(),
+                fecha_modificacion=timezone.now(),
+            )
+        return actualizados
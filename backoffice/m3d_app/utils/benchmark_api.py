@@ -0,0 +1,133 @@
+import json
+import os
+import statistics
+import time
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+
+class BenchmarkApi:
+    """
+    Mide la cantidad de consultas y la latencia (p50/p95) de cada endpoint del
+    router de la API, y las compara contra una línea base guardada en JSON.
+    """
+
+    LINEA_BASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmark', 'linea_base_api.json')
+
+    # Una latencia cuenta como regresión si el p95 supera al de la línea base en
+    # más de UMBRAL_LATENCIA (proporción) y además en más de MARGEN_MS, para no
+    # fallar por ruido en endpoints de pocos milisegundos
+    UMBRAL_LATENCIA = 0.5
+    MARGEN_MS = 5.0
+
+    @staticmethod
+    def endpoints():
+        """
+        Lista de endpoints a medir: el listado y el detalle de cada ViewSet
+        registrado en el router de m3d_app/urls.py.
+
+        Returns:
+            Lista de tuplas (nombre, url).
+        """
+        from m3d_app.urls import router
+
+        endpoints = []
+        for prefijo, viewset, basename in router.registry:
+            basename = basename or router.get_default_basename(viewset)
+            endpoints.append((f"{prefijo}-list", reverse(f"{basename}-list")))
+
+            primero = viewset.queryset.model.objects.order_by('pk').values_list('pk', flat=True).first()
+            if primero is not None:
+                endpoints.append((f"{prefijo}-detail", reverse(f"{basename}-detail", args=[primero])))
+        return endpoints
+
+    @classmethod
+    def medir(cls, repeticiones=20):
+        """
+        Mide cada endpoint con medir_llamada: una llamada para contar consultas
+        y `repeticiones` para la latencia.
+
+        Returns:
+            Dict {nombre: {'url', 'consultas', 'p50_ms', 'p95_ms'}}.
+        """
+        cliente = APIClient()
+        resultados = {}
+
+        for nombre, url in cls.endpoints():
+            response, medicion = cls.medir_llamada(lambda: cliente.get(url), repeticiones)
+            if response.status_code != 200:
+                raise RuntimeError(f"{url} respondió {response.status_code}")
+            resultados[nombre] = {'url': url, **medicion}
+        return resultados
+
+    @classmethod
+    def medir_llamada(cls, funcion, repeticiones=20):
+        """
+        Llama a `funcion` una vez para contar consultas y luego `repeticiones`
+        veces para medir la latencia.
+
+        Returns:
+            Tuple: (resultado de la primera llamada, {'consultas', 'p50_ms', 'p95_ms'}).
+        """
+        with CaptureQueriesContext(connection) as contexto:
+            resultado = funcion()
+        # Contar ya: captured_queries lee el log de la conexión, que se vacía en cada request
+        consultas = len(contexto.captured_queries)
+
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+        return resultado, {
+            'consultas': consultas,
+            'p50_ms': round(statistics.median(tiempos), 2),
+            'p95_ms': round(cls._percentil(tiempos, 95), 2),
+        }
+
+    @classmethod
+    def comparar(cls, resultados, linea_base, umbral_latencia=None, margen_ms=None, latencia=True):
+        """
+        Compara una medición contra la línea base.
+
+        Returns:
+            Lista de mensajes, uno por cada regresión encontrada (vacía si no hay).
+        """
+        umbral_latencia = cls.UMBRAL_LATENCIA if umbral_latencia is None else umbral_latencia
+        margen_ms = cls.MARGEN_MS if margen_ms is None else margen_ms
+        regresiones = []
+
+        for nombre, medicion in resultados.items():
+            base = linea_base.get('endpoints', {}).get(nombre)
+            if base is None:
+                regresiones.append(f"{nombre}: no está en la línea base (volver a generarla con --guardar)")
+                continue
+
+            if medicion['consultas'] > base['consultas']:
+                regresiones.append(f"{nombre}: {medicion['consultas']} consultas (línea base: {base['consultas']})")
+
+            limite = base['p95_ms'] * (1 + umbral_latencia)
+            if latencia and medicion['p95_ms'] > limite and medicion['p95_ms'] - base['p95_ms'] > margen_ms:
+                regresiones.append(f"{nombre}: p95 {medicion['p95_ms']} ms (línea base: {base['p95_ms']} ms)")
+
+        return regresiones
+
+    @classmethod
+    def cargar_linea_base(cls, ruta=None):
+        with open(ruta or cls.LINEA_BASE, encoding='utf-8') as archivo:
+            return json.load(archivo)
+
+    @classmethod
+    def guardar_linea_base(cls, resultados, datos, ruta=None):
+        with open(ruta or cls.LINEA_BASE, 'w', encoding='utf-8') as archivo:
+            json.dump({'datos': datos, 'endpoints': resultados}, archivo, indent=2, ensure_ascii=False)
+            archivo.write('\n')
+
+    @staticmethod
+    def _percentil(valores, percentil):
+        ordenados = sorted(valores)
+        indice = max(0, round(percentil / 100 * len(ordenados)) - 1)
+        return ordenados[indice]
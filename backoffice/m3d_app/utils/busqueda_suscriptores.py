@@ -0,0 +1,193 @@
+import unicodedata
+from collections import defaultdict
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from m3d_app.models.suscriptor.suscriptor import Suscriptor
+from m3d_app.models.suscriptor.suscriptor_busqueda import SuscriptorBusqueda
+from m3d_app.models.bloque3d.bloque import Bloque
+
+
+class BusquedaSuscriptores:
+    """
+    Búsqueda de suscriptores por nombre, apellido, institución, email, DNI,
+    teléfono y número de bloque, con resultados ordenados por relevancia.
+
+    - SQLite: tabla FTS5 con tokenizer trigram (SuscriptorBusqueda). Encuentra
+      cualquier subcadena de 3 o más letras, sin distinguir mayúsculas ni acentos.
+      La crea la migración 0012 (con los pesos bm25 de cada columna) y la
+      mantienen las señales de m3d_app/signals.py.
+    - Postgres: índices pg_trgm sobre las mismas columnas, que atienden los
+      icontains; la relevancia es la similitud trigram.
+    - Otras bases, o textos de menos de 3 letras: icontains sobre cada columna.
+    """
+
+    TABLA = SuscriptorBusqueda._meta.db_table
+    CAMPOS = ['nombre', 'apellido', 'nombre_institucion', 'email', 'dni', 'telefono']
+    # Columnas del índice: los campos del suscriptor más sus bloques
+    COLUMNAS = CAMPOS + ['bloques']
+    LARGO_MINIMO = 3
+    TAMANO_LOTE = 500
+
+    # (alias, base) -> si tiene la tabla FTS5; se consulta una vez por proceso
+    _bases_con_fts = {}
+
+    @staticmethod
+    def normalizar(texto):
+        """
+        Minúsculas y sin acentos, para guardar y para buscar ("María" -> "maria").
+        """
+        descompuesto = unicodedata.normalize('NFKD', texto or '')
+        return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+    @classmethod
+    def expresion(cls, texto, columnas=None):
+        """
+        Arma la consulta FTS5: cada palabra entre comillas (sin operadores del
+        usuario) y todas obligatorias. Las palabras de menos de 3 letras no se
+        pueden buscar por trigramas y se descartan.
+
+        Returns:
+            La expresión para MATCH, o None si no quedó ninguna palabra.
+        """
+        terminos = [t for t in cls.normalizar(texto).split() if len(t) >= cls.LARGO_MINIMO]
+        if not terminos:
+            return None
+        frase = ' '.join('"' + termino.replace('"', '""') + '"' for termino in terminos)
+        if columnas:
+            return '{' + ' '.join(columnas) + '} : (' + frase + ')'
+        return frase
+
+    @classmethod
+    def usa_fts(cls):
+        """
+        True si la base es SQLite y tiene la tabla FTS5 (la migración no la crea
+        si SQLite no trae FTS5 con trigram).
+        """
+        if connection.vendor != 'sqlite':
+            return False
+        clave = (connection.alias, connection.settings_dict['NAME'])
+        if clave not in cls._bases_con_fts:
+            cls._bases_con_fts[clave] = cls.TABLA in connection.introspection.table_names()
+        return cls._bases_con_fts[clave]
+
+    @classmethod
+    def buscar(cls, queryset, texto, columnas=None, ordenar=True):
+        """
+        Filtra un queryset de Suscriptor por el texto buscado.
+
+        Args:
+            queryset: Queryset de Suscriptor.
+            texto: Texto ingresado por el usuario.
+            columnas: Subconjunto de COLUMNAS donde buscar (por defecto, todas).
+            ordenar: Si es True, ordena por relevancia (lo más parecido primero).
+
+        Returns:
+            El queryset filtrado (y ordenado).
+        """
+        texto = (texto or '').strip()
+        if not texto:
+            return queryset
+        columnas = columnas or cls.COLUMNAS
+
+        if cls.usa_fts():
+            expresion = cls.expresion(texto, columnas if columnas != cls.COLUMNAS else None)
+            if expresion:
+                queryset = queryset.filter(busqueda__documento__match=expresion)
+                return queryset.order_by('busqueda__rank') if ordenar else queryset
+
+        queryset = queryset.filter(cls._filtro_icontains(texto, columnas))
+        if ordenar and connection.vendor == 'postgresql':
+            queryset = cls._ordenar_por_similitud(queryset, texto, columnas)
+        return queryset
+
+    @classmethod
+    def _filtro_icontains(cls, texto, columnas):
+        filtro = Q()
+        for columna in columnas:
+            if columna == 'bloques':
+                filtro |= Q(Exists(Bloque.objects.filter(suscriptor=OuterRef('pk'), numero_bloque__icontains=texto)))
+            else:
+                filtro |= Q(**{f'{columna}__icontains': texto})
+        return filtro
+
+    @classmethod
+    def _ordenar_por_similitud(cls, queryset, texto, columnas):
+        from django.contrib.postgres.search import TrigramWordSimilarity
+        from django.db.models.functions import Greatest
+
+        similitudes = [TrigramWordSimilarity(texto, columna) for columna in columnas if columna in cls.CAMPOS]
+        if not similitudes:
+            return queryset
+        similitud = Greatest(*similitudes) if len(similitudes) > 1 else similitudes[0]
+        return queryset.annotate(similitud=similitud).order_by('-similitud', 'pk')
+
+    # Mantenimiento del índice FTS5 (en Postgres lo mantiene la base)
+
+    @classmethod
+    def actualizar(cls, ids):
+        """
+        Vuelve a indexar los suscriptores indicados. Los que ya no existen
+        quedan fuera del índice.
+        """
+        ids = list({pk for pk in ids if pk is not None})
+        if not ids or not cls.usa_fts():
+            return
+        with connection.cursor() as cursor:
+            marcadores = ', '.join(['%s'] * len(ids))
+            cursor.execute(f'DELETE FROM "{cls.TABLA}" WHERE rowid IN ({marcadores})', ids)
+            cls._insertar(cursor, Suscriptor.objects.filter(pk__in=ids))
+
+    @classmethod
+    def actualizar_bloque(cls, bloque):
+        """
+        Vuelve a indexar el suscriptor del bloque y los que lo tenían indexado
+        (si el bloque cambió de suscriptor o se borró).
+        """
+        if not cls.usa_fts():
+            return
+        ids = [bloque.suscriptor_id]
+        expresion = cls.expresion(bloque.numero_bloque)
+        if expresion:
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT rowid FROM "{cls.TABLA}" WHERE bloques MATCH %s', [expresion])
+                ids += [fila[0] for fila in cursor.fetchall()]
+        cls.actualizar(ids)
+
+    @classmethod
+    def reconstruir(cls):
+        """
+        Vuelve a armar el índice completo. Se usa después de cambios en lote.
+
+        Returns:
+            Cantidad de suscriptores indexados (0 si la base no usa FTS5).
+        """
+        if not cls.usa_fts():
+            return 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM "{cls.TABLA}"')
+            return cls._insertar(cursor, Suscriptor.objects.all())
+
+    @classmethod
+    def _insertar(cls, cursor, suscriptores):
+        bloques = defaultdict(list)
+        for suscriptor_id, numero_bloque, clave_canonica in Bloque.objects.filter(
+            suscriptor__in=suscriptores.values('pk')
+        ).values_list('suscriptor_id', 'numero_bloque', 'clave_canonica'):
+            bloques[suscriptor_id] += [numero_bloque, clave_canonica]
+
+        columnas = ', '.join(cls.COLUMNAS)
+        marcadores = ', '.join(['%s'] * (len(cls.COLUMNAS) + 1))
+        sql = f'INSERT INTO "{cls.TABLA}"(rowid, {columnas}) VALUES ({marcadores})'
+
+        total = 0
+        lote = []
+        for pk, *campos in suscriptores.values_list('pk', *cls.CAMPOS).iterator(chunk_size=cls.TAMANO_LOTE):
+            lote.append([pk, *map(cls.normalizar, campos), cls.normalizar(' '.join(bloques.get(pk, [])))])
+            if len(lote) == cls.TAMANO_LOTE:
+                cursor.executemany(sql, lote)
+                total += len(lote)
+                lote = []
+        if lote:
+            cursor.executemany(sql, lote)
+            total += len(lote)
+        return total
@@ -0,0 +1,25 @@
+class ClaveBloque:
+
+    @staticmethod
+    def canonica(numero_bloque):
+        """
+        Normaliza un número de bloque a la clave común entre Bloque y MapaBloque.
+        Quita el asterisco de las secciones sin impresora ("*32-01" -> "32-01"),
+        los espacios y completa con ceros ("5 - 1" -> "05-01").
+
+        Args:
+            numero_bloque: Número de bloque tal como viene del Excel o del modelo.
+
+        Returns:
+            str: Clave canónica, o cadena vacía si no hay número.
+        """
+        if not numero_bloque:
+            return ""
+
+        clave = str(numero_bloque).strip().lstrip('*').replace(' ', '')
+
+        partes = clave.split('-')
+        if len(partes) == 2 and partes[0].isdigit() and partes[1].isdigit():
+            return f"{int(partes[0]):02d}-{int(partes[1]):02d}"
+
+        return clave
@@ -0,0 +1,197 @@
+import random
+from django.db import transaction
+from m3d_app.models.suscriptor.suscriptor import Suscriptor
+from m3d_app.models.suscriptor.particular_con_impresora import ParticularConImpresora
+from m3d_app.models.suscriptor.particular_sin_impresora import ParticularSinImpresora
+from m3d_app.models.suscriptor.institucion_con_impresora import InstitucionConImpresora
+from m3d_app.models.suscriptor.institucion_sin_impresora import InstitucionSinImpresora
+from m3d_app.models.impresora.impresora import Impresora
+from m3d_app.models.nodos.nodo_recepcion import NodoRecepcion
+from m3d_app.models.bloque3d.bloque import Bloque
+from m3d_app.models.choices.provincia import Provincia
+from m3d_app.utils.agregados_suscriptor import AgregadosSuscriptor
+from m3d_app.utils.busqueda_suscriptores import BusquedaSuscriptores
+from mapa_malvinas.models.mapa_bloque.mapa_bloque import MapaBloque
+
+
+class DatosSinteticos:
+    """
+    Genera un conjunto de datos ficticio con el tamaño de producción, para
+    benchmarks y tests de regresión. Con la misma semilla genera siempre lo mismo.
+    """
+
+    # Tamaño de producción: el poster completo y los participantes del Excel
+    SECCIONES = 60
+    BLOQUES_POR_SECCION = 25
+    SUSCRIPTORES = 1000
+    BLOQUES = 900
+    PROPORCION_INSTITUCIONES = 0.1
+    PROPORCION_CON_IMPRESORA = 0.6
+    PROPORCION_CON_NODO = 0.3
+    TAMANO_LOTE = 500
+
+    ESTADOS = ['asignado', 'validacion', 'entregado_nodo', 'recibido_m3d', 'diploma_entregado']
+
+    @classmethod
+    @transaction.atomic
+    def generar(cls, suscriptores=None, bloques=None, semilla=1982):
+        """
+        Crea MapaBloque (60 x 25), suscriptores con sus datos de particular o
+        institución, impresoras, nodos de recepción y bloques asignados.
+        Escribe con bulk_create, así que no dispara señales; al final recalcula los
+        agregados de los suscriptores y rearma el índice de búsqueda.
+
+        Args:
+            suscriptores: Cantidad de suscriptores (por defecto SUSCRIPTORES).
+            bloques: Cantidad de bloques asignados (por defecto BLOQUES).
+            semilla: Semilla del generador aleatorio.
+
+        Returns:
+            Dict con la cantidad de registros creados por modelo.
+        """
+        suscriptores = cls.SUSCRIPTORES if suscriptores is None else suscriptores
+        bloques = cls.BLOQUES if bloques is None else bloques
+        azar = random.Random(semilla)
+        provincias = [valor for valor, _ in Provincia.get_all_provincias()]
+        nodos_provincias = [valor for valor, _ in Provincia.get_some_provincias()]
+
+        # Mapa completo del poster
+        MapaBloque.objects.bulk_create([
+            MapaBloque(
+                codigo=f"M3D {seccion:02d}-{numero:02d}",
+                seccion=f"{seccion:02d}",
+                numero=f"{numero:02d}",
+                numero_bloque=f"{seccion:02d}-{numero:02d}",
+                clave_canonica=f"{seccion:02d}-{numero:02d}",
+                descripcion=f"Historia del bloque {seccion:02d}-{numero:02d}",
+            )
+            for seccion in range(1, cls.SECCIONES + 1)
+            for numero in range(1, cls.BLOQUES_POR_SECCION + 1)
+        ], batch_size=cls.TAMANO_LOTE)
+
+        # Suscriptores
+        nuevos_suscriptores = []
+        for indice in range(suscriptores):
+            es_institucion = azar.random() < cls.PROPORCION_INSTITUCIONES
+            nuevos_suscriptores.append(Suscriptor(
+                nombre=f"Nombre{indice}",
+                apellido=None if es_institucion else f"Apellido{indice}",
+                nombre_institucion=f"Escuela N° {indice}" if es_institucion else None,
+                email=f"sintetico{indice}@malvinas3d.test",
+                telefono=f"11{indice:08d}",
+                calle=f"Calle {indice % 97}",
+                numero=str(100 + indice % 900),
+                codigo_postal=str(1000 + indice % 8000),
+                ciudad=f"Ciudad {indice % 150}",
+                provincia=azar.choice(provincias),
+                dni=None if es_institucion else str(20000000 + indice),
+                tipo='institucion' if es_institucion else 'particular',
+            ))
+        nuevos_suscriptores = Suscriptor.objects.bulk_create(nuevos_suscriptores, batch_size=cls.TAMANO_LOTE)
+
+        # Impresoras y datos según el tipo de suscriptor
+        con_impresora = [s for s in nuevos_suscriptores if azar.random() < cls.PROPORCION_CON_IMPRESORA]
+        ids_con_impresora = {s.pk for s in con_impresora}
+        impresoras = [
+            Impresora(
+                anios_experiencia=azar.randint(0, 10),
+                marcas_modelos_equipos=azar.choice(['Ender 3', 'Prusa MK3', 'Bambu Lab P1S', 'Creality K1']),
+                materiales_uso='PLA',
+                cantidad_equipos=azar.randint(1, 5),
+                dimension_maxima_impresion='220x220x250',
+                software_uso='Cura',
+            )
+            for _ in con_impresora
+        ]
+        for impresora in impresoras:
+            impresora.completar_huella()
+        impresoras = Impresora.objects.bulk_create(impresoras, batch_size=cls.TAMANO_LOTE)
+        impresora_de = {s.pk: impresora for s, impresora in zip(con_impresora, impresoras)}
+
+        particulares_con, particulares_sin, instituciones_con, instituciones_sin = [], [], [], []
+        for suscriptor in nuevos_suscriptores:
+            impresora = impresora_de.get(suscriptor.pk)
+            if suscriptor.tipo == 'institucion':
+                if impresora:
+                    instituciones_con.append(InstitucionConImpresora(
+                        suscriptor=suscriptor, impresora=impresora,
+                        nombre_responsable=f"Responsable {suscriptor.pk}", dni_responsable=str(30000000 + suscriptor.pk)
+                    ))
+                else:
+                    instituciones_sin.append(InstitucionSinImpresora(
+                        suscriptor=suscriptor,
+                        nombre_responsable=f"Responsable {suscriptor.pk}", dni_responsable=str(30000000 + suscriptor.pk)
+                    ))
+            elif impresora:
+                particulares_con.append(ParticularConImpresora(suscriptor=suscriptor, impresora=impresora))
+            else:
+                particulares_sin.append(ParticularSinImpresora(suscriptor=suscriptor))
+
+        ParticularConImpresora.objects.bulk_create(particulares_con, batch_size=cls.TAMANO_LOTE)
+        ParticularSinImpresora.objects.bulk_create(particulares_sin, batch_size=cls.TAMANO_LOTE)
+        InstitucionConImpresora.objects.bulk_create(instituciones_con, batch_size=cls.TAMANO_LOTE)
+        InstitucionSinImpresora.objects.bulk_create(instituciones_sin, batch_size=cls.TAMANO_LOTE)
+
+        # Nodos de recepción de una parte de los que tienen impresora
+        nodos = NodoRecepcion.objects.bulk_create([
+            NodoRecepcion(
+                suscriptor=suscriptor,
+                numero_orden=orden,
+                numero_bloque='',
+                responsable_impresion=f"{suscriptor.nombre} {suscriptor.apellido or ''}".strip(),
+                calle=suscriptor.calle,
+                numero=suscriptor.numero,
+                codigo_postal=suscriptor.codigo_postal,
+                localidad=suscriptor.ciudad,
+                provincia=suscriptor.provincia,
+                telefono=suscriptor.telefono,
+                email=suscriptor.email,
+                nodo_seleccionado=azar.choice(nodos_provincias),
+            )
+            for orden, suscriptor in enumerate(
+                (s for s in nuevos_suscriptores if s.pk in ids_con_impresora and azar.random() < cls.PROPORCION_CON_NODO),
+                start=1
+            )
+        ], batch_size=cls.TAMANO_LOTE)
+        nodo_de = {nodo.suscriptor_id: nodo for nodo in nodos}
+
+        # Bloques: las instituciones reciben 3 y los particulares 1, hasta completar
+        claves = [
+            f"{seccion:02d}-{numero:02d}"
+            for seccion in range(1, cls.SECCIONES + 1)
+            for numero in range(1, cls.BLOQUES_POR_SECCION + 1)
+        ][:bloques]
+        nuevos_bloques = []
+        suscriptores_ciclo = iter(nuevos_suscriptores)
+        suscriptor = None
+        restantes = 0
+        for clave in claves:
+            if restantes == 0:
+                suscriptor = next(suscriptores_ciclo, None)
+                restantes = 3 if suscriptor and suscriptor.tipo == 'institucion' else 1
+
+            bloque = Bloque(
+                numero_bloque=clave,
+                nro_sorteo=clave.replace('-', '') if suscriptor else None,
+                suscriptor=suscriptor,
+                nodo_recepcion=nodo_de.get(suscriptor.pk) if suscriptor else None,
+                estado=azar.choice(cls.ESTADOS) if suscriptor else 'libre',
+            )
+            bloque.completar_campos_derivados()
+            nuevos_bloques.append(bloque)
+            restantes -= 1
+        Bloque.objects.bulk_create(nuevos_bloques, batch_size=cls.TAMANO_LOTE)
+        AgregadosSuscriptor.recalcular()
+        BusquedaSuscriptores.reconstruir()
+
+        return {
+            'mapa_bloques': cls.SECCIONES * cls.BLOQUES_POR_SECCION,
+            'suscriptores': len(nuevos_suscriptores),
+            'impresoras': len(impresoras),
+            'particulares_con_impresora': len(particulares_con),
+            'particulares_sin_impresora': len(particulares_sin),
+            'instituciones_con_impresora': len(instituciones_con),
+            'instituciones_sin_impresora': len(instituciones_sin),
+            'nodos_recepcion': len(nodos),
+            'bloques': len(nuevos_bloques),
+        }
@@ -0,0 +1,102 @@
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from m3d_app.models.choices.estado import Estado
+from m3d_app.models.bloque3d.bloque import Bloque
+
+
+class EstadisticasBloques:
+    """
+    Embudo de estados de los bloques, en total y separado por sección, por
+    provincia del suscriptor y por nodo de recepción elegido. Sale de una sola
+    consulta (GROUP BY con un COUNT condicional por estado) y se guarda unos
+    segundos en el cache, así los tableros no repiten la agregación.
+    """
+
+    CACHE_KEY = 'm3d_app:estadisticas_bloques'
+    CACHE_TIMEOUT = 60
+    # Campo de cada fila agrupada -> nombre del desglose en la respuesta
+    DESGLOSES = {
+        'seccion': 'por_seccion',
+        'provincia': 'por_provincia',
+        'nodo_seleccionado': 'por_nodo',
+    }
+
+    @staticmethod
+    def _vacio():
+        return {'total': 0, 'con_sorteo': 0, 'estados': dict.fromkeys(Estado.get_jerarquia(), 0)}
+
+    @classmethod
+    def filas(cls):
+        """
+        Cantidad de bloques por estado para cada combinación de sección,
+        provincia y nodo, en una consulta.
+        """
+        conteos = {
+            estado: Count('pk', filter=Q(estado=estado)) for estado in Estado.get_jerarquia()
+        }
+        return Bloque.objects.order_by().values(
+            'seccion',
+            provincia=F('suscriptor__provincia'),
+            nodo_seleccionado=F('nodo_recepcion__nodo_seleccionado'),
+        ).annotate(
+            total=Count('pk'),
+            con_sorteo=Count('pk', filter=Q(nro_sorteo__isnull=False)),
+            **conteos,
+        )
+
+    @staticmethod
+    def embudo(estados):
+        """
+        Bloques que llegaron al menos a cada estado (el estado o uno posterior).
+        """
+        acumulado = 0
+        embudo = {}
+        for estado in reversed(list(estados)):
+            acumulado += estados[estado]
+            embudo[estado] = acumulado
+        return dict(reversed(embudo.items()))
+
+    @classmethod
+    def calcular(cls):
+        """
+        Arma las estadísticas a partir de filas().
+
+        Returns:
+            Dict con 'total' y un desglose por cada clave de DESGLOSES (lista
+            ordenada por el valor agrupado). Cada entrada trae total,
+            con_sorteo, estados (cantidad en cada estado) y embudo.
+        """
+        total = cls._vacio()
+        desgloses = {campo: {} for campo in cls.DESGLOSES}
+
+        for fila in cls.filas():
+            destinos = [total] + [
+                desgloses[campo].setdefault(fila[campo], cls._vacio()) for campo in cls.DESGLOSES
+            ]
+            for destino in destinos:
+                destino['total'] += fila['total']
+                destino['con_sorteo'] += fila['con_sorteo']
+                for estado in destino['estados']:
+                    destino['estados'][estado] += fila[estado]
+
+        def con_embudo(datos):
+            return {**datos, 'embudo': cls.embudo(datos['estados'])}
+
+        estadisticas = {'total': con_embudo(total)}
+        for campo, nombre in cls.DESGLOSES.items():
+            # Los bloques sin suscriptor o sin nodo quedan en el grupo None, al final
+            valores = sorted(desgloses[campo], key=lambda valor: (valor is None, valor or ''))
+            estadisticas[nombre] = [{campo: valor, **con_embudo(desgloses[campo][valor])} for valor in valores]
+        return estadisticas
+
+    @classmethod
+    def obtener(cls):
+        """
+        Devuelve las estadísticas del cache, calculándolas si vencieron.
+        """
+        estadisticas = cache.get(cls.CACHE_KEY)
+        if estadisticas is None:
+            estadisticas = {**cls.calcular(), 'generado': timezone.now().isoformat()}
+            cache.set(cls.CACHE_KEY, estadisticas, cls.CACHE_TIMEOUT)
+        return estadisticas
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+
+class EstadoExcel:
+
+    @staticmethod
+    def derivar(df, col_validacion=None, col_entregado=None, col_recibido=None, col_diploma=None, base='asignado'):
+        """
+        Calcula el estado de cada fila del Excel de participantes de una sola vez,
+        sin recorrer las filas. Gana el estado más alto marcado con 1, en el orden
+        Diploma OK > RECIBIMOS > anoto nodo > VALIDA FOTO. Las celdas vacías o con
+        cualquier otro valor no cuentan.
+
+        Args:
+            df: DataFrame del Excel.
+            col_validacion: Columna "VALIDA FOTO" (o None si no está).
+            col_entregado: Columna "anoto nodo" (o None si no está).
+            col_recibido: Columna "RECIBIMOS" (o None si no está).
+            col_diploma: Columna "Diploma OK" (o None si no está).
+            base: Estado de las filas sin ninguna marca. Puede ser un valor único
+                o una Series alineada con df (ej: 'libre'/'asignado' según el email).
+
+        Returns:
+            Series con el estado de cada fila, con el mismo índice que df.
+        """
+        columnas = [
+            (col_diploma, 'diploma_entregado'),
+            (col_recibido, 'recibido_m3d'),
+            (col_entregado, 'entregado_nodo'),
+            (col_validacion, 'validacion'),
+        ]
+
+        condiciones = []
+        estados = []
+        for columna, estado in columnas:
+            if columna is None or columna not in df.columns:
+                continue
+            condiciones.append(df[columna].eq(1).to_numpy(dtype=bool))
+            estados.append(estado)
+
+        if isinstance(base, pd.Series):
+            base = base.to_numpy(dtype=object)
+
+        if not condiciones:
+            return pd.Series(np.broadcast_to(base, len(df)), index=df.index, dtype=object)
+
+        return pd.Series(np.select(condiciones, estados, default=base), index=df.index, dtype=object)
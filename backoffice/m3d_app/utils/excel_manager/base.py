@@ -1,3 +1,4 @@
+import importlib.util
 import pandas as pd
 from django.db import transaction
 
@@ -29,36 +30,49 @@ class ExcelManagerBase:
         else:
             print(f"[{level.upper()}] {message}")
             
-    def read_excel(self, file_path, sheet_name=0):
+    @staticmethod
+    def motores_excel():
+        """
+        Motores de lectura en orden de preferencia: calamine (python-calamine,
+        bastante más rápido) si está instalado y openpyxl como respaldo.
+        """
+        if importlib.util.find_spec('python_calamine') is not None:
+            return ['calamine', 'openpyxl']
+        return ['openpyxl']
+            
+    def read_excel(self, file_path, sheet_name=0, columnas=None):
         """
         Lee un archivo Excel y devuelve un DataFrame de pandas.
         
         Args:
             file_path: Ruta al archivo Excel.
             sheet_name: Nombre o índice de la hoja a leer (por defecto: 0 - primera hoja).
+            columnas: Columnas a leer, como dict encabezado -> dtype (None deja
+                que pandas infiera el tipo), o una función que recibe los
+                encabezados del archivo y devuelve ese dict. Por defecto se
+                leen todas las columnas.
             
         Returns:
             DataFrame de pandas con los datos del Excel.
         """
-        try:
-            return pd.read_excel(file_path, sheet_name=sheet_name)
-        except Exception as e:
-            self.log(f"Error al leer el archivo Excel {file_path}: {str(e)}", 'error')
-            raise
-            
-    def find_column(self, df, search_terms):
-        """
-        Busca una columna en el DataFrame por términos de búsqueda.
-        
-        Args:
-            df: DataFrame de pandas.
-            search_terms: Lista de términos para buscar en los nombres de columna.
-            
-        Returns:
-            Nombre de la columna encontrada o None si no se encuentra.
-        """
-        for col in df.columns:
-            col_str = str(col).lower()
-            if any(term.lower() in col_str for term in search_terms):
-                return col
-        return None
\ No newline at end of file
+        motores = self.motores_excel()
+        for motor in motores:
+            try:
+                return self._leer_excel(file_path, sheet_name, columnas, motor)
+            except Exception as e:
+                if motor != motores[-1]:
+                    self.log(f"No se pudo leer {file_path} con {motor} ({str(e)}), se reintenta con {motores[-1]}", 'warning')
+                    continue
+                self.log(f"Error al leer el archivo Excel {file_path}: {str(e)}", 'error')
+                raise
+    
+    @staticmethod
+    def _leer_excel(file_path, sheet_name, columnas, motor):
+        # El libro se abre una sola vez, aunque haya que leer primero los encabezados
+        with pd.ExcelFile(file_path, engine=motor) as excel:
+            if columnas is None:
+                return excel.parse(sheet_name)
+            if callable(columnas):
+                columnas = columnas(excel.parse(sheet_name, nrows=0).columns)
+            tipos = {columna: tipo for columna, tipo in columnas.items() if tipo is not None}
+            return excel.parse(sheet_name, usecols=lambda columna: columna in columnas, dtype=tipos or None)
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import re
+import unicodedata
+from django.core.cache import cache
+
+
+class ResolvedorColumnas:
+    """
+    Encuentra las columnas de un Excel a partir de nombres lógicos y los
+    términos con que se suelen escribir sus encabezados. Los encabezados se
+    normalizan una vez (sin acentos, en minúsculas y con los signos como
+    espacios) y cada término tiene que coincidir con el principio de una
+    palabra: 'ok' encuentra 'Diploma OK' pero no 'Facebook'.
+
+    El resultado se guarda en el cache de Django por huella de los encabezados
+    (y de los términos), así reimportar un archivo con la misma plantilla, en
+    otra corrida de import_excel, no vuelve a resolver nada.
+    """
+
+    CACHE_PREFIJO = 'm3d_app:columnas'
+    CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+    def __init__(self, columnas):
+        """
+        Args:
+            columnas: Dict nombre lógico -> lista de términos, del más al menos
+                específico. Se resuelven en ese orden y cada columna del Excel
+                se asigna a un solo nombre lógico.
+        """
+        self.columnas = {
+            nombre: [self.normalizar(termino) for termino in terminos]
+            for nombre, terminos in columnas.items()
+        }
+        # Parte de la clave del cache: si cambian los términos, se vuelve a resolver
+        self.huella_terminos = self.huella(self.columnas.items())
+
+    @staticmethod
+    def normalizar(texto):
+        texto = unicodedata.normalize('NFKD', str(texto))
+        texto = ''.join(caracter for caracter in texto if not unicodedata.combining(caracter))
+        return re.sub(r'[^a-z0-9]+', ' ', texto.lower()).strip()
+
+    @staticmethod
+    def huella(encabezados):
+        # repr distingue, por ejemplo, el encabezado 1 del '1'
+        return hashlib.sha1(json.dumps([repr(encabezado) for encabezado in encabezados]).encode()).hexdigest()
+
+    def resolver(self, encabezados):
+        """
+        Resuelve todos los nombres lógicos para los encabezados de un archivo.
+
+        Args:
+            encabezados: Columnas del DataFrame, en orden.
+
+        Returns:
+            Dict nombre lógico -> columna del DataFrame (None si no está).
+        """
+        encabezados = list(encabezados)
+        clave = f'{self.CACHE_PREFIJO}:{self.huella_terminos}:{self.huella(encabezados)}'
+        resueltas = cache.get(clave)
+        if resueltas is None:
+            resueltas = self._resolver(encabezados)
+            cache.set(clave, resueltas, self.CACHE_TIMEOUT)
+        return resueltas
+
+    def _resolver(self, encabezados):
+        # Índice de encabezados normalizados; si dos normalizan igual, gana el primero
+        indice = {}
+        for encabezado in encabezados:
+            indice.setdefault(self.normalizar(encabezado), encabezado)
+
+        usadas = set()
+        resueltas = {}
+        for nombre, terminos in self.columnas.items():
+            resueltas[nombre] = None
+            for termino in terminos:
+                # Primero el encabezado exacto, después el término al principio de una palabra
+                candidatos = [indice[termino]] if termino in indice else []
+                candidatos += [
+                    encabezado for normalizado, encabezado in indice.items()
+                    if f' {termino}' in f' {normalizado}'
+                ]
+                columna = next((candidato for candidato in candidatos if candidato not in usadas), None)
+                if columna is not None:
+                    resueltas[nombre] = columna
+                    usadas.add(columna)
+                    break
+        return resueltas
@@ -40,4 +40,7 @@ class ExcelManager(ExcelManagerBase):
     
     # Métodos para importación de bloques
     def import_bloques_participantes(self, file_path, sheet_name=0):
-        return self.bloques_manager.import_bloques_participantes(file_path, sheet_name)
\ No newline at end of file
+        return self.bloques_manager.import_bloques_participantes(file_path, sheet_name)
+    
+    def import_bloques_participantes_en_lote(self, file_path, sheet_name=0):
+        return self.bloques_manager.import_bloques_participantes_en_lote(file_path, sheet_name)
\ No newline at end of file
@@ -0,0 +1,119 @@
+import pandas as pd
+from m3d_app.utils.excel_parser import ExcelParser
+
+
+class EspecificacionImportacion:
+    """
+    Describe un formulario de suscriptores: qué columnas del Excel van a qué
+    campo de cada destino (suscriptor, impresora, subtipo) y en qué modelo de
+    subtipo se guarda. Los importadores de ExcelManagerForSubs son solo
+    especificaciones; agregar un formulario nuevo es agregar una.
+    """
+
+    # Conversión de cada campo, por destino; los demás se guardan como vienen
+    CONVERSORES = {
+        'suscriptor': {
+            'telefono': ExcelParser.clean_phone_number,
+            'fecha_nacimiento': ExcelParser.parse_date,
+        },
+        'impresora': {
+            'anios_experiencia': ExcelParser.parse_years_experience,
+            'cantidad_equipos': ExcelParser.parse_equipment_count,
+        },
+        'subtipo': {},
+    }
+
+    def __init__(self, tipo, modelo_subtipo, descripcion, columnas_suscriptor,
+                 columnas_impresora=None, columnas_subtipo=None):
+        """
+        Args:
+            tipo: Tipo de suscriptor ('particular' o 'institucion').
+            modelo_subtipo: Modelo que relaciona al suscriptor con su tipo.
+            descripcion: Texto del log de cada fila guardada.
+            columnas_suscriptor: Mapeo columna del Excel -> campo de Suscriptor.
+            columnas_impresora: Mapeo para Impresora, si el tipo tiene impresora.
+            columnas_subtipo: Mapeo para los campos propios del subtipo.
+        """
+        self.tipo = tipo
+        self.modelo_subtipo = modelo_subtipo
+        self.descripcion = descripcion
+        self.columnas = {
+            'suscriptor': columnas_suscriptor,
+            'impresora': columnas_impresora,
+            'subtipo': columnas_subtipo or {},
+        }
+
+    def columnas_excel(self):
+        """
+        Columnas del Excel que usa el formulario, para read_excel. Se leen como
+        texto: los campos de destino son de texto y los números pasan por su
+        conversor (así un DNI o un código postal no se leen como float).
+        """
+        return {
+            col_excel: str
+            for columnas in self.columnas.values() if columnas
+            for col_excel in columnas
+        }
+
+    def compilar(self, columnas_excel):
+        """
+        Arma el plan de lectura para las columnas de un archivo: una vez por
+        archivo, no por celda.
+
+        Args:
+            columnas_excel: Columnas del DataFrame, en orden.
+
+        Returns:
+            PlanImportacion
+        """
+        posiciones = {}
+        for posicion, columna in enumerate(columnas_excel):
+            posiciones.setdefault(columna, posicion)
+
+        destinos = {}
+        for destino, columnas in self.columnas.items():
+            if columnas is None:
+                continue
+            conversores = self.CONVERSORES[destino]
+            destinos[destino] = [
+                (posiciones[col_excel], campo_modelo, conversores.get(campo_modelo))
+                for col_excel, campo_modelo in columnas.items()
+                if col_excel in posiciones
+            ]
+        return PlanImportacion(destinos)
+
+
+class PlanImportacion:
+    """
+    Lectura ya resuelta de un archivo: para cada destino, la posición de cada
+    columna en la fila, el campo y su conversor.
+    """
+
+    def __init__(self, destinos):
+        self.destinos = destinos
+
+    def filas(self, df):
+        """
+        Recorre el DataFrame sin armar una Series por fila (itertuples).
+
+        Yields:
+            Tuple: (indice, valores) con el índice de la fila en el DataFrame y
+            la tupla de sus valores, para pasar a convertir().
+        """
+        yield from zip(df.index, df.itertuples(index=False, name=None))
+
+    def convertir(self, valores):
+        """
+        Datos de cada destino para una fila, sin las celdas vacías.
+
+        Returns:
+            Dict: {destino: {campo: valor}}
+        """
+        datos = {}
+        for destino, campos in self.destinos.items():
+            datos[destino] = {
+                campo: conversor(valores[posicion]) if conversor else valores[posicion]
+                for posicion, campo, conversor in campos
+                if pd.notna(valores[posicion])
+            }
+        return datos
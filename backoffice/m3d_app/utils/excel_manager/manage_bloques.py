@@ -2,15 +2,71 @@ from django.db import transaction
 import pandas as pd
 from django.utils import timezone
 from .base import ExcelManagerBase
+from .columnas import ResolvedorColumnas
+from m3d_app.utils.estado_excel import EstadoExcel
+from m3d_app.utils.estadisticas_bloques import EstadisticasBloques
+from m3d_app.models.choices.estado import Estado
 from m3d_app.models.suscriptor.suscriptor import Suscriptor
 from m3d_app.models.nodos.nodo_recepcion import NodoRecepcion
 from m3d_app.models.bloque3d.bloque import Bloque
+from m3d_app.models.bloque3d.version_mapa import VersionMapa
+from m3d_app.signals import bloques_actualizados_en_lote
 
 class ExcelManagerForBloques(ExcelManagerBase):
     """
     Gestor de Excel especializado en la importación de bloques.
     """
     
+    # Jerarquía de estados, del más bajo al más alto
+    JERARQUIA_ESTADOS = Estado.get_jerarquia()
+    
+    # Fecha que se completa al alcanzar cada nivel de la jerarquía
+    FECHAS_POR_ESTADO = {
+        'fecha_asignacion': 1,
+        'fecha_validacion': 2,
+        'fecha_entrega_nodo': 3,
+        'fecha_recepcion_m3d': 4,
+        'fecha_entrega_diploma': 5
+    }
+    
+    # Campos que escribe la importación en lote
+    CAMPOS_IMPORTADOS = [
+        'suscriptor', 'nodo_recepcion', 'estado', 'nro_sorteo',
+        'fecha_asignacion', 'fecha_validacion', 'fecha_entrega_nodo',
+        'fecha_recepcion_m3d', 'fecha_entrega_diploma',
+        'seccion', 'numero', 'clave_canonica', 'version_mapa', 'fecha_modificacion'
+    ]
+    
+    # Filas por consulta en las operaciones en lote
+    TAMANO_LOTE = 500
+    
+    # Columnas del Excel de participantes (también las usa contar_valores_fotos_validadas)
+    COLUMNAS_PARTICIPANTES = ResolvedorColumnas({
+        'bloque': ['bloque'],
+        'email': ['mail', 'email', 'correo'],
+        'nro_sorteo': ['n sorteo', 'numero sorteo', 'sorteo'],
+        'validacion': ['valida foto', 'validacion', 'foto'],
+        'entregado': ['anoto nodo', 'entregado', 'nodo'],
+        'recibido': ['recibimos', 'recibido'],
+        'diploma': ['diploma ok', 'diploma', 'ok'],
+    })
+    
+    # Tipo con que se lee cada columna; los estados se comparan con 1, así que
+    # conservan el tipo que infiere pandas
+    TIPOS_PARTICIPANTES = {'bloque': str, 'email': str, 'nro_sorteo': str}
+    
+    @classmethod
+    def columnas_participantes(cls, encabezados):
+        """
+        Columnas del Excel de participantes que se leen (para read_excel): solo
+        las que encuentra COLUMNAS_PARTICIPANTES, con su tipo.
+        """
+        columnas = cls.COLUMNAS_PARTICIPANTES.resolver(encabezados)
+        return {
+            encabezado: cls.TIPOS_PARTICIPANTES.get(nombre)
+            for nombre, encabezado in columnas.items() if encabezado is not None
+        }
+    
     @transaction.atomic
     def import_bloques_participantes(self, file_path, sheet_name=0):
         """
@@ -25,160 +81,28 @@ class ExcelManagerForBloques(ExcelManagerBase):
             Tuple: (bloques_creados, bloques_actualizados, bloques_con_error)
         """
         # Leer Excel
-        df = self.read_excel(file_path, sheet_name)
+        df = self.read_excel(file_path, sheet_name, self.columnas_participantes)
         
         self.log(f"Archivo leído correctamente. Dimensiones: {df.shape}", 'info')
         
+        analisis = self._analizar_bloques(df, self._tipo_suscriptor_por_consulta)
+        if analisis is None:
+            return 0, 0, 0
+        bloques_info, bloques_con_error = analisis
+        
         # Contadores para seguimiento
         bloques_creados = 0
         bloques_actualizados = 0
-        bloques_con_error = 0
-        estados_count = {'libre': 0, 'asignado': 0, 'validacion': 0, 'entregado_nodo': 0, 'recibido_m3d': 0, 'diploma_entregado': 0}
-        
-        # Identificar columnas relevantes
-        col_bloque = self.find_column(df, ['bloque'])
-        col_email = self.find_column(df, ['mail', 'email', 'correo'])
-        col_nro_sorteo = self.find_column(df, ['n sorteo', 'sorteo', 'numero sorteo'])  # ¡NUEVO!
-        col_validacion = self.find_column(df, ['valida foto', 'validacion', 'foto'])
-        col_entregado = self.find_column(df, ['anoto nodo', 'entregado', 'nodo'])
-        col_recibido = self.find_column(df, ['recibimos', 'recibido'])
-        col_diploma = self.find_column(df, ['diploma', 'ok'])
-        
-        if not col_bloque or not col_email:
-            self.log(f"No se encontraron columnas básicas: bloque={col_bloque}, email={col_email}", 'error')
-            return 0, 0, 0
-        
-        # Verificar columnas de estado
-        estados_encontrados = []
-        if col_validacion:
-            estados_encontrados.append('validacion')
-        if col_entregado:
-            estados_encontrados.append('entregado_nodo')
-        if col_recibido:
-            estados_encontrados.append('recibido_m3d')
-        if col_diploma:
-            estados_encontrados.append('diploma_entregado')
-            
-        if not estados_encontrados:
-            self.log("No se encontró ninguna columna de estado", 'error')
-            return 0, 0, 0
-            
-        self.log(f"Columnas identificadas: bloque={col_bloque}, email={col_email}", 'info')
-        if col_nro_sorteo:
-            self.log(f"Columna nro_sorteo encontrada: {col_nro_sorteo}", 'info')
-        else:
-            self.log("Columna nro_sorteo no encontrada", 'warning')
-        self.log(f"Estados encontrados: {', '.join(estados_encontrados)}", 'info')
-        
-        # Definir la jerarquía de estados
-        jerarquia_estados = {
-            'libre': 0,
-            'asignado': 1,
-            'validacion': 2,
-            'entregado_nodo': 3,
-            'recibido_m3d': 4,
-            'diploma_entregado': 5
-        }
-        
-        # Preparar estructuras de datos
-        bloques_info = {}  # Almacenará {numero_bloque: {email, estado_maximal, nro_sorteo}}
-        ultima_institucion_email = None
-        bloques_institucion = []
-        
-        # Procesar cada fila del Excel
-        for idx, row in df.iterrows():
-            try:
-                # Obtener información básica
-                if pd.isna(row[col_bloque]):
-                    continue
-                    
-                numero_bloque = str(row[col_bloque]).strip()
-                
-                # Obtener número de sorteo ¡NUEVO!
-                nro_sorteo = None
-                if col_nro_sorteo and not pd.isna(row[col_nro_sorteo]):
-                    nro_sorteo = str(row[col_nro_sorteo]).strip()
-                    self.log(f"Fila {idx+1}: Número de sorteo encontrado: '{nro_sorteo}' para bloque {numero_bloque}", 'info')
-                
-                # Obtener email del suscriptor
-                email_suscriptor = None
-                if col_email in row and not pd.isna(row[col_email]):
-                    email_suscriptor = str(row[col_email]).strip()
-                
-                # Si es una fila vacía de una institución (que tiene 3 bloques)
-                if not email_suscriptor or email_suscriptor == "":
-                    # Si ya procesamos una institución, podría ser uno de sus bloques adicionales
-                    if ultima_institucion_email and len(bloques_institucion) < 3:
-                        self.log(f"Fila {idx+1}: Asignando bloque adicional a la institución con email {ultima_institucion_email}", 'info')
-                        email_suscriptor = ultima_institucion_email
-                        bloques_institucion.append(numero_bloque)
-                    else:
-                        # Si no hay email y no pertenece a una institución ya procesada, es un bloque libre
-                        self.log(f"Fila {idx+1}: No hay email, bloque libre", 'info')
-                        bloques_info[numero_bloque] = {
-                            'email': None,
-                            'estado': 'libre',
-                            'nro_sorteo': None  # ¡NUEVO! Los bloques libres no tienen número de sorteo
-                        }
-                        estados_count['libre'] += 1
-                        continue
-                
-                # Verificar si es una institución (para seguimiento de bloques múltiples)
-                try:
-                    suscriptor = Suscriptor.objects.get(email=email_suscriptor)
-                    if suscriptor.tipo == 'institucion':
-                        ultima_institucion_email = email_suscriptor
-                        bloques_institucion = [numero_bloque]
-                        self.log(f"Fila {idx+1}: Institución encontrada: {email_suscriptor}", 'info')
-                    else:
-                        # Si es particular, reiniciar seguimiento de instituciones
-                        ultima_institucion_email = None
-                        bloques_institucion = []
-                except Suscriptor.DoesNotExist:
-                    # Si no existe, asumimos que no es institución
-                    ultima_institucion_email = None
-                    bloques_institucion = []
-                    self.log(f"Fila {idx+1}: Suscriptor no encontrado: {email_suscriptor}", 'warning')
-                
-                # Iniciar con estado mínimo si hay email
-                estado_maximal = 'asignado'
-                
-                # Verificar cada estado posible en orden inverso (del más alto al más bajo)
-                if col_diploma and not pd.isna(row[col_diploma]) and row[col_diploma] == 1:
-                    estado_maximal = 'diploma_entregado'
-                    self.log(f"Fila {idx+1}: Estado diploma_entregado para bloque {numero_bloque}", 'info')
-                elif col_recibido and not pd.isna(row[col_recibido]) and row[col_recibido] == 1:
-                    estado_maximal = 'recibido_m3d'
-                    self.log(f"Fila {idx+1}: Estado recibido_m3d para bloque {numero_bloque}", 'info')
-                elif col_entregado and not pd.isna(row[col_entregado]) and row[col_entregado] == 1:
-                    estado_maximal = 'entregado_nodo'
-                    self.log(f"Fila {idx+1}: Estado entregado_nodo para bloque {numero_bloque}", 'info')
-                elif col_validacion and not pd.isna(row[col_validacion]) and row[col_validacion] == 1:
-                    estado_maximal = 'validacion'
-                    self.log(f"Fila {idx+1}: Estado validacion para bloque {numero_bloque}", 'info')
-                
-                # Guardar la información ¡MODIFICADO para incluir nro_sorteo!
-                bloques_info[numero_bloque] = {
-                    'email': email_suscriptor,
-                    'estado': estado_maximal,
-                    'nro_sorteo': nro_sorteo  # ¡NUEVO!
-                }
-                
-                # Actualizar contadores
-                estados_count[estado_maximal] += 1
-                
-            except Exception as e:
-                bloques_con_error += 1
-                self.log(f"Error procesando fila {idx+1}: {str(e)}", 'error')
-        
-        # Mostrar resumen del análisis
-        self.log("\nResumen de bloques por estado:", 'info')
-        for estado, count in estados_count.items():
-            self.log(f"  - {estado}: {count}", 'info')
         
         # Fecha actual para campos de fecha
         now = timezone.now()
         
+        # Fechas que ya tienen los bloques del Excel, para no volver a marcarlas
+        fechas_existentes = {}
+        for lote in self._en_lotes(list(bloques_info)):
+            for fila in Bloque.objects.filter(numero_bloque__in=lote).values('numero_bloque', *self.FECHAS_POR_ESTADO):
+                fechas_existentes[fila.pop('numero_bloque')] = fila
+        
         # Actualizar la base de datos
         for numero_bloque, info in bloques_info.items():
             try:
@@ -227,17 +151,13 @@ class ExcelManagerForBloques(ExcelManagerBase):
                         'nro_sorteo': info['nro_sorteo']  # ¡NUEVO!
                     }
                     
-                    # Establecer fechas según el estado
-                    if info['estado'] != 'libre':
-                        bloque_data['fecha_asignacion'] = now
-                    if info['estado'] in ['validacion', 'entregado_nodo', 'recibido_m3d', 'diploma_entregado']:
-                        bloque_data['fecha_validacion'] = now
-                    if info['estado'] in ['entregado_nodo', 'recibido_m3d', 'diploma_entregado']:
-                        bloque_data['fecha_entrega_nodo'] = now
-                    if info['estado'] in ['recibido_m3d', 'diploma_entregado']:
-                        bloque_data['fecha_recepcion_m3d'] = now
-                    if info['estado'] == 'diploma_entregado':
-                        bloque_data['fecha_entrega_diploma'] = now
+                    # Establecer fechas según el estado; las que ya tenía el bloque se
+                    # conservan (son el día en que llegó al estado, ver ProgresoDiario)
+                    fechas = fechas_existentes.get(numero_bloque, {})
+                    nivel = self.JERARQUIA_ESTADOS[info['estado']]
+                    for campo_fecha, nivel_minimo in self.FECHAS_POR_ESTADO.items():
+                        if nivel >= nivel_minimo:
+                            bloque_data[campo_fecha] = fechas.get(campo_fecha) or now
                     
                     # Extraer sección y número del numero_bloque al guardar
                     try:
@@ -278,20 +198,294 @@ class ExcelManagerForBloques(ExcelManagerBase):
         # Mostrar resumen final
         self.log(f"\nImportación completada: {bloques_creados} bloques creados, {bloques_actualizados} bloques actualizados, {bloques_con_error} bloques con error", 'info')
         
-        # Mostrar estadísticas finales en la base de datos
-        estados_finales = {}
-        for estado in jerarquia_estados.keys():
-            estados_finales[estado] = Bloque.objects.filter(estado=estado).count()
+        self._log_estado_final()
+        
+        return bloques_creados, bloques_actualizados, bloques_con_error
+    
+    @transaction.atomic
+    def import_bloques_participantes_en_lote(self, file_path, sheet_name=0):
+        """
+        Versión en lote de import_bloques_participantes para el Excel completo.
+        Resuelve suscriptores, nodos y bloques existentes con pocas consultas y
+        escribe con bulk_create/bulk_update en lotes de TAMANO_LOTE, en lugar de
+        hacer varias consultas y un update_or_create por cada fila.
+        Mantiene la jerarquía de estados y la lógica de los 3 bloques por institución.
+        
+        Args:
+            file_path: Ruta al archivo Excel.
+            sheet_name: Nombre o índice de la hoja a leer.
+            
+        Returns:
+            Tuple: (bloques_creados, bloques_actualizados, bloques_con_error)
+        """
+        df = self.read_excel(file_path, sheet_name, self.columnas_participantes)
+        
+        self.log(f"Archivo leído correctamente. Dimensiones: {df.shape}", 'info')
+        
+        # Todos los suscriptores del Excel en una sola consulta (por lotes)
+        col_email = self.COLUMNAS_PARTICIPANTES.resolver(df.columns)['email']
+        emails = set()
+        if col_email:
+            emails = {str(email).strip() for email in df[col_email].dropna()}
+        
+        suscriptores = {}
+        for lote in self._en_lotes(sorted(emails)):
+            for suscriptor in Suscriptor.objects.filter(email__in=lote).only('id', 'email', 'tipo'):
+                suscriptores[suscriptor.email] = suscriptor
+        
+        def tipo_suscriptor(email):
+            suscriptor = suscriptores.get(email)
+            return suscriptor.tipo if suscriptor else None
+        
+        analisis = self._analizar_bloques(df, tipo_suscriptor)
+        if analisis is None:
+            return 0, 0, 0
+        bloques_info, bloques_con_error = analisis
+        
+        # Primer nodo de cada suscriptor (mismo criterio que .first(): menor id)
+        nodos = {}
+        ids_suscriptores = sorted(suscriptor.pk for suscriptor in suscriptores.values())
+        for lote in self._en_lotes(ids_suscriptores):
+            nodos_lote = NodoRecepcion.objects.filter(suscriptor_id__in=lote).order_by('pk')
+            for suscriptor_id, nodo_id in nodos_lote.values_list('suscriptor_id', 'id'):
+                nodos.setdefault(suscriptor_id, nodo_id)
+        
+        # Bloques que ya existen, indexados por número
+        existentes = Bloque.objects.in_bulk(list(bloques_info), field_name='numero_bloque')
+        
+        now = timezone.now()
+        version_mapa = None
+        bloques_nuevos = []
+        bloques_existentes = []
+        
+        for numero_bloque, info in bloques_info.items():
+            bloque = existentes.get(numero_bloque)
+            creado = bloque is None
+            if creado:
+                bloque = Bloque(numero_bloque=numero_bloque)
+            
+            if not info['email']:
+                # Bloque libre: sin suscriptor, sin número de sorteo y sin fechas
+                bloque.suscriptor = None
+                bloque.estado = 'libre'
+                bloque.nro_sorteo = None
+                for campo_fecha in self.FECHAS_POR_ESTADO:
+                    setattr(bloque, campo_fecha, None)
+            else:
+                suscriptor = suscriptores.get(info['email'])
+                if suscriptor is None:
+                    bloques_con_error += 1
+                    self.log(f"No se encontró suscriptor con email {info['email']} para bloque {numero_bloque}", 'error')
+                    continue
+                
+                bloque.suscriptor = suscriptor
+                bloque.nodo_recepcion_id = nodos.get(suscriptor.pk)
+                bloque.estado = info['estado']
+                bloque.nro_sorteo = info['nro_sorteo']
+                
+                # Establecer las fechas de los estados alcanzados; las que ya tenía
+                # el bloque se conservan (son el día en que llegó al estado)
+                nivel = self.JERARQUIA_ESTADOS[info['estado']]
+                for campo_fecha, nivel_minimo in self.FECHAS_POR_ESTADO.items():
+                    if nivel >= nivel_minimo and getattr(bloque, campo_fecha) is None:
+                        setattr(bloque, campo_fecha, now)
+            
+            # bulk_create/bulk_update no pasan por save()
+            bloque.completar_campos_derivados()
+            bloque.fecha_modificacion = now
+            if creado or bloque.estado != bloque._estado_original:
+                if version_mapa is None:
+                    version_mapa = VersionMapa.siguiente()
+                bloque.version_mapa = version_mapa
+            
+            if creado:
+                bloques_nuevos.append(bloque)
+            else:
+                bloques_existentes.append(bloque)
+        
+        # Los nuevos se insertan como upsert por si otro proceso creó el mismo número
+        Bloque.objects.bulk_create(
+            bloques_nuevos,
+            batch_size=self.TAMANO_LOTE,
+            update_conflicts=True,
+            unique_fields=['numero_bloque'],
+            update_fields=self.CAMPOS_IMPORTADOS,
+        )
+        Bloque.objects.bulk_update(bloques_existentes, self.CAMPOS_IMPORTADOS, batch_size=self.TAMANO_LOTE)
+        
+        bloques_creados = len(bloques_nuevos)
+        bloques_actualizados = len(bloques_existentes)
+        if bloques_creados or bloques_actualizados:
+            bloques_actualizados_en_lote.send(sender=Bloque)
+        
+        self.log(f"\nImportación completada: {bloques_creados} bloques creados, {bloques_actualizados} bloques actualizados, {bloques_con_error} bloques con error", 'info')
+        
+        self._log_estado_final()
+        
+        return bloques_creados, bloques_actualizados, bloques_con_error
+    
+    def _analizar_bloques(self, df, tipo_suscriptor):
+        """
+        Recorre el Excel y calcula, para cada bloque, el email del suscriptor, el
+        estado máximo alcanzado y el número de sorteo.
+        
+        Args:
+            df: DataFrame del Excel de participantes.
+            tipo_suscriptor: Función que recibe un email y devuelve el tipo del
+                suscriptor ('particular'/'institucion') o None si no existe.
+            
+        Returns:
+            Tuple: (bloques_info, bloques_con_error), o None si faltan columnas.
+        """
+        bloques_con_error = 0
+        estados_count = {estado: 0 for estado in self.JERARQUIA_ESTADOS}
+        
+        # Identificar columnas relevantes
+        columnas = self.COLUMNAS_PARTICIPANTES.resolver(df.columns)
+        col_bloque = columnas['bloque']
+        col_email = columnas['email']
+        col_nro_sorteo = columnas['nro_sorteo']
+        col_validacion = columnas['validacion']
+        col_entregado = columnas['entregado']
+        col_recibido = columnas['recibido']
+        col_diploma = columnas['diploma']
+        
+        if not col_bloque or not col_email:
+            self.log(f"No se encontraron columnas básicas: bloque={col_bloque}, email={col_email}", 'error')
+            return None
+        
+        # Verificar columnas de estado
+        estados_encontrados = []
+        if col_validacion:
+            estados_encontrados.append('validacion')
+        if col_entregado:
+            estados_encontrados.append('entregado_nodo')
+        if col_recibido:
+            estados_encontrados.append('recibido_m3d')
+        if col_diploma:
+            estados_encontrados.append('diploma_entregado')
+            
+        if not estados_encontrados:
+            self.log("No se encontró ninguna columna de estado", 'error')
+            return None
+            
+        self.log(f"Columnas identificadas: bloque={col_bloque}, email={col_email}", 'info')
+        if col_nro_sorteo:
+            self.log(f"Columna nro_sorteo encontrada: {col_nro_sorteo}", 'info')
+        else:
+            self.log("Columna nro_sorteo no encontrada", 'warning')
+        self.log(f"Estados encontrados: {', '.join(estados_encontrados)}", 'info')
+        
+        # Preparar estructuras de datos
+        bloques_info = {}  # Almacenará {numero_bloque: {email, estado_maximal, nro_sorteo}}
+        ultima_institucion_email = None
+        bloques_institucion = []
+        
+        # Estado máximo de cada fila, calculado para todo el Excel de una vez
+        estados_filas = EstadoExcel.derivar(df, col_validacion, col_entregado, col_recibido, col_diploma)
+        sorteos = df[col_nro_sorteo] if col_nro_sorteo else pd.Series(None, index=df.index, dtype=object)
+        
+        # Procesar cada fila del Excel. Se recorren las columnas ya extraídas en
+        # lugar de df.iterrows(), que arma una Series por fila.
+        filas = zip(df.index, df[col_bloque], sorteos, df[col_email], estados_filas)
+        for idx, valor_bloque, valor_sorteo, valor_email, estado_maximal in filas:
+            try:
+                # Obtener información básica
+                if pd.isna(valor_bloque):
+                    continue
+                    
+                numero_bloque = str(valor_bloque).strip()
+                
+                # Obtener número de sorteo
+                nro_sorteo = None
+                if not pd.isna(valor_sorteo):
+                    nro_sorteo = str(valor_sorteo).strip()
+                    self.log(f"Fila {idx+1}: Número de sorteo encontrado: '{nro_sorteo}' para bloque {numero_bloque}", 'info')
+                
+                # Obtener email del suscriptor
+                email_suscriptor = None
+                if not pd.isna(valor_email):
+                    email_suscriptor = str(valor_email).strip()
+                
+                # Si es una fila vacía de una institución (que tiene 3 bloques)
+                if not email_suscriptor or email_suscriptor == "":
+                    # Si ya procesamos una institución, podría ser uno de sus bloques adicionales
+                    if ultima_institucion_email and len(bloques_institucion) < 3:
+                        self.log(f"Fila {idx+1}: Asignando bloque adicional a la institución con email {ultima_institucion_email}", 'info')
+                        email_suscriptor = ultima_institucion_email
+                        bloques_institucion.append(numero_bloque)
+                    else:
+                        # Si no hay email y no pertenece a una institución ya procesada, es un bloque libre
+                        self.log(f"Fila {idx+1}: No hay email, bloque libre", 'info')
+                        bloques_info[numero_bloque] = {
+                            'email': None,
+                            'estado': 'libre',
+                            'nro_sorteo': None  # Los bloques libres no tienen número de sorteo
+                        }
+                        estados_count['libre'] += 1
+                        continue
+                
+                # Verificar si es una institución (para seguimiento de bloques múltiples)
+                tipo = tipo_suscriptor(email_suscriptor)
+                if tipo == 'institucion':
+                    ultima_institucion_email = email_suscriptor
+                    bloques_institucion = [numero_bloque]
+                    self.log(f"Fila {idx+1}: Institución encontrada: {email_suscriptor}", 'info')
+                else:
+                    # Si es particular o no existe, reiniciar seguimiento de instituciones
+                    ultima_institucion_email = None
+                    bloques_institucion = []
+                    if tipo is None:
+                        self.log(f"Fila {idx+1}: Suscriptor no encontrado: {email_suscriptor}", 'warning')
+                
+                # Con email el estado mínimo es 'asignado'; estados_filas ya trae el más alto marcado
+                if estado_maximal != 'asignado':
+                    self.log(f"Fila {idx+1}: Estado {estado_maximal} para bloque {numero_bloque}", 'info')
+                
+                # Guardar la información
+                bloques_info[numero_bloque] = {
+                    'email': email_suscriptor,
+                    'estado': estado_maximal,
+                    'nro_sorteo': nro_sorteo
+                }
+                
+                # Actualizar contadores
+                estados_count[estado_maximal] += 1
+                
+            except Exception as e:
+                bloques_con_error += 1
+                self.log(f"Error procesando fila {idx+1}: {str(e)}", 'error')
+        
+        # Mostrar resumen del análisis
+        self.log("\nResumen de bloques por estado:", 'info')
+        for estado, count in estados_count.items():
+            self.log(f"  - {estado}: {count}", 'info')
+        
+        return bloques_info, bloques_con_error
+    
+    @staticmethod
+    def _tipo_suscriptor_por_consulta(email):
+        try:
+            return Suscriptor.objects.get(email=email).tipo
+        except Suscriptor.DoesNotExist:
+            return None
+    
+    def _log_estado_final(self):
+        """
+        Muestra la cantidad de bloques por estado y por número de sorteo en la base.
+        """
+        # Misma agregación que /api/estadisticas/ (una consulta), sin pasar por el cache
+        total = EstadisticasBloques.calcular()['total']
         
         self.log("\nEstado final en la base de datos:", 'info')
-        for estado, count in estados_finales.items():
+        for estado, count in total['estados'].items():
             self.log(f"  - {estado}: {count}", 'info')
         
-        # ¡NUEVO! Mostrar estadísticas de números de sorteo
-        bloques_con_sorteo = Bloque.objects.filter(nro_sorteo__isnull=False).count()
-        bloques_sin_sorteo = Bloque.objects.filter(nro_sorteo__isnull=True).count()
         self.log(f"\nEstadísticas de números de sorteo:", 'info')
-        self.log(f"  - Bloques con número de sorteo: {bloques_con_sorteo}", 'info')
-        self.log(f"  - Bloques sin número de sorteo: {bloques_sin_sorteo}", 'info')
-        
-        return bloques_creados, bloques_actualizados, bloques_con_error
\ No newline at end of file
+        self.log(f"  - Bloques con número de sorteo: {total['con_sorteo']}", 'info')
+        self.log(f"  - Bloques sin número de sorteo: {total['total'] - total['con_sorteo']}", 'info')
+    
+    @classmethod
+    def _en_lotes(cls, valores):
+        for inicio in range(0, len(valores), cls.TAMANO_LOTE):
+            yield valores[inicio:inicio + cls.TAMANO_LOTE]
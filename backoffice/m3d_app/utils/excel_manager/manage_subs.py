@@ -1,333 +1,255 @@
 from django.db import transaction
-import pandas as pd
+from django.utils import timezone
 from .base import ExcelManagerBase
+from .importacion import EspecificacionImportacion
 from m3d_app.models.suscriptor.suscriptor import Suscriptor
 from m3d_app.models.impresora.impresora import Impresora
 from m3d_app.models.suscriptor.particular_con_impresora import ParticularConImpresora
 from m3d_app.models.suscriptor.particular_sin_impresora import ParticularSinImpresora
 from m3d_app.models.suscriptor.institucion_con_impresora import InstitucionConImpresora
 from m3d_app.models.suscriptor.institucion_sin_impresora import InstitucionSinImpresora
+from m3d_app.utils.agregados_suscriptor import AgregadosSuscriptor
+from m3d_app.utils.busqueda_suscriptores import BusquedaSuscriptores
 from m3d_app.utils.excel_mapper import ExcelMapper
-from m3d_app.utils.excel_parser import ExcelParser
 
 class ExcelManagerForSubs(ExcelManagerBase):
     """
-    Gestor de Excel especializado en la importación de suscriptores.
+    Gestor de Excel especializado en la importación de suscriptores. Cada
+    formulario es una EspecificacionImportacion en ESPECIFICACIONES; todos
+    pasan por importar().
+
+    Las filas se guardan en lotes de TAMANO_LOTE, cada uno en su transacción:
+    los suscriptores existentes se traen por email en una consulta y los
+    suscriptores, impresoras y subtipos se escriben con bulk_create/bulk_update.
+    Una impresora con los mismos datos (misma huella) se reutiliza, así
+    reimportar un formulario no crea impresoras nuevas.
+    Si un lote falla se rehace fila por fila, para informar qué filas tienen error.
     """
-    
-    @transaction.atomic
+
+    TAMANO_LOTE = 500
+
+    # Un formulario por tipo de importación (--type de import_excel)
+    ESPECIFICACIONES = {
+        'particulares_con_impresora': EspecificacionImportacion(
+            tipo='particular',
+            modelo_subtipo=ParticularConImpresora,
+            descripcion='Particular con impresora creado',
+            columnas_suscriptor=ExcelMapper.columnas_suscriptor_part_con_imp(),
+            columnas_impresora=ExcelMapper.columnas_impresora_part_con_imp(),
+        ),
+        'particulares_sin_impresora': EspecificacionImportacion(
+            tipo='particular',
+            modelo_subtipo=ParticularSinImpresora,
+            descripcion='Particular sin impresora creado',
+            columnas_suscriptor=ExcelMapper.columnas_suscriptor_part_sin_imp(),
+        ),
+        'instituciones_con_impresora': EspecificacionImportacion(
+            tipo='institucion',
+            modelo_subtipo=InstitucionConImpresora,
+            descripcion='Institución con impresora creada',
+            columnas_suscriptor=ExcelMapper.columnas_suscriptor_inst_con_imp(),
+            columnas_impresora=ExcelMapper.columnas_impresora_inst_con_imp(),
+            columnas_subtipo=ExcelMapper.columnas_institucion_con_imp(),
+        ),
+        'instituciones_sin_impresora': EspecificacionImportacion(
+            tipo='institucion',
+            modelo_subtipo=InstitucionSinImpresora,
+            descripcion='Institución sin impresora creada',
+            columnas_suscriptor=ExcelMapper.columnas_suscriptor_inst_sin_imp(),
+            columnas_subtipo=ExcelMapper.columnas_institucion_sin_imp(),
+        ),
+    }
+
     def import_particulares_con_impresora(self, file_path, sheet_name=0):
+        return self.importar('particulares_con_impresora', file_path, sheet_name)
+
+    def import_particulares_sin_impresora(self, file_path, sheet_name=0):
+        return self.importar('particulares_sin_impresora', file_path, sheet_name)
+
+    def import_instituciones_con_impresora(self, file_path, sheet_name=0):
+        return self.importar('instituciones_con_impresora', file_path, sheet_name)
+
+    def import_instituciones_sin_impresora(self, file_path, sheet_name=0):
+        return self.importar('instituciones_sin_impresora', file_path, sheet_name)
+
+    def importar(self, formulario, file_path, sheet_name=0):
         """
-        Importa datos de particulares con impresora desde un Excel.
-        
+        Importa un Excel de suscriptores según su especificación.
+
         Args:
+            formulario: Clave de ESPECIFICACIONES.
             file_path: Ruta al archivo Excel.
             sheet_name: Nombre o índice de la hoja a leer.
-            
+
         Returns:
             Tuple: (registros_creados, registros_con_error)
         """
-        df = self.read_excel(file_path, sheet_name)
-        
-        # Contadores para seguimiento
+        especificacion = self.ESPECIFICACIONES[formulario]
+        df = self.read_excel(file_path, sheet_name, especificacion.columnas_excel())
+        plan = especificacion.compilar(df.columns)
+
         registros_creados = 0
         registros_con_error = 0
-        
-        # Obtener los mapeos de columnas del ExcelMapper
-        columnas_suscriptor = ExcelMapper.columnas_suscriptor_part_con_imp()
-        columnas_impresora = ExcelMapper.columnas_impresora_part_con_imp()
-        
-        # Procesar cada fila del Excel
-        for idx, row in df.iterrows():
+
+        # Primero se leen todas las filas; los errores de datos se informan por fila
+        filas = []
+        for idx, valores in plan.filas(df):
             try:
-                with transaction.atomic():
-                    # Crear suscriptor
-                    suscriptor_data = {}
-                    for col_excel, campo_modelo in columnas_suscriptor.items():
-                        if col_excel in row and pd.notna(row[col_excel]):
-                            # Procesar campos especiales
-                            if campo_modelo == 'telefono':
-                                suscriptor_data[campo_modelo] = ExcelParser.clean_phone_number(row[col_excel])
-                            elif campo_modelo == 'fecha_nacimiento':
-                                suscriptor_data[campo_modelo] = ExcelParser.parse_date(row[col_excel])
-                            else:
-                                suscriptor_data[campo_modelo] = row[col_excel]
-                    
-                    # Añadir tipo suscriptor
-                    suscriptor_data['tipo'] = 'particular'
-                    
-                    # Crear o actualizar suscriptor por email
-                    email = suscriptor_data.get('email')
-                    if not email:
-                        self.log(f"Fila {idx+2} sin email, omitiendo", 'warning')
-                        registros_con_error += 1
-                        continue
-                    
-                    suscriptor, created = Suscriptor.objects.update_or_create(
-                        email=email,
-                        defaults=suscriptor_data
-                    )
-                    
-                    # Crear impresora
-                    impresora_data = {}
-                    for col_excel, campo_modelo in columnas_impresora.items():
-                        if col_excel in row and pd.notna(row[col_excel]):
-                            # Procesar campos especiales
-                            if campo_modelo == 'anios_experiencia':
-                                impresora_data[campo_modelo] = ExcelParser.parse_years_experience(row[col_excel])
-                            elif campo_modelo == 'cantidad_equipos':
-                                impresora_data[campo_modelo] = ExcelParser.parse_equipment_count(row[col_excel])
-                            else:
-                                impresora_data[campo_modelo] = row[col_excel]
-                    
-                    impresora = Impresora.objects.create(**impresora_data)
-                    
-                    # Crear relación particular con impresora
-                    ParticularConImpresora.objects.update_or_create(
-                        suscriptor=suscriptor,
-                        defaults={'impresora': impresora}
-                    )
-                    
-                    registros_creados += 1
-                    self.log(f"Fila {idx+2}: Particular con impresora creado - {suscriptor}", 'info')
-                    
+                datos = plan.convertir(valores)
+                suscriptor_data = self._completar_suscriptor(datos['suscriptor'], especificacion.tipo)
+                if not suscriptor_data.get('email'):
+                    self.log(f"Fila {idx+2} sin email, omitiendo", 'warning')
+                    registros_con_error += 1
+                    continue
+                filas.append((idx + 2, suscriptor_data, datos.get('impresora'), datos['subtipo']))
             except Exception as e:
                 registros_con_error += 1
                 self.log(f"Error al procesar fila {idx+2}: {str(e)}", 'error')
-                self.log(f"Datos: {row.to_dict()}", 'debug')
-                
-        return registros_creados, registros_con_error
-    
-    @transaction.atomic
-    def import_particulares_sin_impresora(self, file_path, sheet_name=0):
-        """
-        Importa datos de particulares sin impresora desde un Excel.
-        
-        Args:
-            file_path: Ruta al archivo Excel.
-            sheet_name: Nombre o índice de la hoja a leer.
-            
-        Returns:
-            Tuple: (registros_creados, registros_con_error)
-        """
-        df = self.read_excel(file_path, sheet_name)
-        
-        # Contadores para seguimiento
-        registros_creados = 0
-        registros_con_error = 0
-        
-        # Obtener los mapeos de columnas del ExcelMapper
-        columnas_suscriptor = ExcelMapper.columnas_suscriptor_part_sin_imp()
-        
-        # Procesar cada fila del Excel
-        for idx, row in df.iterrows():
+                self.log(f"Datos: {dict(zip(df.columns, valores))}", 'debug')
+
+        modelo_subtipo = especificacion.modelo_subtipo
+        for inicio in range(0, len(filas), self.TAMANO_LOTE):
+            lote = filas[inicio:inicio + self.TAMANO_LOTE]
             try:
                 with transaction.atomic():
-                    # Crear suscriptor
-                    suscriptor_data = {}
-                    for col_excel, campo_modelo in columnas_suscriptor.items():
-                        if col_excel in row and pd.notna(row[col_excel]):
-                            # Procesar campos especiales
-                            if campo_modelo == 'telefono':
-                                suscriptor_data[campo_modelo] = ExcelParser.clean_phone_number(row[col_excel])
-                            elif campo_modelo == 'fecha_nacimiento':
-                                suscriptor_data[campo_modelo] = ExcelParser.parse_date(row[col_excel])
-                            else:
-                                suscriptor_data[campo_modelo] = row[col_excel]
-                    
-                    # Añadir tipo suscriptor
-                    suscriptor_data['tipo'] = 'particular'
-                    
-                    # Crear o actualizar suscriptor por email
-                    email = suscriptor_data.get('email')
-                    if not email:
-                        self.log(f"Fila {idx+2} sin email, omitiendo", 'warning')
-                        registros_con_error += 1
-                        continue
-                    
-                    suscriptor, created = Suscriptor.objects.update_or_create(
-                        email=email,
-                        defaults=suscriptor_data
-                    )
-                    
-                    # Crear relación particular sin impresora
-                    ParticularSinImpresora.objects.update_or_create(
-                        suscriptor=suscriptor
-                    )
-                    
-                    registros_creados += 1
-                    self.log(f"Fila {idx+2}: Particular sin impresora creado - {suscriptor}", 'info')
-                    
+                    suscriptores = self._guardar_lote(lote, modelo_subtipo)
+                for (numero_fila, *_), suscriptor in zip(lote, suscriptores):
+                    self.log(f"Fila {numero_fila}: {especificacion.descripcion} - {suscriptor}", 'info')
+                registros_creados += len(lote)
             except Exception as e:
-                registros_con_error += 1
-                self.log(f"Error al procesar fila {idx+2}: {str(e)}", 'error')
-                self.log(f"Datos: {row.to_dict()}", 'debug')
-                
+                self.log(f"Error al guardar las filas {lote[0][0]} a {lote[-1][0]} en lote ({str(e)}), se reintentan de a una", 'warning')
+                for fila in lote:
+                    numero_fila = fila[0]
+                    try:
+                        with transaction.atomic():
+                            suscriptor = self._guardar_fila(fila, modelo_subtipo)
+                        registros_creados += 1
+                        self.log(f"Fila {numero_fila}: {especificacion.descripcion} - {suscriptor}", 'info')
+                    except Exception as e:
+                        registros_con_error += 1
+                        self.log(f"Error al procesar fila {numero_fila}: {str(e)}", 'error')
+
+        if registros_creados:
+            # bulk_create/bulk_update no disparan las señales de Suscriptor
+            AgregadosSuscriptor.recalcular()
+            BusquedaSuscriptores.reconstruir()
+
         return registros_creados, registros_con_error
-    
-    @transaction.atomic
-    def import_instituciones_con_impresora(self, file_path, sheet_name=0):
+
+    @staticmethod
+    def _completar_suscriptor(suscriptor_data, tipo):
+        # Añadir tipo suscriptor y, para instituciones, nombre para el campo requerido
+        suscriptor_data['tipo'] = tipo
+        if tipo == 'institucion' and 'nombre_institucion' in suscriptor_data:
+            suscriptor_data['nombre'] = suscriptor_data['nombre_institucion'][:100]  # Limitar a 100 chars
+        return suscriptor_data
+
+    def _guardar_lote(self, filas, modelo_subtipo):
         """
-        Importa datos de instituciones con impresora desde un Excel.
-        
-        Args:
-            file_path: Ruta al archivo Excel.
-            sheet_name: Nombre o índice de la hoja a leer.
-            
+        Guarda un lote de filas con una consulta para leer los suscriptores
+        existentes y bulk_create/bulk_update para escribir. Si un email se
+        repite en el lote, sus datos se aplican en orden, como fila por fila.
+
         Returns:
-            Tuple: (registros_creados, registros_con_error)
+            Lista con el suscriptor de cada fila, en el mismo orden.
         """
-        df = self.read_excel(file_path, sheet_name)
-        
-        # Contadores para seguimiento
-        registros_creados = 0
-        registros_con_error = 0
-        
-        # Obtener los mapeos de columnas del ExcelMapper
-        columnas_suscriptor = ExcelMapper.columnas_suscriptor_inst_con_imp()
-        columnas_impresora = ExcelMapper.columnas_impresora_inst_con_imp()
-        columnas_institucion = ExcelMapper.columnas_institucion_con_imp()
-        
-        # Procesar cada fila del Excel
-        for idx, row in df.iterrows():
-            try:
-                with transaction.atomic():
-                    # Crear suscriptor
-                    suscriptor_data = {}
-                    for col_excel, campo_modelo in columnas_suscriptor.items():
-                        if col_excel in row and pd.notna(row[col_excel]):
-                            # Procesar campos especiales de suscriptor
-                            if campo_modelo == 'telefono':
-                                suscriptor_data[campo_modelo] = ExcelParser.clean_phone_number(row[col_excel])
-                            elif campo_modelo == 'fecha_nacimiento':
-                                suscriptor_data[campo_modelo] = ExcelParser.parse_date(row[col_excel])
-                            else:
-                                suscriptor_data[campo_modelo] = row[col_excel]
-                    
-                    # Añadir tipo suscriptor y nombre para el campo requerido
-                    suscriptor_data['tipo'] = 'institucion'
-                    if 'nombre_institucion' in suscriptor_data:
-                        suscriptor_data['nombre'] = suscriptor_data['nombre_institucion'][:100]  # Limitar a 100 chars
-                    
-                    # Crear o actualizar suscriptor por email
-                    email = suscriptor_data.get('email')
-                    if not email:
-                        self.log(f"Fila {idx+2} sin email, omitiendo", 'warning')
-                        registros_con_error += 1
-                        continue
-                    
-                    suscriptor, created = Suscriptor.objects.update_or_create(
-                        email=email,
-                        defaults=suscriptor_data
-                    )
-                    
-                    # Crear impresora
-                    impresora_data = {}  
-                    for col_excel, campo_modelo in columnas_impresora.items():
-                        if col_excel in row and pd.notna(row[col_excel]):
-                            # Procesar campos especiales de impresora
-                            if campo_modelo == 'anios_experiencia':
-                                impresora_data[campo_modelo] = ExcelParser.parse_years_experience(row[col_excel])
-                            elif campo_modelo == 'cantidad_equipos':
-                                impresora_data[campo_modelo] = ExcelParser.parse_equipment_count(row[col_excel])
-                            else:
-                                impresora_data[campo_modelo] = row[col_excel]
-                    
-                    impresora = Impresora.objects.create(**impresora_data)
-                    
-                    # Crear relación institución con impresora
-                    institucion_data = {'impresora': impresora}
-                    for col_excel, campo_modelo in columnas_institucion.items():
-                        if col_excel in row and pd.notna(row[col_excel]):
-                            institucion_data[campo_modelo] = row[col_excel]
-                    
-                    InstitucionConImpresora.objects.update_or_create(
-                        suscriptor=suscriptor,
-                        defaults=institucion_data
-                    )
-                    
-                    registros_creados += 1
-                    self.log(f"Fila {idx+2}: Institución con impresora creada - {suscriptor}", 'info')
-                    
-            except Exception as e:
-                registros_con_error += 1
-                self.log(f"Error al procesar fila {idx+2}: {str(e)}", 'error')
-                self.log(f"Datos: {row.to_dict()}", 'debug')
-                
-        return registros_creados, registros_con_error
-    
-    @transaction.atomic
-    def import_instituciones_sin_impresora(self, file_path, sheet_name=0):
+        now = timezone.now()
+        emails = {suscriptor_data['email'] for _, suscriptor_data, _, _ in filas}
+        existentes = Suscriptor.objects.in_bulk(list(emails), field_name='email')
+
+        # Suscriptores: se actualizan los existentes y se crean los nuevos
+        suscriptores = {}
+        nuevos = {}
+        campos_actualizados = {'fecha_modificacion'}
+        for _, suscriptor_data, _, _ in filas:
+            email = suscriptor_data['email']
+            suscriptor = suscriptores.get(email) or existentes.get(email)
+            if suscriptor is None:
+                suscriptor = nuevos[email] = Suscriptor()
+            for campo, valor in suscriptor_data.items():
+                setattr(suscriptor, campo, valor)
+            suscriptor.fecha_modificacion = now
+            suscriptores[email] = suscriptor
+            if email not in nuevos:
+                campos_actualizados.update(suscriptor_data)
+
+        Suscriptor.objects.bulk_create(nuevos.values(), batch_size=self.TAMANO_LOTE)
+        actualizados = [suscriptor for email, suscriptor in suscriptores.items() if email not in nuevos]
+        Suscriptor.objects.bulk_update(actualizados, sorted(campos_actualizados), batch_size=self.TAMANO_LOTE)
+
+        # Datos del subtipo de cada suscriptor; si el email se repite, los de
+        # la última fila pisan a los anteriores (también la impresora)
+        datos_subtipo = {}
+        datos_impresora = {}
+        for _, suscriptor_data, impresora_data, subtipo_data in filas:
+            email = suscriptor_data['email']
+            datos_subtipo.setdefault(email, {}).update(subtipo_data)
+            if impresora_data is not None:
+                datos_impresora[email] = impresora_data
+
+        ids = [suscriptor.pk for suscriptor in suscriptores.values()]
+        subtipos = modelo_subtipo.objects.filter(suscriptor_id__in=ids)
+        if datos_impresora:
+            subtipos = subtipos.select_related('impresora')
+        subtipos = {subtipo.suscriptor_id: subtipo for subtipo in subtipos}
+
+        # Impresoras: se reutiliza la del suscriptor si tiene los mismos datos
+        impresoras_nuevas = []
+        for email, impresora_data in datos_impresora.items():
+            subtipo = subtipos.get(suscriptores[email].pk)
+            actual = subtipo.impresora if subtipo is not None else None
+            if actual is not None and actual.huella == Impresora.calcular_huella(impresora_data):
+                datos_subtipo[email]['impresora'] = actual
+                continue
+            impresora = Impresora(**impresora_data)
+            impresora.completar_huella()
+            impresoras_nuevas.append(impresora)
+            datos_subtipo[email]['impresora'] = impresora
+        Impresora.objects.bulk_create(impresoras_nuevas, batch_size=self.TAMANO_LOTE)
+
+        # Subtipos: mismos criterios que update_or_create(suscriptor=..., defaults=...)
+        subtipos_nuevos = []
+        campos_subtipo = set()
+        for email, datos in datos_subtipo.items():
+            suscriptor = suscriptores[email]
+            subtipo = subtipos.get(suscriptor.pk)
+            if subtipo is None:
+                subtipos_nuevos.append(modelo_subtipo(suscriptor=suscriptor, **datos))
+                continue
+            for campo, valor in datos.items():
+                setattr(subtipo, campo, valor)
+            # bulk_update no completa los auto_now
+            subtipo.fecha_modificacion = now
+            campos_subtipo.update(datos, ['fecha_modificacion'])
+
+        modelo_subtipo.objects.bulk_create(subtipos_nuevos, batch_size=self.TAMANO_LOTE)
+        if campos_subtipo:
+            modelo_subtipo.objects.bulk_update(list(subtipos.values()), sorted(campos_subtipo), batch_size=self.TAMANO_LOTE)
+
+        return [suscriptores[suscriptor_data['email']] for _, suscriptor_data, _, _ in filas]
+
+    def _guardar_fila(self, fila, modelo_subtipo):
         """
-        Importa datos de instituciones sin impresora desde un Excel.
-        
-        Args:
-            file_path: Ruta al archivo Excel.
-            sheet_name: Nombre o índice de la hoja a leer.
-            
+        Guarda una fila con update_or_create (camino de respaldo de _guardar_lote).
+
         Returns:
-            Tuple: (registros_creados, registros_con_error)
+            El suscriptor guardado.
         """
-        df = self.read_excel(file_path, sheet_name)
-        
-        # Contadores para seguimiento
-        registros_creados = 0
-        registros_con_error = 0
-        
-        # Obtener los mapeos de columnas del ExcelMapper
-        columnas_suscriptor = ExcelMapper.columnas_suscriptor_inst_sin_imp()
-        columnas_institucion = ExcelMapper.columnas_institucion_sin_imp()
-        
-        # Procesar cada fila del Excel
-        for idx, row in df.iterrows():
-            try:
-                with transaction.atomic():
-                    # Crear suscriptor
-                    suscriptor_data = {}
-                    for col_excel, campo_modelo in columnas_suscriptor.items():
-                        if col_excel in row and pd.notna(row[col_excel]):
-                            # Procesar campos especiales
-                            if campo_modelo == 'telefono':
-                                suscriptor_data[campo_modelo] = ExcelParser.clean_phone_number(row[col_excel])
-                            elif campo_modelo == 'fecha_nacimiento':
-                                suscriptor_data[campo_modelo] = ExcelParser.parse_date(row[col_excel])
-                            else:
-                                suscriptor_data[campo_modelo] = row[col_excel]
-                    
-                    # Añadir tipo suscriptor y nombre para el campo requerido
-                    suscriptor_data['tipo'] = 'institucion'
-                    if 'nombre_institucion' in suscriptor_data:
-                        suscriptor_data['nombre'] = suscriptor_data['nombre_institucion'][:100]  # Limitar a 100 chars
-                    
-                    # Crear o actualizar suscriptor por email
-                    email = suscriptor_data.get('email')
-                    if not email:
-                        self.log(f"Fila {idx+2} sin email, omitiendo", 'warning')
-                        registros_con_error += 1
-                        continue
-                    
-                    suscriptor, created = Suscriptor.objects.update_or_create(
-                        email=email,
-                        defaults=suscriptor_data
-                    )
-                    
-                    # Crear relación institución sin impresora
-                    institucion_data = {}
-                    for col_excel, campo_modelo in columnas_institucion.items():
-                        if col_excel in row and pd.notna(row[col_excel]):
-                            institucion_data[campo_modelo] = row[col_excel]
-                    
-                    InstitucionSinImpresora.objects.update_or_create(
-                        suscriptor=suscriptor,
-                        defaults=institucion_data
-                    )
-                    
-                    registros_creados += 1
-                    self.log(f"Fila {idx+2}: Institución sin impresora creada - {suscriptor}", 'info')
-                    
-            except Exception as e:
-                registros_con_error += 1
-                self.log(f"Error al procesar fila {idx+2}: {str(e)}", 'error')
-                self.log(f"Datos: {row.to_dict()}", 'debug')
-                
-        return registros_creados, registros_con_error
\ No newline at end of file
+        _, suscriptor_data, impresora_data, subtipo_data = fila
+        suscriptor, _ = Suscriptor.objects.update_or_create(
+            email=suscriptor_data['email'],
+            defaults=suscriptor_data
+        )
+
+        defaults = dict(subtipo_data)
+        if impresora_data is not None:
+            # Se reutiliza la impresora del suscriptor si tiene los mismos datos
+            subtipo = modelo_subtipo.objects.filter(suscriptor=suscriptor).select_related('impresora').first()
+            actual = subtipo.impresora if subtipo is not None else None
+            if actual is not None and actual.huella == Impresora.calcular_huella(impresora_data):
+                defaults['impresora'] = actual
+            else:
+                defaults['impresora'] = Impresora.objects.create(**impresora_data)
+
+        modelo_subtipo.objects.update_or_create(suscriptor=suscriptor, defaults=defaults)
+        return suscriptor
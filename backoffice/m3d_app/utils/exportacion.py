@@ -0,0 +1,531 @@
+import csv
+import io
+import json
+import tempfile
+from django.core.files import File
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+from m3d_app.models.bloque3d.bloque import Bloque
+from m3d_app.models.impresora.impresora import Impresora
+from m3d_app.models.suscriptor.suscriptor import Suscriptor
+from m3d_app.models.suscriptor.particular_con_impresora import ParticularConImpresora
+from m3d_app.models.suscriptor.particular_sin_impresora import ParticularSinImpresora
+from m3d_app.models.suscriptor.institucion_con_impresora import InstitucionConImpresora
+from m3d_app.models.suscriptor.institucion_sin_impresora import InstitucionSinImpresora
+from m3d_app.models.exportacion.trabajo_exportacion import TrabajoExportacion
+from m3d_app.utils.respuesta_condicional import RespuestaCondicional
+
+
+class ExportadorExcel:
+    """
+    Escribe exportaciones fila por fila, sin armar la planilla completa en memoria.
+    Las filas llegan de un generador (normalmente un queryset con .iterator()),
+    así el consumo de memoria no crece con la cantidad de registros.
+    """
+
+    CONTENT_TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    @staticmethod
+    def escribir_xlsx(destino, columnas, filas, nombre_hoja):
+        """
+        Escribe un .xlsx con un workbook write-only de openpyxl.
+
+        Args:
+            destino: Ruta o archivo binario donde guardar el .xlsx.
+            columnas: Lista de (titulo, ancho) en el orden de la planilla.
+            filas: Iterable de listas de valores, en el mismo orden que columnas.
+            nombre_hoja: Nombre de la hoja.
+        """
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet(nombre_hoja)
+
+        # En modo write-only los anchos se definen antes de escribir filas
+        for indice, (_, ancho) in enumerate(columnas, start=1):
+            worksheet.column_dimensions[get_column_letter(indice)].width = ancho
+
+        worksheet.append([titulo for titulo, _ in columnas])
+        for fila in filas:
+            worksheet.append(fila)
+
+        workbook.save(destino)
+
+    @staticmethod
+    def escribir_csv(destino, columnas, filas):
+        """
+        Escribe un CSV en UTF-8 con BOM (para que Excel reconozca los acentos).
+
+        Args:
+            destino: Archivo binario donde escribir.
+            columnas: Lista de (titulo, ancho) en el orden de la planilla.
+            filas: Iterable de listas de valores, en el mismo orden que columnas.
+        """
+        texto = io.TextIOWrapper(destino, encoding='utf-8-sig', newline='')
+        writer = csv.writer(texto)
+        writer.writerow([titulo for titulo, _ in columnas])
+        writer.writerows(filas)
+        texto.flush()
+        # Devolver el archivo binario sin cerrarlo junto con el wrapper
+        texto.detach()
+
+    @classmethod
+    def respuesta_xlsx(cls, columnas, filas, nombre_hoja, nombre_archivo):
+        """
+        Devuelve el .xlsx como FileResponse. Se escribe en un archivo temporal,
+        que se envía en bloques y se borra al cerrarse la respuesta.
+        """
+        archivo = tempfile.TemporaryFile()
+        cls.escribir_xlsx(archivo, columnas, filas, nombre_hoja)
+        archivo.seek(0)
+        return FileResponse(
+            archivo,
+            as_attachment=True,
+            filename=nombre_archivo,
+            content_type=cls.CONTENT_TYPE_XLSX
+        )
+
+    @staticmethod
+    def respuesta_csv(columnas, filas, nombre_archivo):
+        """
+        Devuelve un CSV que se genera a medida que se envía (StreamingHttpResponse).
+        Empieza con BOM para que Excel reconozca los acentos.
+        """
+        class Eco:
+            def write(self, valor):
+                return valor
+
+        writer = csv.writer(Eco())
+
+        def contenido():
+            yield '\ufeff'
+            yield writer.writerow([titulo for titulo, _ in columnas])
+            for fila in filas:
+                yield writer.writerow(fila)
+
+        response = StreamingHttpResponse(contenido(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+        return response
+
+
+class ContadorFilas:
+    """
+    Envuelve un iterable de filas y cuenta, mientras se recorre, las que se
+    escribieron en el archivo.
+    """
+
+    def __init__(self, filas):
+        self.filas = filas
+        self.cantidad = 0
+
+    def __iter__(self):
+        for fila in self.filas:
+            self.cantidad += 1
+            yield fila
+
+
+class ExportacionBloques:
+    """
+    Columnas y filas de la exportación de bloques, con el formato del Excel de participantes.
+    """
+
+    NOMBRE_HOJA = 'Bloques'
+    NOMBRE_ARCHIVO = 'bloques_malvinas3d'
+    TAMANO_LOTE = 500
+    # Modelos de los que salen las filas (ver ProcesadorExportaciones.huella)
+    MODELOS = (Bloque, Suscriptor)
+
+    COLUMNAS = [
+        ('N sorteo', 12),
+        ('prefijo', 9),
+        ('bloque', 10),
+        ('MAIL', 35),
+        ('NOMBRE', 30),
+        ('Telefono', 16),
+        ('Direccion', 50),
+        ('Provincia', 20),
+        ('Codigo Postal', 14),
+        ('Estado Bloque', 18),
+        ('Fecha Asignacion', 20),
+        ('VALIDA FOTO', 12),
+        ('anoto nodo', 11),
+        ('RECIBIMOS', 11),
+        ('Diploma OK', 11),
+    ]
+
+    @staticmethod
+    def queryset():
+        return Bloque.objects.order_by('numero_bloque')
+
+    @staticmethod
+    def nombre_suscriptor(tipo, nombre, apellido, nombre_institucion):
+        """
+        Nombre con el que se muestra al suscriptor: el de la institución o
+        "nombre apellido" para los particulares.
+        """
+        if tipo == 'institucion':
+            return nombre_institucion or nombre
+        return f"{nombre} {apellido or ''}".strip()
+
+    @classmethod
+    def filas(cls, queryset):
+        """
+        Genera una fila por bloque, recorriendo el queryset en lotes.
+        """
+        bloques = queryset.select_related('suscriptor').iterator(chunk_size=cls.TAMANO_LOTE)
+        for bloque in bloques:
+            suscriptor = bloque.suscriptor
+
+            # Determinar estados binarios (1 o 0) según el estado actual
+            validacion = 1 if bloque.estado in ['validacion', 'entregado_nodo', 'recibido_m3d', 'diploma_entregado'] else 0
+            entregado_nodo = 1 if bloque.estado in ['entregado_nodo', 'recibido_m3d', 'diploma_entregado'] else 0
+            recibido_m3d = 1 if bloque.estado in ['recibido_m3d', 'diploma_entregado'] else 0
+            diploma_entregado = 1 if bloque.estado == 'diploma_entregado' else 0
+
+            # Obtener información del suscriptor
+            nombre_suscriptor = ''
+            direccion = ''
+            if suscriptor:
+                nombre_suscriptor = cls.nombre_suscriptor(
+                    suscriptor.tipo, suscriptor.nombre, suscriptor.apellido, suscriptor.nombre_institucion
+                )
+
+                partes_direccion = [
+                    suscriptor.calle,
+                    suscriptor.numero,
+                    suscriptor.piso_depto,
+                    suscriptor.ciudad,
+                    suscriptor.provincia
+                ]
+                direccion = ', '.join([parte for parte in partes_direccion if parte])
+
+            yield [
+                bloque.nro_sorteo or '',
+                'M3D',  # Siempre M3D
+                bloque.numero_bloque,
+                suscriptor.email if suscriptor else '',
+                nombre_suscriptor,
+                suscriptor.telefono if suscriptor else '',
+                direccion,
+                suscriptor.provincia if suscriptor else '',
+                suscriptor.codigo_postal if suscriptor else '',
+                bloque.estado,
+                bloque.fecha_asignacion.strftime('%Y-%m-%d %H:%M:%S') if bloque.fecha_asignacion else '',
+                validacion,
+                entregado_nodo,
+                recibido_m3d,
+                diploma_entregado,
+            ]
+
+
+class ExportacionBloquesNdjson:
+    """
+    Todos los bloques con el nombre para mostrar de su suscriptor, uno por
+    línea, para armar la lista pública de participantes en un solo pedido.
+    Lee con .values().iterator(), así que la memoria no crece con la cantidad de bloques.
+    """
+
+    NOMBRE_ARCHIVO = 'bloques_malvinas3d.ndjson'
+    TAMANO_LOTE = 500
+
+    CAMPOS = [
+        'id', 'numero_bloque', 'clave_canonica', 'seccion', 'numero', 'estado', 'nro_sorteo', 'suscriptor_id',
+    ]
+    CAMPOS_SUSCRIPTOR = [
+        'suscriptor__tipo', 'suscriptor__nombre', 'suscriptor__apellido', 'suscriptor__nombre_institucion',
+    ]
+
+    @staticmethod
+    def queryset():
+        return Bloque.objects.order_by('id')
+
+    @classmethod
+    def registros(cls, queryset):
+        """
+        Genera un dict por bloque con CAMPOS más 'nombre_suscriptor'
+        (None si el bloque no tiene suscriptor).
+        """
+        filas = queryset.values(*cls.CAMPOS, *cls.CAMPOS_SUSCRIPTOR).iterator(chunk_size=cls.TAMANO_LOTE)
+        for fila in filas:
+            tipo, nombre, apellido, nombre_institucion = (fila.pop(campo) for campo in cls.CAMPOS_SUSCRIPTOR)
+            fila['nombre_suscriptor'] = (
+                ExportacionBloques.nombre_suscriptor(tipo, nombre, apellido, nombre_institucion)
+                if fila['suscriptor_id'] else None
+            )
+            yield fila
+
+    @classmethod
+    def respuesta(cls, queryset=None):
+        """
+        Devuelve los registros como NDJSON que se genera a medida que se envía,
+        de a TAMANO_LOTE líneas por bloque enviado.
+        """
+        queryset = cls.queryset() if queryset is None else queryset
+
+        def contenido():
+            lote = []
+            for registro in cls.registros(queryset):
+                lote.append(json.dumps(registro, ensure_ascii=False))
+                if len(lote) == cls.TAMANO_LOTE:
+                    yield '\n'.join(lote) + '\n'
+                    lote = []
+            if lote:
+                yield '\n'.join(lote) + '\n'
+
+        response = StreamingHttpResponse(contenido(), content_type='application/x-ndjson; charset=utf-8')
+        response['Content-Disposition'] = f'inline; filename="{cls.NOMBRE_ARCHIVO}"'
+        return response
+
+
+class ExportacionSuscriptores:
+    """
+    Columnas y filas de la exportación de suscriptores con sus datos de impresora y bloques.
+    """
+
+    NOMBRE_HOJA = 'Suscriptores'
+    NOMBRE_ARCHIVO = 'suscriptores_malvinas3d'
+    TAMANO_LOTE = 500
+    # Modelos de los que salen las filas (ver ProcesadorExportaciones.huella)
+    MODELOS = (
+        Suscriptor, Bloque, Impresora,
+        ParticularConImpresora, ParticularSinImpresora,
+        InstitucionConImpresora, InstitucionSinImpresora,
+    )
+
+    # Anchos fijos (máximo 50), así no hay que recorrer las celdas para calcularlos
+    COLUMNAS = [
+        ('ID', 8),
+        ('Tipo', 13),
+        ('Nombre', 25),
+        ('Apellido', 25),
+        ('Nombre Institución', 40),
+        ('Email', 35),
+        ('Teléfono', 16),
+        ('DNI', 12),
+        ('Fecha Nacimiento', 18),
+        ('Nombre Responsable', 30),
+        ('DNI Responsable', 17),
+        ('Calle', 30),
+        ('Número', 9),
+        ('Piso/Depto', 12),
+        ('Código Postal', 15),
+        ('Ciudad', 25),
+        ('Provincia', 22),
+        ('Tiene Impresora', 17),
+        ('Años Experiencia', 18),
+        ('Marcas y Modelos', 40),
+        ('Materiales Uso', 30),
+        ('Cantidad Equipos', 18),
+        ('Dimensión Máxima', 20),
+        ('Software Uso', 30),
+        ('Como se enteró', 50),
+        ('Motivo participación', 50),
+        ('Cantidad Bloques', 18),
+        ('Bloques Asignados', 50),
+        ('Contactado', 12),
+        ('Foto Validada', 15),
+        ('Diploma Entregado', 19),
+        ('Fecha Registro', 21),
+    ]
+
+    @staticmethod
+    def queryset():
+        return Suscriptor.objects.order_by('id')
+
+    @classmethod
+    def filas(cls, queryset):
+        """
+        Genera una fila por suscriptor. Los prefetch se resuelven por lote de
+        TAMANO_LOTE suscriptores, no para todo el queryset de una vez.
+        """
+        suscriptores = queryset.prefetch_related(
+            'bloques',
+            'particular_con_impresora__impresora',
+            'particular_sin_impresora',
+            'institucion_con_impresora__impresora',
+            'institucion_sin_impresora'
+        ).iterator(chunk_size=cls.TAMANO_LOTE)
+
+        titulos = [titulo for titulo, _ in cls.COLUMNAS]
+        for suscriptor in suscriptores:
+            fila = cls._datos_suscriptor(suscriptor)
+            yield [fila.get(titulo, '') for titulo in titulos]
+
+    @classmethod
+    def _datos_suscriptor(cls, suscriptor):
+        # Datos básicos del suscriptor
+        fila = {
+            'ID': suscriptor.id,
+            'Tipo': suscriptor.tipo.title(),
+            'Email': suscriptor.email,
+            'Teléfono': suscriptor.telefono,
+            'Fecha Registro': suscriptor.fecha_registro.strftime('%Y-%m-%d %H:%M:%S'),
+            'Contactado': 'Sí' if suscriptor.contactado else 'No',
+            'Foto Validada': 'Sí' if suscriptor.foto_validada else 'No',
+            'Diploma Entregado': 'Sí' if suscriptor.diploma_entregado else 'No',
+
+            # Dirección
+            'Calle': suscriptor.calle,
+            'Número': suscriptor.numero,
+            'Piso/Depto': suscriptor.piso_depto or '',
+            'Código Postal': suscriptor.codigo_postal,
+            'Ciudad': suscriptor.ciudad,
+            'Provincia': suscriptor.provincia,
+
+            # Otros datos
+            'Como se enteró': suscriptor.como_se_entero or '',
+            'Motivo participación': suscriptor.motivo_participacion or '',
+        }
+
+        # Datos específicos según el tipo
+        if suscriptor.tipo == 'particular':
+            fila.update({
+                'Nombre': suscriptor.nombre,
+                'Apellido': suscriptor.apellido or '',
+                'DNI': suscriptor.dni or '',
+                'Fecha Nacimiento': suscriptor.fecha_nacimiento.strftime('%Y-%m-%d') if suscriptor.fecha_nacimiento else '',
+            })
+
+            # Verificar si tiene impresora
+            if hasattr(suscriptor, 'particular_con_impresora') and suscriptor.particular_con_impresora:
+                fila['Tiene Impresora'] = 'Sí'
+                fila.update(cls._datos_impresora(suscriptor.particular_con_impresora.impresora))
+            else:
+                fila['Tiene Impresora'] = 'No'
+
+        else:  # institución
+            fila.update({
+                'Nombre': suscriptor.nombre,
+                'Nombre Institución': suscriptor.nombre_institucion or '',
+            })
+
+            # Datos del responsable
+            if hasattr(suscriptor, 'institucion_con_impresora') and suscriptor.institucion_con_impresora:
+                fila['Tiene Impresora'] = 'Sí'
+                fila.update({
+                    'Nombre Responsable': suscriptor.institucion_con_impresora.nombre_responsable or '',
+                    'DNI Responsable': suscriptor.institucion_con_impresora.dni_responsable or '',
+                })
+                fila.update(cls._datos_impresora(suscriptor.institucion_con_impresora.impresora))
+            elif hasattr(suscriptor, 'institucion_sin_impresora') and suscriptor.institucion_sin_impresora:
+                fila['Tiene Impresora'] = 'No'
+                fila.update({
+                    'Nombre Responsable': suscriptor.institucion_sin_impresora.nombre_responsable or '',
+                    'DNI Responsable': suscriptor.institucion_sin_impresora.dni_responsable or '',
+                })
+
+        # Información de bloques asignados
+        bloques_info = [f"{bloque.numero_bloque} ({bloque.estado})" for bloque in suscriptor.bloques.all()]
+        fila['Bloques Asignados'] = '; '.join(bloques_info) if bloques_info else 'Ninguno'
+        fila['Cantidad Bloques'] = len(bloques_info)
+
+        return fila
+
+    @staticmethod
+    def _datos_impresora(impresora):
+        if not impresora:
+            return {}
+        return {
+            'Años Experiencia': impresora.anios_experiencia or '',
+            'Marcas y Modelos': impresora.marcas_modelos_equipos or '',
+            'Materiales Uso': impresora.materiales_uso or '',
+            'Cantidad Equipos': impresora.cantidad_equipos or '',
+            'Dimensión Máxima': impresora.dimension_maxima_impresion or '',
+            'Software Uso': impresora.software_uso or '',
+        }
+
+
+class ProcesadorExportaciones:
+    """
+    Genera los archivos de los TrabajoExportacion pendientes. Lo usa el comando
+    procesar_exportaciones, fuera de los workers web.
+    """
+
+    EXPORTACIONES = {
+        'bloques': ExportacionBloques,
+        'suscriptores': ExportacionSuscriptores,
+    }
+
+    @staticmethod
+    def tomar_siguiente():
+        """
+        Toma el trabajo pendiente más antiguo y lo marca como 'procesando'.
+        El update condicional evita que dos procesos tomen el mismo trabajo.
+        Antes marca como error los trabajos vencidos, que quedaron 'procesando'
+        porque el proceso que los tomó se cortó.
+
+        Returns:
+            El TrabajoExportacion tomado, o None si no hay pendientes.
+        """
+        TrabajoExportacion.vencidos().update(
+            estado='error',
+            error=f'El proceso no terminó en {TrabajoExportacion.MINUTOS_VENCIMIENTO} minutos; pedir la exportación de nuevo',
+            fecha_fin=timezone.now()
+        )
+
+        while True:
+            trabajo = TrabajoExportacion.objects.filter(estado='pendiente').order_by('fecha_solicitud', 'id').first()
+            if trabajo is None:
+                return None
+
+            tomado = TrabajoExportacion.objects.filter(pk=trabajo.pk, estado='pendiente').update(
+                estado='procesando',
+                fecha_inicio=timezone.now()
+            )
+            if tomado:
+                trabajo.refresh_from_db()
+                return trabajo
+
+    @staticmethod
+    def huella(exportacion):
+        """
+        Validador del contenido de una exportación sin recorrer sus filas: la
+        cantidad y la última fecha_modificacion de cada modelo de MODELOS (una
+        consulta por modelo, como los ETag de la API) y las columnas.
+        """
+        etag, _ = RespuestaCondicional.validadores(
+            exportacion.MODELOS,
+            repr([titulo for titulo, _ in exportacion.COLUMNAS])
+        )
+        return etag.strip('"')
+
+    @classmethod
+    def procesar(cls, trabajo):
+        """
+        Genera el archivo del trabajo. Si los datos no cambiaron desde la última
+        exportación terminada del mismo tipo y formato, reutiliza ese archivo.
+        """
+        exportacion = cls.EXPORTACIONES[trabajo.tipo]
+
+        try:
+            # La huella se lee ANTES que las filas: si algo cambia mientras se
+            # escribe, la próxima exportación no reutiliza este archivo
+            huella = cls.huella(exportacion)
+
+            anterior = TrabajoExportacion.ultimo_terminado(trabajo.tipo, trabajo.formato, huella)
+            if anterior and anterior.archivo.storage.exists(anterior.archivo.name):
+                trabajo.archivo.name = anterior.archivo.name
+                trabajo.filas = anterior.filas
+                trabajo.reutilizado = True
+            else:
+                filas = ContadorFilas(exportacion.filas(exportacion.queryset()))
+                with tempfile.TemporaryFile() as archivo:
+                    if trabajo.formato == 'csv':
+                        ExportadorExcel.escribir_csv(archivo, exportacion.COLUMNAS, filas)
+                    else:
+                        ExportadorExcel.escribir_xlsx(archivo, exportacion.COLUMNAS, filas, exportacion.NOMBRE_HOJA)
+                    archivo.seek(0)
+
+                    nombre = f"{exportacion.NOMBRE_ARCHIVO}_{timezone.now():%Y%m%d_%H%M%S}.{trabajo.formato}"
+                    trabajo.archivo.save(nombre, File(archivo), save=False)
+                trabajo.filas = filas.cantidad
+
+            trabajo.huella = huella
+            trabajo.estado = 'terminado'
+        except Exception as e:
+            trabajo.estado = 'error'
+            trabajo.error = str(e)
+
+        trabajo.fecha_fin = timezone.now()
+        trabajo.save()
+        return trabajo
@@ -0,0 +1,82 @@
+from datetime import datetime
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from m3d_app.models.suscriptor.suscriptor import Suscriptor
+from m3d_app.models.bloque3d.bloque import Bloque
+
+
+class PlanConsultas:
+    """
+    Plan de ejecución (EXPLAIN / EXPLAIN QUERY PLAN) de las consultas más
+    frecuentes del admin, la API y las importaciones, para comprobar que usan
+    los índices de Bloque y detectar cuando dejan de usarlos.
+    """
+
+    @staticmethod
+    def consultas():
+        """
+        Consultas a revisar, con los índices que se espera que usen.
+
+        Returns:
+            Lista de (nombre, queryset, indices); alcanza con que el plan use
+            alguno de los índices (el nombre puede ser un prefijo).
+        """
+        desde = timezone.make_aware(datetime(2024, 1, 1))
+        hasta = timezone.make_aware(datetime(2025, 1, 1))
+        suscriptor_id = Bloque._meta.get_field('suscriptor').column
+        return [
+            (
+                'admin bloques: filtro sección + estado',
+                Bloque.objects.filter(seccion='05', estado='asignado').order_by('-pk'),
+                ('bloque_seccion_estado_idx',),
+            ),
+            (
+                'admin bloques: date_hierarchy + estado',
+                Bloque.objects.filter(estado='asignado', fecha_asignacion__gte=desde, fecha_asignacion__lt=hasta).order_by('-pk'),
+                ('bloque_estado_fecha_asig_idx',),
+            ),
+            (
+                'admin bloques: date_hierarchy (años)',
+                Bloque.objects.dates('fecha_asignacion', 'year'),
+                ('bloque_fecha_asignacion_idx',),
+            ),
+            (
+                'importación: bloques de un suscriptor por estado',
+                Bloque.objects.filter(suscriptor_id=1, estado='asignado'),
+                ('bloque_suscriptor_estado_idx',),
+            ),
+            (
+                'importación: bloque por nro_sorteo',
+                Bloque.objects.filter(nro_sorteo='0501'),
+                ('bloque_nro_sorteo_idx',),
+            ),
+            (
+                'api suscriptores-con-bloques: solo_con_bloques',
+                Suscriptor.objects.filter(Exists(Bloque.objects.filter(suscriptor=OuterRef('pk')))),
+                ('bloque_suscriptor_estado_idx', f'{Bloque._meta.db_table}_{suscriptor_id}'),
+            ),
+        ]
+
+    @staticmethod
+    def usa_indice(plan, indices):
+        return any(indice in plan for indice in indices)
+
+    @classmethod
+    def revisar(cls):
+        """
+        Obtiene el plan de cada consulta de consultas().
+
+        Returns:
+            Lista de diccionarios con nombre, sql, plan, indices y usa_indice.
+        """
+        resultados = []
+        for nombre, queryset, indices in cls.consultas():
+            plan = queryset.explain()
+            resultados.append({
+                'nombre': nombre,
+                'sql': str(queryset.query),
+                'plan': plan,
+                'indices': indices,
+                'usa_indice': cls.usa_indice(plan, indices),
+            })
+        return resultados
@@ -0,0 +1,72 @@
+from functools import lru_cache
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+class RelacionesSerializer:
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def calcular(serializer_class, modelo=None, prefijo=''):
+        """
+        Recorre los serializers anidados y devuelve las relaciones que hay que
+        traer junto con el queryset para que serializar no haga una consulta por fila.
+
+        Un serializer anidado simple sobre una ForeignKey/OneToOne va a
+        select_related; uno con many=True va a prefetch_related. Los anidados
+        dentro de un select_related se siguen recorriendo ("particular__impresora").
+
+        Args:
+            serializer_class: Clase del serializer (ModelSerializer).
+            modelo: Modelo del serializer (por defecto, Meta.model).
+            prefijo: Camino de relaciones hasta este serializer (uso interno).
+
+        Returns:
+            Tuple: (select_related, prefetch_related), tuplas de caminos. El
+            resultado se calcula una vez por serializer.
+        """
+        modelo = modelo or serializer_class.Meta.model
+        select_related = []
+        prefetch_related = []
+
+        for campo in serializer_class().fields.values():
+            anidado = campo.child if isinstance(campo, serializers.ListSerializer) else campo
+            if not isinstance(anidado, serializers.ModelSerializer) or campo.source == '*':
+                continue
+
+            try:
+                relacion = modelo._meta.get_field(campo.source)
+            except FieldDoesNotExist:
+                continue
+            if not relacion.is_relation:
+                continue
+
+            camino = f"{prefijo}{campo.source}"
+            if isinstance(campo, serializers.ListSerializer) or relacion.many_to_many or relacion.one_to_many:
+                prefetch_related.append(camino)
+                continue
+
+            select_related.append(camino)
+            select_anidado, prefetch_anidado = RelacionesSerializer.calcular(
+                type(anidado), relacion.related_model, f"{camino}__"
+            )
+            select_related.extend(select_anidado)
+            prefetch_related.extend(prefetch_anidado)
+
+        return tuple(select_related), tuple(prefetch_related)
+
+
+class RelacionesDelSerializerMixin:
+    """
+    Mixin para ViewSets: agrega al queryset los select_related/prefetch_related
+    que necesita su serializer, calculados con RelacionesSerializer.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select_related, prefetch_related = RelacionesSerializer.calcular(self.get_serializer_class())
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
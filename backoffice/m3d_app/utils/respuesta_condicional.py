@@ -0,0 +1,118 @@
+import hashlib
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+class RespuestaCondicional:
+    """
+    ETag / Last-Modified para GET condicionales: si lo que tiene el cliente
+    sigue vigente se responde 304 sin serializar ni renderizar nada.
+    """
+
+    @staticmethod
+    def validadores(modelos, variante=''):
+        """
+        Calcula los validadores a partir de los modelos que usa la respuesta,
+        con una consulta por modelo (cantidad de filas y última fecha_modificacion).
+        Una alta o una modificación cambian la fecha; una baja cambia la cantidad.
+
+        Args:
+            modelos: Modelos con campo fecha_modificacion.
+            variante: Texto que distingue representaciones del mismo recurso
+                (ej: el formato de la respuesta).
+
+        Returns:
+            Tuple: (etag, ultima_modificacion) con el ETag entre comillas y la
+            fecha como timestamp entero (o None si no hay filas).
+        """
+        partes = [variante]
+        ultima_modificacion = None
+        for modelo in modelos:
+            datos = modelo.objects.aggregate(total=Count('pk'), ultima=Max('fecha_modificacion'))
+            partes.append(f"{modelo._meta.label}:{datos['total']}:{datos['ultima'].isoformat() if datos['ultima'] else ''}")
+            if datos['ultima'] and (ultima_modificacion is None or datos['ultima'] > ultima_modificacion):
+                ultima_modificacion = datos['ultima']
+
+        etag = quote_etag(hashlib.sha1('|'.join(partes).encode()).hexdigest())
+        return etag, int(ultima_modificacion.timestamp()) if ultima_modificacion else None
+
+    @staticmethod
+    def etag_datos(datos, variante=''):
+        """
+        ETag a partir del contenido ya calculado de una respuesta, para las que
+        no salen de un modelo con fecha_modificacion (ej: una serie o un cache).
+        """
+        contenido = json.dumps(datos, sort_keys=True, cls=DjangoJSONEncoder)
+        return quote_etag(hashlib.sha1(f'{variante}|{contenido}'.encode()).hexdigest())
+
+    @classmethod
+    def respuesta(cls, request, datos, ultima_modificacion=None):
+        """
+        Response de DRF para vistas @api_view con el ETag de sus datos, o 304 si
+        el del cliente sigue vigente (ahorra serializar y enviar la respuesta).
+        Como en RespuestaCondicionalMixin, la API navegable no se valida.
+        """
+        formato = request.accepted_renderer.format
+        if formato == 'api':
+            return Response(datos)
+
+        etag = cls.etag_datos(datos, formato)
+        response = cls.no_modificado(request, etag, ultima_modificacion)
+        if response is None:
+            response = cls.agregar_validadores(Response(datos), etag, ultima_modificacion)
+        return response
+
+    @classmethod
+    def no_modificado(cls, request, etag, ultima_modificacion=None):
+        """
+        Devuelve la respuesta 304 si el pedido trae If-None-Match/If-Modified-Since
+        vigentes, o None si hay que armar la respuesta completa.
+        """
+        response = get_conditional_response(request, etag=etag, last_modified=ultima_modificacion)
+        if response is not None:
+            cls.agregar_validadores(response, etag, ultima_modificacion)
+        return response
+
+    @staticmethod
+    def agregar_validadores(response, etag, ultima_modificacion=None):
+        response['ETag'] = etag
+        if ultima_modificacion is not None:
+            response['Last-Modified'] = http_date(ultima_modificacion)
+        return response
+
+
+class RespuestaCondicionalMixin:
+    """
+    Mixin para ViewSets: list y retrieve responden 304 cuando no cambió
+    ninguno de los modelos de modelos_validador desde el ETag/fecha del cliente.
+    La API navegable (HTML) no se valida porque depende de la sesión.
+    """
+
+    modelos_validador = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.respuesta_condicional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.respuesta_condicional(super().retrieve, request, *args, **kwargs)
+
+    def respuesta_condicional(self, vista, request, *args, **kwargs):
+        formato = request.accepted_renderer.format
+        if not self.modelos_validador or formato == 'api':
+            return vista(request, *args, **kwargs)
+
+        # Los validadores se leen ANTES que los datos: si algo cambia en el
+        # medio, el cliente recibe datos más nuevos que su ETag y vuelve a pedirlos
+        etag, ultima_modificacion = RespuestaCondicional.validadores(self.modelos_validador, formato)
+        response = RespuestaCondicional.no_modificado(request, etag, ultima_modificacion)
+        if response is not None:
+            return response
+
+        response = vista(request, *args, **kwargs)
+        if response.status_code == 200:
+            RespuestaCondicional.agregar_validadores(response, etag, ultima_modificacion)
+        return response
@@ -1,10 +1,10 @@
 # m3d_app/views.py
+from datetime import datetime
 from django.http import HttpResponse
 from rest_framework import viewsets
 from django.shortcuts import render
-from django.db.models import Q
-from rest_framework.response import Response
-from rest_framework.decorators import api_view
+from django.db.models import Exists, OuterRef, Prefetch
+from rest_framework.decorators import action, api_view
 
 from .models.suscriptor.suscriptor import Suscriptor
 from .models.suscriptor.particular_con_impresora import ParticularConImpresora
@@ -14,13 +14,19 @@ from .models.suscriptor.institucion_sin_impresora import InstitucionSinImpresora
 from .models.impresora.impresora import Impresora
 from .models.bloque3d.bloque import Bloque
 from .models.nodos.nodo_recepcion import NodoRecepcion
+from .models.bloque3d.progreso_diario import ProgresoDiario
+from .utils.busqueda_suscriptores import BusquedaSuscriptores
+from .utils.estadisticas_bloques import EstadisticasBloques
+from .utils.exportacion import ExportacionBloquesNdjson
+from .utils.relaciones_serializer import RelacionesDelSerializerMixin
+from .utils.respuesta_condicional import RespuestaCondicional, RespuestaCondicionalMixin
 
 # Importaciones de serializadores desde tu archivo serializers.py
 from .serializers import (
     SuscriptorConBloquesSerializer, SuscriptorSerializer, ImpresoraSerializer, 
     ParticularConImpresoraSerializer, ParticularSinImpresoraSerializer,
     InstitucionConImpresoraSerializer, InstitucionSinImpresoraSerializer,
-    BloqueSerializer, NodoRecepcionSerializer
+    BloqueSerializer, NodoRecepcionSerializer, BloqueResumidoSerializer
 )
 
 # Tu vista existente
@@ -28,45 +34,78 @@ def my_view(request):
     return render(request, 'template.html')
 
 # ViewSets
-class SuscriptorViewSet(viewsets.ModelViewSet):
+# Los ViewSets con serializers anidados usan RelacionesDelSerializerMixin para
+# traer las relaciones en la misma consulta del listado. Todos responden GET
+# condicionales (ETag/304) con RespuestaCondicionalMixin, a partir de los
+# modelos que leen (todos con fecha_modificacion)
+class SuscriptorViewSet(RespuestaCondicionalMixin, viewsets.ModelViewSet):
     queryset = Suscriptor.objects.all()
     serializer_class = SuscriptorSerializer
+    modelos_validador = (Suscriptor,)
 
-class ImpresoraViewSet(viewsets.ModelViewSet):
+class ImpresoraViewSet(RespuestaCondicionalMixin, viewsets.ModelViewSet):
     queryset = Impresora.objects.all()
     serializer_class = ImpresoraSerializer
+    modelos_validador = (Impresora,)
 
-class ParticularConImpresoraViewSet(viewsets.ModelViewSet):
+class ParticularConImpresoraViewSet(RespuestaCondicionalMixin, RelacionesDelSerializerMixin, viewsets.ModelViewSet):
     queryset = ParticularConImpresora.objects.all()
     serializer_class = ParticularConImpresoraSerializer
+    modelos_validador = (ParticularConImpresora, Suscriptor, Impresora)
 
-class ParticularSinImpresoraViewSet(viewsets.ModelViewSet):
+class ParticularSinImpresoraViewSet(RespuestaCondicionalMixin, RelacionesDelSerializerMixin, viewsets.ModelViewSet):
     queryset = ParticularSinImpresora.objects.all()
     serializer_class = ParticularSinImpresoraSerializer
+    modelos_validador = (ParticularSinImpresora, Suscriptor)
 
-class InstitucionConImpresoraViewSet(viewsets.ModelViewSet):
+class InstitucionConImpresoraViewSet(RespuestaCondicionalMixin, RelacionesDelSerializerMixin, viewsets.ModelViewSet):
     queryset = InstitucionConImpresora.objects.all()
     serializer_class = InstitucionConImpresoraSerializer
+    modelos_validador = (InstitucionConImpresora, Suscriptor, Impresora)
 
-class InstitucionSinImpresoraViewSet(viewsets.ModelViewSet):
+class InstitucionSinImpresoraViewSet(RespuestaCondicionalMixin, RelacionesDelSerializerMixin, viewsets.ModelViewSet):
     queryset = InstitucionSinImpresora.objects.all()
     serializer_class = InstitucionSinImpresoraSerializer
+    modelos_validador = (InstitucionSinImpresora, Suscriptor)
 
-class BloqueViewSet(viewsets.ModelViewSet):
+class BloqueViewSet(RespuestaCondicionalMixin, viewsets.ModelViewSet):
     queryset = Bloque.objects.all()
     serializer_class = BloqueSerializer
+    modelos_validador = (Bloque,)
 
-class NodoRecepcionViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'], url_path='ndjson')
+    def ndjson(self, request):
+        """
+        Todos los bloques con el nombre de su suscriptor y el nro_sorteo, un
+        JSON por línea y sin paginar (/api/bloques/ndjson/).
+        """
+        return ExportacionBloquesNdjson.respuesta()
+
+class NodoRecepcionViewSet(RespuestaCondicionalMixin, viewsets.ModelViewSet):
     queryset = NodoRecepcion.objects.all()
     serializer_class = NodoRecepcionSerializer
+    modelos_validador = (NodoRecepcion,)
 
-class SuscriptorConBloquesViewSet(viewsets.ReadOnlyModelViewSet):
+class SuscriptorConBloquesViewSet(RespuestaCondicionalMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para listar suscriptores con sus bloques asignados.
     Permite filtrar por tipo de suscriptor, email y otros campos.
     """
-    queryset = Suscriptor.objects.all().prefetch_related('bloques')
+    # Los bloques se traen solo con las columnas de BloqueResumidoSerializer
+    # (más la FK que usa el prefetch para repartirlos)
+    queryset = Suscriptor.objects.all().prefetch_related(
+        Prefetch('bloques', queryset=Bloque.objects.only(*BloqueResumidoSerializer.Meta.fields, 'suscriptor'))
+    )
     serializer_class = SuscriptorConBloquesSerializer
+    modelos_validador = (Suscriptor, Bloque)
+
+    @staticmethod
+    def filtrar_con_bloques(queryset):
+        """
+        Deja solo los suscriptores con algún bloque, con EXISTS: sin el JOIN que
+        repite cada suscriptor por bloque ni el DISTINCT para deshacerlo.
+        """
+        return queryset.filter(Exists(Bloque.objects.filter(suscriptor=OuterRef('pk'))))
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -79,20 +118,46 @@ class SuscriptorConBloquesViewSet(viewsets.ReadOnlyModelViewSet):
         # Filtrar por email
         email = self.request.query_params.get('email', None)
         if email:
-            queryset = queryset.filter(email__icontains=email)
+            queryset = BusquedaSuscriptores.buscar(queryset, email, columnas=['email'])
             
         # Filtrar por nombre/apellido/nombre_institucion
         nombre = self.request.query_params.get('nombre', None)
         if nombre:
-            queryset = queryset.filter(
-                Q(nombre__icontains=nombre) | 
-                Q(apellido__icontains=nombre) |
-                Q(nombre_institucion__icontains=nombre)
-            )
+            queryset = BusquedaSuscriptores.buscar(queryset, nombre, columnas=['nombre', 'apellido', 'nombre_institucion'])
+            
+        # Búsqueda general: nombre, institución, email, DNI, teléfono o número de bloque,
+        # ordenada por relevancia
+        q = self.request.query_params.get('q', None)
+        if q:
+            queryset = BusquedaSuscriptores.buscar(queryset, q)
             
         # Solo incluir suscriptores que tienen bloques asignados
         solo_con_bloques = self.request.query_params.get('solo_con_bloques', 'true')
         if solo_con_bloques.lower() == 'true':
-            queryset = queryset.filter(bloques__isnull=False).distinct()
+            queryset = self.filtrar_con_bloques(queryset)
             
-        return queryset
\ No newline at end of file
+        return queryset
+
+
+@api_view(['GET'])
+def estadisticas(request):
+    """
+    Embudo de estados de los bloques: total, por sección, por provincia del
+    suscriptor y por nodo de recepción (/api/estadisticas/). Sale de una sola
+    consulta agrupada y se cachea EstadisticasBloques.CACHE_TIMEOUT segundos.
+    El ETag sale de lo cacheado, así un 304 tampoco consulta la base.
+    """
+    estadisticas = EstadisticasBloques.obtener()
+    generado = int(datetime.fromisoformat(estadisticas['generado']).timestamp())
+    return RespuestaCondicional.respuesta(request, estadisticas, generado)
+
+
+@api_view(['GET'])
+def progreso_diario(request):
+    """
+    Serie diaria de bloques asignados, validados, entregados en nodo, recibidos
+    en M3D y con diploma, con sus acumulados (/api/progreso-diario/). Se lee de
+    ProgresoDiario en una consulta; la completa el comando actualizar_progreso_diario.
+    El ETag sale de la serie, así un 304 no la vuelve a enviar.
+    """
+    return RespuestaCondicional.respuesta(request, ProgresoDiario.serie())
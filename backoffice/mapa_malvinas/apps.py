@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MapaMalvinasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mapa_malvinas'
+
+    def ready(self):
+        # Registrar las señales que invalidan el snapshot cacheado del mapa
+        from . import signals  # noqa: F401
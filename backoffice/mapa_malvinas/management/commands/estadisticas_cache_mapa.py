@@ -0,0 +1,28 @@
+# mapa_malvinas/management/commands/estadisticas_cache_mapa.py
+
+from django.core.management.base import BaseCommand
+from mapa_malvinas.utils.mapa_snapshot import MapaSnapshot
+
+class Command(BaseCommand):
+    help = 'Muestra los aciertos y fallos del cache del snapshot del mapa'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reiniciar', action='store_true', help='Poner los contadores en cero después de mostrarlos')
+        parser.add_argument('--invalidar', action='store_true', help='Invalidar el snapshot actual para forzar su reconstrucción')
+
+    def handle(self, *args, **options):
+        stats = MapaSnapshot.estadisticas()
+
+        self.stdout.write(self.style.SUCCESS('Estadísticas del cache del mapa:'))
+        self.stdout.write(f"  - Hits: {stats['hits']}")
+        self.stdout.write(f"  - Misses: {stats['misses']}")
+        self.stdout.write(f"  - Ratio de aciertos: {stats['ratio']:.1%}")
+        self.stdout.write(f"  - Generación actual: {stats['generacion']}")
+
+        if options['reiniciar']:
+            MapaSnapshot.reiniciar_estadisticas()
+            self.stdout.write(self.style.WARNING('Contadores reiniciados'))
+
+        if options['invalidar']:
+            MapaSnapshot.invalidar()
+            self.stdout.write(self.style.WARNING('Snapshot invalidado'))
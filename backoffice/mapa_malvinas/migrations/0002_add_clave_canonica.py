@@ -0,0 +1,46 @@
+# Generated by Django 5.1.15 on 2026-10-18 15:42
+
+from django.db import migrations, models
+
+
+def clave_canonica(numero_bloque):
+    # Misma normalización que ClaveBloque.canonica al crear esta migración
+    # (copiada: los cambios posteriores a esa clase no deben alterar la migración)
+    if not numero_bloque:
+        return ""
+
+    clave = str(numero_bloque).strip().lstrip('*').replace(' ', '')
+
+    partes = clave.split('-')
+    if len(partes) == 2 and partes[0].isdigit() and partes[1].isdigit():
+        return f"{int(partes[0]):02d}-{int(partes[1]):02d}"
+
+    return clave
+
+
+def completar_clave_canonica(apps, schema_editor):
+    MapaBloque = apps.get_model('mapa_malvinas', 'MapaBloque')
+    bloques = list(MapaBloque.objects.only('id', 'numero_bloque'))
+    for bloque in bloques:
+        bloque.clave_canonica = clave_canonica(bloque.numero_bloque)
+    MapaBloque.objects.bulk_update(bloques, ['clave_canonica'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mapa_malvinas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='mapabloque',
+            options={'verbose_name': 'Historia Bloque', 'verbose_name_plural': 'Historia Bloques'},
+        ),
+        migrations.AddField(
+            model_name='mapabloque',
+            name='clave_canonica',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(completar_clave_canonica, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mapa_malvinas', '0002_add_clave_canonica'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mapabloque',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -2,6 +2,7 @@
 
 from django.db import models
 from ..choices.tipo_bloque import TipoBloque
+from m3d_app.utils.clave_bloque import ClaveBloque
 
 class MapaBloque(models.Model):
     # Código en formato "M3D 05-01" (corresponde a la sección 5, bloque 1)
@@ -14,6 +15,9 @@ class MapaBloque(models.Model):
     # Formato estándar para relacionar con m3d_app.Bloque (ej: "05-01")
     numero_bloque = models.CharField(max_length=20, db_index=True)
     
+    # Clave normalizada compartida con m3d_app.Bloque.clave_canonica
+    clave_canonica = models.CharField(max_length=20, db_index=True, editable=False, default='')
+    
     descripcion = models.TextField()  # Breve descripción del bloque del mapa
     coordenadas = models.CharField(max_length=100, blank=True, null=True)  # Latitud y longitud opcional
     
@@ -24,6 +28,8 @@ class MapaBloque(models.Model):
         null=True,
     )
 
+    fecha_modificacion = models.DateTimeField(auto_now=True, db_index=True)
+
     class Meta:
         verbose_name = "Historia Bloque"
         verbose_name_plural = "Historia Bloques"
@@ -42,5 +48,7 @@ class MapaBloque(models.Model):
                 if len(partes) == 2:
                     self.seccion = partes[0].strip()
                     self.numero = partes[1].strip()
+        
+        self.clave_canonica = ClaveBloque.canonica(self.numero_bloque)
                     
         super().save(*args, **kwargs)
\ No newline at end of file
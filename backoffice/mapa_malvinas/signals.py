@@ -0,0 +1,21 @@
+# backoffice/mapa_malvinas/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models.mapa_bloque.mapa_bloque import MapaBloque
+from .utils.mapa_snapshot import MapaSnapshot
+from m3d_app.models.bloque3d.bloque import Bloque
+from m3d_app.signals import bloques_actualizados_en_lote
+
+@receiver(post_save, sender=Bloque)
+@receiver(bloques_actualizados_en_lote, sender=Bloque)
+@receiver(post_delete, sender=Bloque)
+@receiver(post_save, sender=MapaBloque)
+@receiver(post_delete, sender=MapaBloque)
+def invalidar_snapshot_mapa(sender, **kwargs):
+    """
+    Cualquier alta, cambio o baja de un bloque invalida el snapshot del mapa.
+    Se espera al commit para que nadie reconstruya el snapshot con datos viejos.
+    """
+    transaction.on_commit(MapaSnapshot.invalidar)
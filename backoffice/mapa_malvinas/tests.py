@@ -1,3 +1,164 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from mapa_malvinas.models.mapa_bloque.mapa_bloque import MapaBloque
+from mapa_malvinas.utils.mapa_snapshot import MapaSnapshot
+from m3d_app.models.bloque3d.bloque import Bloque
+from m3d_app.models.bloque3d.version_mapa import VersionMapa
+from m3d_app.signals import bloques_actualizados_en_lote
+
+CACHE_LOCAL = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class MapaBloquesViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # El poster completo: 60 secciones x 25 bloques
+        MapaBloque.objects.bulk_create([
+            MapaBloque(
+                codigo=f"M3D {seccion:02d}-{numero:02d}",
+                seccion=f"{seccion:02d}",
+                numero=f"{numero:02d}",
+                numero_bloque=f"{seccion:02d}-{numero:02d}",
+                clave_canonica=f"{seccion:02d}-{numero:02d}",
+                descripcion=f"Historia {seccion:02d}-{numero:02d}",
+            )
+            for seccion in range(1, 61)
+            for numero in range(1, 26)
+        ])
+        Bloque.objects.create(numero_bloque='*05-01', estado='validacion')
+        Bloque.objects.create(numero_bloque='*32-07', estado='asignado')
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('mapa_malvinas:mapa_bloques')
+
+    def test_mapa_se_arma_en_un_numero_fijo_de_consultas(self):
+        # Primer render para que el tema del admin quede creado y cacheado
+        self.client.get(self.url)
+        MapaSnapshot.invalidar()
+
+        # Versión del mapa + una sola consulta con el estado anotado
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Mapa-Cache'], 'MISS')
+        self.assertEqual(response.context['total_bloques'], 1500)
+
+    def test_mapa_cacheado_no_consulta_la_base(self):
+        self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response['X-Mapa-Cache'], 'HIT')
+
+    def test_estado_del_bloque_con_asterisco_llega_a_su_celda(self):
+        response = self.client.get(self.url)
+
+        celdas = {
+            bloque['clave_canonica']: bloque['estado']
+            for fila_secciones in response.context['filas']
+            for seccion in fila_secciones
+            for bloques in seccion['filas_bloques'].values()
+            for bloque in bloques
+        }
+        self.assertEqual(len(celdas), 1500)
+        self.assertEqual(celdas['05-01'], 'validacion')
+        self.assertEqual(celdas['32-07'], 'asignado')
+        self.assertEqual(celdas['05-02'], 'libre')
+
+    def test_guardar_un_bloque_invalida_el_snapshot(self):
+        self.client.get(self.url)
+
+        bloque = Bloque.objects.get(numero_bloque='*05-01')
+        bloque.estado = 'diploma_entregado'
+        with self.captureOnCommitCallbacks(execute=True):
+            bloque.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Mapa-Cache'], 'MISS')
+        self.assertContains(response, 'estado-diploma_entregado" data-bloque="05-01"')
+
+    def test_etag_vigente_responde_304(self):
+        response = self.client.get(self.url)
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(0):
+            no_modificado = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(no_modificado.status_code, 304)
+
+        bloque = Bloque.objects.get(numero_bloque='*05-01')
+        bloque.estado = 'recibido_m3d'
+        with self.captureOnCommitCallbacks(execute=True):
+            bloque.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'estado-recibido_m3d" data-bloque="05-01"')
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class MapaDeltaViewTests(TestCase):
+
+    def setUp(self):
+        self.url = reverse('mapa_malvinas:mapa_delta')
+        Bloque.objects.create(numero_bloque='*05-01', estado='validacion')
+        Bloque.objects.create(numero_bloque='05-02', estado='asignado')
+        self.version = VersionMapa.actual()[0]
+
+    def delta(self, since):
+        response = self.client.get(self.url, {'since': since})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_sin_since_devuelve_todos_los_bloques(self):
+        delta = self.delta(0)
+        self.assertTrue(delta['completo'])
+        self.assertEqual(delta['version'], self.version)
+        self.assertCountEqual(
+            delta['bloques'],
+            [{'numero_bloque': '05-01', 'estado': 'validacion'}, {'numero_bloque': '05-02', 'estado': 'asignado'}]
+        )
+
+    def test_devuelve_solo_los_cambios_posteriores_a_since(self):
+        self.assertEqual(self.delta(self.version)['bloques'], [])
+
+        bloque = Bloque.objects.get(numero_bloque='05-02')
+        bloque.estado = 'entregado_nodo'
+        bloque.save()
+
+        delta = self.delta(self.version)
+        self.assertFalse(delta['completo'])
+        self.assertEqual(delta['version'], self.version + 1)
+        self.assertEqual(delta['bloques'], [{'numero_bloque': '05-02', 'estado': 'entregado_nodo'}])
+
+    def test_bajas_y_cambios_en_lote_piden_resincronizar(self):
+        Bloque.objects.get(numero_bloque='05-02').delete()
+        delta = self.delta(self.version)
+        self.assertTrue(delta['completo'])
+        self.assertEqual(delta['bloques'], [{'numero_bloque': '05-01', 'estado': 'validacion'}])
+
+        # Ya sincronizado, vuelve a recibir solo deltas hasta el próximo cambio en lote
+        self.assertFalse(self.delta(delta['version'])['completo'])
+        Bloque.objects.update(estado='recibido_m3d')
+        bloques_actualizados_en_lote.send(sender=Bloque)
+        delta = self.delta(delta['version'])
+        self.assertTrue(delta['completo'])
+        self.assertEqual(delta['bloques'], [{'numero_bloque': '05-01', 'estado': 'recibido_m3d'}])
+
+    def test_since_posterior_a_la_version_actual_pide_resincronizar(self):
+        # Por ejemplo, un cliente abierto antes de restaurar la base
+        delta = self.delta(self.version + 100)
+        self.assertTrue(delta['completo'])
+        self.assertEqual(delta['version'], self.version)
+        self.assertEqual(len(delta['bloques']), 2)
+
+    def test_since_invalido_responde_400(self):
+        response = self.client.get(self.url, {'since': 'ayer'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json())
@@ -6,4 +6,5 @@ app_name = 'mapa_malvinas'
 
 urlpatterns = [
     path('mapa-bloques/', views.mapa_bloques, name='mapa_bloques'),
-]
\ No newline at end of file
+    path('delta/', views.mapa_delta, name='mapa_delta'),
+]
@@ -0,0 +1,196 @@
+# backoffice/mapa_malvinas/utils/mapa_snapshot.py
+
+import time
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils.cache import quote_etag
+from ..models.mapa_bloque.mapa_bloque import MapaBloque
+from m3d_app.models.bloque3d.bloque import Bloque
+from m3d_app.models.bloque3d.version_mapa import VersionMapa
+
+class MapaSnapshot:
+    """
+    Snapshot precalculado de la grilla del mapa (60 secciones x 25 bloques).
+    Se construye una sola vez, se guarda en el cache de Django y se invalida
+    desde las señales de Bloque y MapaBloque (ver mapa_malvinas/signals.py).
+    """
+
+    CACHE_PREFIX = 'mapa_malvinas:snapshot'
+    CACHE_KEY_SNAPSHOT = CACHE_PREFIX
+    # La generación cambia en cada invalidación. El snapshot se guarda junto con la
+    # generación vigente al empezar a construirlo, así uno armado mientras se
+    # invalidaba nunca se sirve como válido.
+    CACHE_KEY_GENERACION = f'{CACHE_PREFIX}:generacion'
+    CACHE_KEY_HITS = f'{CACHE_PREFIX}:hits'
+    CACHE_KEY_MISSES = f'{CACHE_PREFIX}:misses'
+    CACHE_TIMEOUT = 60 * 60 * 24
+
+    @classmethod
+    def obtener(cls):
+        """
+        Devuelve el snapshot del mapa desde el cache, construyéndolo si no existe.
+
+        Returns:
+            Tuple: (snapshot, hit) donde snapshot es el dict con 'filas' y
+            'total_bloques' que consume el template, y hit indica si vino del cache.
+        """
+        generacion = cls._generacion()
+        guardado = cache.get(cls.CACHE_KEY_SNAPSHOT)
+        if guardado is not None and guardado['generacion'] == generacion:
+            cls._incrementar(cls.CACHE_KEY_HITS)
+            return guardado['snapshot'], True
+
+        cls._incrementar(cls.CACHE_KEY_MISSES)
+        snapshot = cls.construir()
+        cache.set(cls.CACHE_KEY_SNAPSHOT, {'generacion': generacion, 'snapshot': snapshot}, cls.CACHE_TIMEOUT)
+        return snapshot, False
+
+    @classmethod
+    def etag(cls):
+        """
+        ETag del mapa: la generación vigente. Cambia con cada invalidación, así
+        que sirve de validador sin consultar la base. Se lee ANTES de obtener()
+        para que el snapshot servido nunca sea más viejo que su ETag.
+        """
+        return quote_etag(f"mapa-{cls._generacion()}")
+
+    @classmethod
+    def invalidar(cls):
+        """
+        Invalida el snapshot actual pasando a una nueva generación.
+        """
+        cache.set(cls.CACHE_KEY_GENERACION, time.time_ns(), None)
+
+    @classmethod
+    def estadisticas(cls):
+        """
+        Devuelve los contadores de aciertos y fallos del cache del mapa.
+        """
+        hits = cache.get(cls.CACHE_KEY_HITS, 0)
+        misses = cache.get(cls.CACHE_KEY_MISSES, 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'ratio': (hits / total) if total else 0.0,
+            'generacion': cls._generacion(),
+        }
+
+    @classmethod
+    def reiniciar_estadisticas(cls):
+        cache.delete_many([cls.CACHE_KEY_HITS, cls.CACHE_KEY_MISSES])
+
+    @classmethod
+    def _generacion(cls):
+        generacion = cache.get(cls.CACHE_KEY_GENERACION)
+        if generacion is None:
+            # Si la clave se perdió (reinicio o purga del cache) se arranca con un
+            # valor nuevo, de modo que nunca coincida con un snapshot viejo
+            cache.add(cls.CACHE_KEY_GENERACION, time.time_ns(), None)
+            generacion = cache.get(cls.CACHE_KEY_GENERACION)
+        return generacion
+
+    @staticmethod
+    def _incrementar(key):
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+    @staticmethod
+    def construir():
+        """
+        Construye la grilla completa del mapa a partir de MapaBloque y Bloque.
+
+        Returns:
+            Dict con 'filas' (6 filas de 10 secciones), 'total_bloques',
+            'version_mapa' (versión a partir de la cual el template pide deltas) y
+            'ultima_modificacion' (timestamp para el Last-Modified de la página).
+        """
+        # Leer la versión ANTES que los estados: un cambio concurrente queda con
+        # una versión mayor y el cliente lo recibe en el próximo delta
+        version_mapa, _ = VersionMapa.actual()
+
+        # Una sola consulta: los bloques del mapa (los 1500) con el estado del Bloque
+        # que tiene la misma clave canónica, trayendo solo las columnas que usa el template
+        # y las fechas de modificación para el Last-Modified de la página
+        bloque = Bloque.objects.filter(clave_canonica=OuterRef('clave_canonica'))
+
+        filas_mapa = MapaBloque.objects.annotate(
+            estado=Coalesce(Subquery(bloque.values('estado')[:1]), Value('libre')),
+            fecha_bloque=Subquery(bloque.values('fecha_modificacion')[:1]),
+        ).values('clave_canonica', 'codigo', 'descripcion', 'tipo', 'estado', 'fecha_modificacion', 'fecha_bloque')
+
+        mapa_bloques = {}
+        total_bloques = 0
+        fechas = []
+        for fila_mapa in filas_mapa:
+            fechas.append(fila_mapa.pop('fecha_modificacion'))
+            fechas.append(fila_mapa.pop('fecha_bloque'))
+            mapa_bloques[fila_mapa['clave_canonica']] = fila_mapa
+            total_bloques += 1
+
+        # Si el mapa está incompleto, las celdas vacías igual muestran el estado del Bloque
+        claves_faltantes = [
+            f"{seccion:02d}-{numero:02d}"
+            for seccion in range(1, 61)
+            for numero in range(1, 26)
+            if f"{seccion:02d}-{numero:02d}" not in mapa_bloques
+        ]
+        estados_sin_mapa = {}
+        if claves_faltantes:
+            for clave, estado, fecha in Bloque.objects.filter(
+                clave_canonica__in=claves_faltantes
+            ).values_list('clave_canonica', 'estado', 'fecha_modificacion'):
+                estados_sin_mapa[clave] = estado
+                fechas.append(fecha)
+
+        # Generar TODAS las secciones del 01 al 60
+        secciones = {}
+
+        for seccion_num in range(1, 61):
+            seccion_str = f"{seccion_num:02d}"
+
+            # Inicializar la estructura para esta sección
+            secciones[seccion_str] = {1: [], 2: [], 3: [], 4: [], 5: []}
+
+            # Llenar con bloques (si existen) o vacíos
+            for numero in range(1, 26):  # Del 1 al 25 (5 filas de 5 bloques cada una)
+                fila = (numero - 1) % 5 + 1
+                numero_str = f"{numero:02d}"
+                clave = f"{seccion_str}-{numero_str}"  # Clave canónica: "01-01"
+
+                bloque_info = mapa_bloques.get(clave)
+                if bloque_info is None:
+                    # Crear un bloque vacío si no existe en MapaBloque
+                    bloque_info = {
+                        'clave_canonica': clave,
+                        'codigo': f"M3D {seccion_str}-{numero_str}",
+                        'descripcion': 'Sin contenido',
+                        'tipo': None,
+                        'estado': estados_sin_mapa.get(clave, 'libre')
+                    }
+
+                secciones[seccion_str][fila].append(bloque_info)
+
+        # Organizar las secciones en 6 filas de 10 secciones cada una
+        filas = []
+        for fila_num in range(6):
+            fila_secciones = []
+            for col_num in range(10):
+                seccion_str = f"{fila_num * 10 + col_num + 1:02d}"  # "01"-"60"
+                fila_secciones.append({
+                    'seccion': seccion_str,
+                    'filas_bloques': secciones[seccion_str]
+                })
+            filas.append(fila_secciones)
+
+        fechas = [fecha for fecha in fechas if fecha is not None]
+        return {
+            'filas': filas,
+            'total_bloques': total_bloques,
+            'version_mapa': version_mapa,
+            'ultima_modificacion': int(max(fechas).timestamp()) if fechas else None,
+        }